@@ -1,10 +1,28 @@
-from openai import OpenAI
-import json
 from datetime import datetime
+from agent.context_fetcher import ContextFetcher
+from agent.context_prefetcher import context_sources
+from agent.context_serializer import SectionCache, context_fingerprint
+from agent.executor import AgentExecutor
 from agent.prompt_generator import PromptGenerator
-from agent.tool_essentials import ToolRegistry
+from agent.speculation import SongSpeculator
+from agent.stream_parser import SongStreamParser
+from agent.tool_essentials import ToolArgumentError, ToolRegistry
+from types import SimpleNamespace
 from typing import List
 
+from src import tracing
+from src.cache import SWRCache
+from src.http_transport import metrics_event_hooks
+
+DEFAULT_TOKEN_BUDGET = 1000
+
+# First turn tool calls of the model per (model, Spotify user, prompt, mood
+# fingerprint), shared by every session of the process.
+shared_cache = SWRCache(
+    ttls={"playlist": 300, "song": 60},
+    max_entries={"playlist": 256, "song": 256},
+)
+
 
 class Auralis:
     def __init__(
@@ -13,14 +31,51 @@ class Auralis:
         openai_api_key,
         lastfm_connector,
         model="gemini-2.5-flash",
+        context_timeout=5.0,
+        base_url=None,
+        max_steps=4,
+        time_budget=60.0,
+        response_cache=None,
+        cached_features=("playlist",),
     ):
         self.openai_api_key = openai_api_key
         self.model = model
-        self.base_url = self.supported_models[self.model]
-        self.openai = OpenAI(api_key=self.openai_api_key, base_url=self.base_url)
-        self.prompt_generator = PromptGenerator()
+        self.base_url = base_url or self.supported_models[self.model]
+        self._openai = None
+        self._async_openai = None
+        self.prompt_generator = PromptGenerator(
+            token_budget=self.token_budgets.get(self.model, DEFAULT_TOKEN_BUDGET)
+        )
         self.spotify_connector = spotify_connector
         self.lastfm_connector = lastfm_connector
+        self.context_fetcher = ContextFetcher(
+            timeout=context_timeout, span_name="build_context"
+        )
+        # Sections of unchanged connector data are dumped and serialized once.
+        self.sections = SectionCache()
+        self.response_cache = response_cache or shared_cache
+        self.cached_features = set(cached_features)
+        self.executor = AgentExecutor(
+            self, max_steps=max_steps, time_budget=time_budget
+        )
+        self.tools = {
+            name: tool["function"].__get__(self, self.__class__)
+            for name, tool in self.registry.tools.items()
+        }
+        self.async_tools = {
+            "suggest_song": self.asuggest_song,
+            "generate_playlist": self.agenerate_playlist,
+        }
+        self.speculator = SongSpeculator(self)
+
+    def close(self):
+        """
+        Stops the background speculation and the worker threads, e.g. when
+        the session ends. The connectors are closed by their owner.
+        """
+        self.speculator.close()
+        self.context_fetcher.close()
+        self.executor.close()
 
     registry = ToolRegistry()
     supported_models = {
@@ -30,8 +85,22 @@ class Auralis:
         "o4-mini": "https://api.openai.com/v1/",
         "local_lm_studio": "localhost:1234/v1",
     }
+    # Estimated tokens the serialized context may use per model, small local
+    # models get the tightest budget.
+    token_budgets = {
+        "gemini-2.5-flash": 1500,
+        "gpt-4.1": 1500,
+        "gpt-4o": 1200,
+        "o4-mini": 1000,
+        "local_lm_studio": 500,
+    }
 
-    @registry.register(description="Suggest and plays a song in spotify", tags=["song"])
+    @registry.register(
+        description="Suggest and plays a song in spotify",
+        terminal=True,
+        resource="playback",
+        tags=["song"],
+    )
     def suggest_song(self, song_title: str, artist_name: str, reason: str) -> str:
         """Suggests and plays a song in spotify based on the given song title, artist name
 
@@ -43,15 +112,20 @@ class Auralis:
         Returns:
             Song: The suggested song.
         """
-        search_query = f"{song_title} {artist_name}"
-        song = self.spotify_connector.search_for_song(search_query)[0]
-        if self.spotify_connector.is_currently_playing():
-            self.spotify_connector.add_songs_to_queue(song.uri)
-        else:
-            self.spotify_connector.play_song(song.uri)
+        song = self.find_song(
+            self.spotify_connector.search_for_song(f"{song_title} {artist_name}"),
+            song_title,
+            artist_name,
+        )
+        self.spotify_connector.play_or_queue(song.uri)
         return song_title, artist_name, reason
 
-    @registry.register(description="Assembles a playlist in spotify", tags=["playlist"])
+    @registry.register(
+        description="Assembles a playlist in spotify",
+        terminal=True,
+        resource="playlists",
+        tags=["playlist"],
+    )
     def generate_playlist(
         self, playlist_name: str, songs: List[str], reason: str
     ) -> str:
@@ -67,17 +141,97 @@ class Auralis:
         self.spotify_connector.generate_playlist_from_auralis(playlist_name, songs)
         return playlist_name, songs, reason
 
+    # The OpenAI SDK takes most of the import time of Auralis, so it is only
+    # imported once a model is called.
+    @property
+    def openai(self):
+        if self._openai is None:
+            from openai import DefaultHttpxClient, OpenAI
+
+            self._openai = OpenAI(
+                api_key=self.openai_api_key,
+                base_url=self.base_url,
+                http_client=DefaultHttpxClient(event_hooks=metrics_event_hooks()),
+            )
+        return self._openai
+
+    @openai.setter
+    def openai(self, client):
+        self._openai = client
+
+    @property
+    def async_openai(self):
+        if self._async_openai is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            self._async_openai = AsyncOpenAI(
+                api_key=self.openai_api_key,
+                base_url=self.base_url,
+                http_client=DefaultAsyncHttpxClient(
+                    event_hooks=metrics_event_hooks(asynchronous=True)
+                ),
+            )
+        return self._async_openai
+
+    @async_openai.setter
+    def async_openai(self, client):
+        self._async_openai = client
+
+    @staticmethod
+    def find_song(songs, song_title, artist_name):
+        """
+        Returns the best search match. Without one the suggestion is sent
+        back to the model like invalid arguments, nothing was played yet.
+        """
+        if not songs:
+            raise ToolArgumentError(
+                f"suggest_song: no Spotify track found for {song_title} by {artist_name}"
+            )
+        return songs[0]
+
+    async def asuggest_song(self, song_title, artist_name, reason):
+        """Async counterpart of suggest_song for async connectors."""
+        songs = await self.spotify_connector.search_for_song(
+            f"{song_title} {artist_name}"
+        )
+        song = self.find_song(songs, song_title, artist_name)
+        await self.spotify_connector.play_or_queue(song.uri)
+        return song_title, artist_name, reason
+
+    async def agenerate_playlist(self, playlist_name, songs, reason):
+        """Async counterpart of generate_playlist for async connectors."""
+        await self.spotify_connector.generate_playlist_from_auralis(
+            playlist_name, songs
+        )
+        return playlist_name, songs, reason
+
+    def context_sources(self, weather_connector=None, city=None):
+        return context_sources(
+            self.spotify_connector,
+            self.lastfm_connector,
+            weather_connector=weather_connector,
+            city=city,
+        )
+
+    @tracing.traced("build_context")
     def build_context(self, weather_connector=None, city=None):
+        sources = self.context_sources(weather_connector=weather_connector, city=city)
+        results = self.context_fetcher.fetch(sources)
+        return self.assemble_context(results, weather_connector)
+
+    async def abuild_context(self, weather_connector=None, city=None):
+        """
+        Async counterpart of build_context, expects async connectors.
+        """
+        sources = self.context_sources(weather_connector=weather_connector, city=city)
+        results = await self.context_fetcher.afetch(sources)
+        return self.assemble_context(results, weather_connector)
+
+    def assemble_context(self, results, weather_connector=None):
+        location = results.get("location")
+        weather = results.get("weather")
         hour = datetime.now().hour
         month = datetime.now().month
-        location = (
-            weather_connector.encode_location(city) if weather_connector else None
-        )
-        weather = (
-            weather_connector.get_current_location_weather(city)
-            if weather_connector
-            else None
-        )
         if location:
             dt = weather_connector.encode_time(location)
             hour = dt.hour
@@ -102,70 +256,222 @@ class Auralis:
             if month in [9, 10, 11]
             else "winter"
         )
-        recent_songs = self.spotify_connector.recently_played()
-        top_tracks = self.spotify_connector.users_top_tracks()
-        playlists = self.spotify_connector.get_user_playlists()
-        top_songs = self.lastfm_connector.get_top_songs()
+        recent_songs = results["recent_songs"] or []
+        top_tracks = results["top_tracks"] or []
+        playlists = results["playlists"] or []
+        top_songs = results["top_songs"] or []
         return {
             "time_of_day": time_of_day,
             "season": season,
-            "current_trending_songs_in_the_world": [
-                item.model_dump() for item in top_songs
-            ],
-            "my_recently_played_songs": [
-                item.model_dump(exclude={"id", "uri"}) for item in recent_songs[:20]
-            ],
-            "my_top_tracks": [
-                item.model_dump(exclude={"id", "uri"}) for item in top_tracks[:13]
-            ],
-            "my_playlists": [
-                item.model_dump(exclude={"id", "uri", "href"}) for item in playlists
-            ],
+            "current_trending_songs_in_the_world": self.sections.get(
+                "current_trending_songs_in_the_world",
+                top_songs,
+                lambda: [item.model_dump() for item in top_songs],
+            ),
+            "my_recently_played_songs": self.sections.get(
+                "my_recently_played_songs",
+                recent_songs,
+                lambda: [
+                    item.model_dump(exclude={"id", "uri"}) for item in recent_songs[:20]
+                ],
+            ),
+            "my_top_tracks": self.sections.get(
+                "my_top_tracks",
+                top_tracks,
+                lambda: [
+                    item.model_dump(exclude={"id", "uri"}) for item in top_tracks[:13]
+                ],
+            ),
+            "my_playlists": self.sections.get(
+                "my_playlists",
+                playlists,
+                lambda: [
+                    item.model_dump(exclude={"id", "uri", "href"}) for item in playlists
+                ],
+            ),
             "my_current_weather": weather.model_dump() if weather else None,
             "my_current_location": location.model_dump(exclude={"lat", "lon"})
             if location
             else None,
         }
 
-    def song_of_the_moment_suggestion(self, weather_connector=None, city=None):
-        context = self.build_context(weather_connector=weather_connector, city=city)
-        user_prompt = {"context": context}
-        tools = self.registry.to_openai_tools()
-        response = self.openai.chat.completions.create(
-            model=self.model,
-            messages=self.prompt_generator.build_suggest_song_messages(user_prompt),
-            tools=tools,
-            temperature=0.7,
+    def suggest_song_request(self, context, exclude=()):
+        return {
+            "model": self.model,
+            "messages": self.prompt_generator.build_suggest_song_messages(
+                context, exclude
+            ),
+            "tools": self.registry.to_openai_tools(),
+            "temperature": 0.7,
+        }
+
+    def playlist_request(self, user_prompt, context):
+        return {
+            "model": self.model,
+            "messages": self.prompt_generator.build_playlist_messages(
+                user_prompt, context
+            ),
+            "tools": self.registry.to_openai_tools(),
+            "temperature": 0.7,
+        }
+
+    def response_cache_key(self, feature, context, user_prompt="", user_id=None):
+        """
+        Returns the response cache key of a request, None when the cache is
+        not enabled for ``feature`` ("song" or "playlist").
+        """
+        if feature not in self.cached_features:
+            return None
+        if user_id is None:
+            user_id = self.spotify_connector.user_id
+        # The mood says nothing about the listener, the user keeps one
+        # account's replays out of another one's.
+        return feature, (
+            self.model,
+            user_id,
+            user_prompt,
+            context_fingerprint(context),
         )
-        message = response.choices[0].message
-        if message.tool_calls:
-            for tool_call in message.tool_calls:
-                return self.call_function(tool_call)
-            print("No valid suggestion.")
+
+    async def aresponse_cache_key(self, feature, context, user_prompt=""):
+        if feature not in self.cached_features:
             return None
+        user_id = await self.spotify_connector.get_user_id()
+        return self.response_cache_key(feature, context, user_prompt, user_id)
 
-    def call_function(self, tool_call):
-        tool_name = tool_call.function.name
-        arguments = json.loads(tool_call.function.arguments)
-        tool_func = self.registry.tools[tool_name]["function"]
-        tool_func = tool_func.__get__(self, self.__class__)
-        return tool_func(**arguments)
-
-    def playlist_generator(self, user_prompt, weather_connector=None, city=None):
-        tools = self.registry.to_openai_tools()
+    @tracing.traced("auralis.song_of_the_moment_suggestion")
+    def song_of_the_moment_suggestion(
+        self, weather_connector=None, city=None, speculate=False
+    ):
+        """
+        Suggests a song for the moment and plays or queues it.
+
+        Args:
+            weather_connector (WeatherApiConnector): Adds the weather of ``city``.
+            city (str): The city the user is in.
+            speculate (bool): Serve the suggestion computed in the background
+                after the previous one when the mood did not change, and start
+                computing the next one, see SongSpeculator.
+
+        Returns:
+            tuple: (song_title, artist_name, reason), None without a suggestion.
+        """
         context = self.build_context(weather_connector=weather_connector, city=city)
-        try:
-            response = self.openai.chat.completions.create(
-                model=self.model,
-                messages=self.prompt_generator.build_playlist_messages(
-                    user_prompt, context
+        result = None
+        suggestion = self.speculator.take(context) if speculate else None
+        if suggestion is not None:
+            with tracing.span("auralis.speculation_hit"):
+                self.spotify_connector.play_or_queue(suggestion.uri)
+            result = suggestion.as_result()
+        else:
+            result = self.executor.first_result(
+                self.executor.run(
+                    self.suggest_song_request(context),
+                    cache_key=self.response_cache_key("song", context),
+                )
+            )
+        if result is None:
+            print("No valid suggestion.")
+        elif speculate:
+            self.speculator.schedule(result, weather_connector, city)
+        return result
+
+    async def asong_of_the_moment_suggestion(self, weather_connector=None, city=None):
+        context = await self.abuild_context(
+            weather_connector=weather_connector, city=city
+        )
+        results = await self.executor.arun(
+            self.suggest_song_request(context),
+            cache_key=await self.aresponse_cache_key("song", context),
+        )
+        return self.executor.first_result(results)
+
+    def call_function(self, tool_call):
+        name = tool_call.function.name
+        arguments = self.registry.validate(name, tool_call.function.arguments)
+        return self.tools[name](**arguments)
+
+    async def acall_function(self, tool_call):
+        name = tool_call.function.name
+        arguments = self.registry.validate(name, tool_call.function.arguments)
+        return await self.async_tools[name](**arguments)
+
+    def stream_tool_calls(self, request):
+        """
+        Streams a completion and collects its tool calls.
+
+        Songs of a generate_playlist call are handed to the track resolver as
+        soon as each entry of the array is complete, so the Spotify searches
+        run while the model is still generating the rest of the playlist.
+
+        Args:
+            request (dict): The keyword arguments for chat.completions.create.
+
+        Returns:
+            list: Tool calls with the same shape as non-streamed ones.
+        """
+        with tracing.span(
+            "llm.completion", model=request["model"], stream=True
+        ) as span:
+            calls = self._collect_stream(request)
+            span.set(tool_calls=len(calls))
+        return [
+            SimpleNamespace(
+                id=call["id"],
+                type="function",
+                function=SimpleNamespace(
+                    name=call["name"], arguments=call["arguments"]
                 ),
-                tools=tools,
-                temperature=0.7,
             )
-            message = response.choices[0].message
-            if message.tool_calls:
-                for tool_call in message.tool_calls:
-                    return self.call_function(tool_call)
-        except Exception as e:
-            return {}, e.message
+            for _, call in sorted(calls.items())
+        ]
+
+    def _collect_stream(self, request):
+        resolver = self.spotify_connector.track_resolver
+        stream = self.openai.chat.completions.create(**request, stream=True)
+        calls = {}
+        parsers = {}
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            for delta in chunk.choices[0].delta.tool_calls or []:
+                call = calls.setdefault(
+                    delta.index, {"id": None, "name": "", "arguments": ""}
+                )
+                call["id"] = delta.id or call["id"]
+                if delta.function is None:
+                    continue
+                call["name"] += delta.function.name or ""
+                call["arguments"] += delta.function.arguments or ""
+                if call["name"] != "generate_playlist":
+                    continue
+                if delta.index not in parsers:
+                    parsers[delta.index] = SongStreamParser()
+                    songs = parsers[delta.index].feed(call["arguments"])
+                else:
+                    songs = parsers[delta.index].feed(delta.function.arguments or "")
+                for song in songs:
+                    resolver.prefetch(song)
+        return calls
+
+    @tracing.traced("auralis.playlist_generator")
+    def playlist_generator(
+        self, user_prompt, weather_connector=None, city=None, stream=False
+    ):
+        context = self.build_context(weather_connector=weather_connector, city=city)
+        results = self.executor.run(
+            self.playlist_request(user_prompt, context),
+            stream=stream,
+            cache_key=self.response_cache_key("playlist", context, user_prompt),
+        )
+        return self.executor.first_result(results)
+
+    async def aplaylist_generator(self, user_prompt, weather_connector=None, city=None):
+        context = await self.abuild_context(
+            weather_connector=weather_connector, city=city
+        )
+        results = await self.executor.arun(
+            self.playlist_request(user_prompt, context),
+            cache_key=await self.aresponse_cache_key("playlist", context, user_prompt),
+        )
+        return self.executor.first_result(results)
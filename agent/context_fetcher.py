@@ -0,0 +1,101 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict
+
+from src import tracing
+
+
+class ContextFetcher:
+    def __init__(self, timeout=5.0, timeouts=None, max_workers=8, span_name=None):
+        """
+        Runs the independent context sources of Auralis in parallel.
+
+        Args:
+            timeout (float): Default deadline in seconds for every source.
+            timeouts (dict): Optional per source deadlines overriding the default.
+            max_workers (int): Size of the thread pool shared by all fetches.
+            span_name (str): When set every source is traced as span
+                ``<span_name>.<source name>``.
+        """
+        self.span_name = span_name
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="auralis-context"
+        )
+
+    def fetch(self, sources: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """
+        Starts every source at once and collects what finished in time.
+
+        Args:
+            sources (dict): Mapping of source name to a zero argument callable.
+
+        Returns:
+            dict: Source name to result. Sources that failed or missed their
+            deadline map to None so callers can build a partial context.
+        """
+        started = time.monotonic()
+        futures = {
+            name: self.executor.submit(self._traced(name, source))
+            for name, source in sources.items()
+        }
+        results = {}
+        timed_out = []
+        for name, future in futures.items():
+            deadline = started + self.timeouts.get(name, self.timeout)
+            try:
+                results[name] = future.result(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except TimeoutError:
+                future.cancel()
+                results[name] = None
+                timed_out.append(name)
+            except Exception:
+                results[name] = None
+        if timed_out and tracing.current_span() is not None:
+            tracing.current_span().set(timed_out=timed_out)
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _traced(self, name, source):
+        if self.span_name is None:
+            return source
+
+        def run():
+            with tracing.span(f"{self.span_name}.{name}"):
+                return source()
+
+        return tracing.bind(run)
+
+    async def afetch(self, sources: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """
+        Async variant of ``fetch`` for sources returning awaitables.
+
+        Args:
+            sources (dict): Mapping of source name to a zero argument callable
+                returning a coroutine, e.g. a method of an async connector.
+
+        Returns:
+            dict: Source name to result, None for failed or late sources.
+        """
+
+        async def run(name, source):
+            try:
+                result = source()
+                if inspect.isawaitable(result):
+                    result = await asyncio.wait_for(
+                        result, self.timeouts.get(name, self.timeout)
+                    )
+                return result
+            except Exception:
+                return None
+
+        names = list(sources)
+        results = await asyncio.gather(*(run(name, sources[name]) for name in names))
+        return dict(zip(names, results))
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from agent.context_fetcher import ContextFetcher
+from src import tracing
+
+# The first page of playlists, as many as the context always had.
+CONTEXT_PLAYLISTS = 50
+
+
+def context_sources(
+    spotify_connector, lastfm_connector, weather_connector=None, city=None
+):
+    """
+    Returns the context sources of Auralis as zero argument callables. The
+    connectors cache every source, so calling them warms the cache.
+    """
+    sources = {
+        "recent_songs": lambda: spotify_connector.recently_played(limit=20),
+        "top_tracks": lambda: spotify_connector.users_top_tracks(limit=13),
+        "playlists": lambda: spotify_connector.get_user_playlists(
+            limit=CONTEXT_PLAYLISTS
+        ),
+        "top_songs": lastfm_connector.get_top_songs,
+    }
+    if weather_connector:
+        sources["location"] = lambda: weather_connector.encode_location(city)
+        sources["weather"] = lambda: weather_connector.get_current_location_weather(
+            city
+        )
+    return sources
+
+
+class ContextPrefetcher:
+    def __init__(
+        self,
+        spotify_connector,
+        lastfm_connector,
+        interval=60.0,
+        idle_timeout=900.0,
+        timeout=30.0,
+    ):
+        """
+        Warms the context caches of one user in the background, so a click
+        only pays for the LLM call and the Spotify writes.
+
+        Started right after the Spotify login, it fetches every context
+        source once and then every ``interval`` seconds. The connector
+        caches serve stale entries while refreshing them, so the later runs
+        keep the context fresh without blocking anybody.
+
+        Args:
+            spotify_connector (SpotifyApiConnector): The logged in user.
+            lastfm_connector (LastFmConnector): Source of the trending songs.
+            interval (float): Seconds between two warm-ups.
+            idle_timeout (float): The prefetcher stops when ``touch`` was not
+                called for this many seconds, e.g. the browser tab was closed.
+            timeout (float): Deadline of a single source.
+        """
+        self.spotify_connector = spotify_connector
+        self.lastfm_connector = lastfm_connector
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.fetcher = ContextFetcher(
+            timeout=timeout, max_workers=6, span_name="context.prefetch"
+        )
+        self.weather_connector = None
+        self.city = None
+        self.warmups = 0
+        self._last_used = time.monotonic()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="auralis-prefetch", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._stopped.is_set()
+
+    def configure(self, weather_connector=None, city=None):
+        """
+        Sets the weather source, warming it right away when it changed.
+        """
+        self.touch()
+        if weather_connector is self.weather_connector and city == self.city:
+            return
+        self.weather_connector = weather_connector
+        self.city = city
+        self._wake.set()
+
+    def touch(self):
+        """
+        Marks the session as active, call it on every rerun.
+        """
+        self._last_used = time.monotonic()
+
+    def warm(self):
+        """
+        Fetches every context source once through the connector caches.
+
+        Returns:
+            dict: Source name to result, None for failed sources.
+        """
+        sources = context_sources(
+            self.spotify_connector,
+            self.lastfm_connector,
+            self.weather_connector,
+            self.city,
+        )
+        with tracing.span("context.prefetch", sources=len(sources)):
+            results = self.fetcher.fetch(sources)
+        self.warmups += 1
+        return results
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if time.monotonic() - self._last_used > self.idle_timeout:
+                break
+            self._wake.clear()
+            try:
+                self.warm()
+            except Exception:
+                pass
+            self._wake.wait(self.interval)
+        self._stopped.set()
+        self.fetcher.close()
@@ -0,0 +1,195 @@
+import hashlib
+import math
+
+# Sections of the Auralis context, the first ones are dropped first when the
+# serialized context does not fit into the token budget.
+DROP_ORDER = (
+    "my_playlists",
+    "current_trending_songs_in_the_world",
+    "my_recently_played_songs",
+    "my_top_tracks",
+)
+
+# (section, reference) pairs, tracks of section that also appear in reference
+# are only listed once, in reference.
+DEDUP = (("my_recently_played_songs", "my_top_tracks"),)
+
+# The parts of the context that decide the mood of a recommendation. The
+# listening history and the playlists change with every served suggestion and
+# created playlist, so they are left out.
+MOOD_KEYS = ("time_of_day", "season", "my_current_weather", "my_current_location")
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of tokens of ``text`` as one token per 4 characters,
+    close enough for English and music metadata across the supported models.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def _cell(value):
+    if isinstance(value, dict):
+        return " ".join(str(v) for v in value.values() if v not in (None, ""))
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value)
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _dedup_key(row):
+    return tuple(_cell(v).casefold() for v in row.values())
+
+
+class ContextSection(list):
+    """
+    The rows of a context section that keep their serialized lines once
+    computed, so an unchanged section is serialized only once however many
+    prompts and fingerprints it goes into.
+    """
+
+    __slots__ = ("lines",)
+
+    def __init__(self, rows=()):
+        super().__init__(rows)
+        self.lines = None
+
+
+class SectionCache:
+    def __init__(self):
+        """
+        Keeps the latest section built from every data source, e.g. the
+        playlists list returned by the connector cache.
+
+        The connector caches hand out the same list until the entry is
+        refreshed or invalidated, so a section is rebuilt exactly when its
+        data changed.
+        """
+        self._sections = {}
+
+    def get(self, name, source, build):
+        """
+        Args:
+            name (str): The section, e.g. "my_playlists".
+            source (Any): The data the section is built from.
+            build (callable): Zero argument callable returning the rows.
+
+        Returns:
+            ContextSection: The cached section while ``source`` is the same
+            object, else a freshly built one.
+        """
+        cached = self._sections.get(name)
+        if cached is not None and cached[0] is source:
+            return cached[1]
+        section = ContextSection(build())
+        self._sections[name] = (source, section)
+        return section
+
+    def clear(self):
+        self._sections.clear()
+
+
+class ContextSerializer:
+    def __init__(self, token_budget=None, drop_order=DROP_ORDER, dedup=DEDUP):
+        """
+        Serializes the context dict of Auralis into a compact prompt text.
+
+        Lists of items become tables with a single header line instead of
+        repeating the JSON keys per item, tracks listed in several sections are
+        kept only once, and when the text exceeds ``token_budget`` items are
+        dropped from the end of the least relevant sections first.
+
+        Args:
+            token_budget (int): Maximum estimated tokens, None for no limit.
+            drop_order (tuple): Section names, least relevant first.
+            dedup (tuple): (section, reference) pairs to deduplicate.
+        """
+        self.token_budget = token_budget
+        self.drop_order = drop_order
+        self.dedup = dedup
+
+    def serialize(self, context):
+        """
+        Args:
+            context (dict): The context as assembled by Auralis.
+
+        Returns:
+            tuple[str, dict]: The serialized text and the estimated tokens
+            used by every section that made it into the text.
+        """
+        sections = {key: value for key, value in context.items() if value}
+        for section, reference in self.dedup:
+            if section in sections and reference in sections:
+                seen = {_dedup_key(row) for row in sections[reference]}
+                rows = [row for row in sections[section] if _dedup_key(row) not in seen]
+                if len(rows) != len(sections[section]):
+                    sections[section] = rows
+        lines = {
+            key: self._cached_lines(key, value)
+            for key, value in sections.items()
+            if value
+        }
+        tokens = {
+            key: estimate_tokens("\n".join(value)) for key, value in lines.items()
+        }
+        if self.token_budget is not None:
+            self._fit(lines, tokens)
+        lines = {key: value for key, value in lines.items() if value}
+        text = "\n".join(line for value in lines.values() for line in value)
+        return text, {key: tokens[key] for key in lines}
+
+    def _fit(self, lines, tokens):
+        # +1 accounts for the newline joining two sections.
+        total = sum(tokens.values()) + len(tokens)
+        for key in self.drop_order:
+            rows = lines.get(key)
+            while rows and total > self.token_budget:
+                rows.pop()
+                if len(rows) == 1:
+                    rows.pop()  # only the header is left
+                total -= tokens[key]
+                tokens[key] = estimate_tokens("\n".join(rows)) if rows else 0
+                total += tokens[key]
+            if total <= self.token_budget:
+                return
+
+    def _cached_lines(self, key, value):
+        if not isinstance(value, ContextSection):
+            return self._section_lines(key, value)
+        if value.lines is None or value.lines[0] != key:
+            value.lines = (key, self._section_lines(key, value))
+        # A copy, fitting into the budget drops lines.
+        return list(value.lines[1])
+
+    def _section_lines(self, key, value):
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            columns = list(value[0])
+            rows = [" | ".join(_cell(row.get(c, "")) for c in columns) for row in value]
+            return [f"{key} ({' | '.join(columns)}):", *rows]
+        if isinstance(value, list):
+            return [f"{key}: {', '.join(_cell(v) for v in value)}"]
+        if isinstance(value, dict):
+            pairs = ", ".join(
+                f"{k}={_cell(v)}" for k, v in value.items() if v not in (None, "")
+            )
+            return [f"{key}: {pairs}"]
+        return [f"{key}: {_cell(value)}"]
+
+
+def context_fingerprint(context):
+    """
+    Returns a stable hash of the mood of a context, see MOOD_KEYS. Weather is
+    reduced to its forecast and the temperature in whole degrees, so
+    practically identical moods share a fingerprint.
+    """
+    context = {key: (context or {}).get(key) for key in MOOD_KEYS}
+    weather = context.get("my_current_weather")
+    if weather:
+        forecast = weather.get("weather") or {}
+        context["my_current_weather"] = {
+            "forecast": forecast.get("forecast")
+            if isinstance(forecast, dict)
+            else None,
+            "temperature": round(weather.get("temperature") or 0),
+        }
+    text, _ = ContextSerializer(dedup=()).serialize(context)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,321 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from agent.tool_essentials import ToolArgumentError
+from src import json_codec, tracing
+
+
+class AgentExecutor:
+    def __init__(self, auralis, max_steps=4, time_budget=60.0, max_workers=4):
+        """
+        Runs the tool calling loop of Auralis.
+
+        The tool calls of a model response are executed and their results are
+        fed back to the model for a follow-up turn until it stops calling
+        tools, a terminal tool ran, or the step or time budget is spent.
+
+        Only invalid arguments are fed back, they are rejected before a tool
+        does anything. Any other error is raised to the caller, the tool may
+        already have had side effects, e.g. created a playlist.
+
+        Args:
+            auralis (Auralis): Provides the LLM clients and the bound tools.
+            max_steps (int): Maximum number of model turns.
+            time_budget (float): Seconds after which no new turn is started.
+            max_workers (int): Tool calls of one turn executed at once, see
+                ``call_all``.
+        """
+        self.auralis = auralis
+        self.max_steps = max_steps
+        self.time_budget = time_budget
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="auralis-tools"
+        )
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, request, stream=False, cache_key=None, tools=None):
+        """
+        Runs the loop for a chat completion request.
+
+        Args:
+            request (dict): Keyword arguments for chat.completions.create.
+            stream (bool): Stream the first turn, see Auralis.stream_tool_calls.
+            cache_key (tuple): (kind, key) of the first turn in the response
+                cache of Auralis. A fresh entry replays its tool calls without
+                calling the model, None disables the cache.
+            tools (dict): Tool name to callable, replaces the bound tools of
+                Auralis for this run, e.g. to resolve a song without playing it.
+                They must be side effect free, they run concurrently.
+
+        Returns:
+            list: The results of every executed tool call, in call order.
+        """
+        deadline = time.monotonic() + self.time_budget
+        messages = list(request["messages"])
+        results = []
+        tool_calls = self.cached_tool_calls(cache_key)
+        replayed = tool_calls is not None
+        for step in range(self.max_steps):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            content = None
+            if step > 0 or tool_calls is None:
+                turn = {**request, "messages": messages, "timeout": remaining}
+                if stream and step == 0:
+                    tool_calls = self.auralis.stream_tool_calls(turn)
+                else:
+                    with tracing.span(
+                        "llm.completion", model=request["model"], step=step
+                    ) as span:
+                        response = self.auralis.openai.chat.completions.create(**turn)
+                        self.record_usage(span, response)
+                    message = response.choices[0].message
+                    content, tool_calls = message.content, message.tool_calls
+            if not tool_calls:
+                break
+            tool_calls, outputs = self.call_all(tool_calls, tools)
+            if step == 0:
+                self.cache_tool_calls(cache_key, tool_calls, outputs, replayed)
+            results.extend(outputs)
+            if self.is_terminal(tool_calls, outputs):
+                break
+            messages.extend(self.turn_messages(content, tool_calls, outputs))
+        return results
+
+    async def arun(self, request, cache_key=None):
+        """
+        Async variant of ``run`` for Auralis instances with async connectors.
+        """
+        deadline = time.monotonic() + self.time_budget
+        messages = list(request["messages"])
+        results = []
+        tool_calls = self.cached_tool_calls(cache_key)
+        replayed = tool_calls is not None
+        for step in range(self.max_steps):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            content = None
+            if step > 0 or tool_calls is None:
+                with tracing.span(
+                    "llm.completion", model=request["model"], step=step
+                ) as span:
+                    response = await self.auralis.async_openai.chat.completions.create(
+                        **{**request, "messages": messages, "timeout": remaining}
+                    )
+                    self.record_usage(span, response)
+                message = response.choices[0].message
+                content, tool_calls = message.content, message.tool_calls
+            if not tool_calls:
+                break
+            tool_calls, outputs = await self.acall_all(tool_calls)
+            if step == 0:
+                self.cache_tool_calls(cache_key, tool_calls, outputs, replayed)
+            results.extend(outputs)
+            if self.is_terminal(tool_calls, outputs):
+                break
+            messages.extend(self.turn_messages(content, tool_calls, outputs))
+        return results
+
+    def cached_tool_calls(self, cache_key):
+        if cache_key is None:
+            return None
+        cached = self.auralis.response_cache.lookup(*cache_key)
+        if cached is None:
+            return None
+        return [
+            SimpleNamespace(
+                id=f"cached-{index}",
+                function=SimpleNamespace(name=name, arguments=arguments),
+            )
+            for index, (name, arguments) in enumerate(cached)
+        ]
+
+    def cache_tool_calls(self, cache_key, tool_calls, outputs, replayed=False):
+        """
+        Stores the tool calls of a first turn whose tools all succeeded, and
+        drops the entry otherwise so a failing replay is not repeated. Replays
+        are not stored again, the entry expires after its original TTL.
+        """
+        if cache_key is None:
+            return
+        if any(self.is_error(output) for output in outputs):
+            self.auralis.response_cache.invalidate(*cache_key)
+        elif not replayed:
+            self.auralis.response_cache.put(
+                *cache_key,
+                [
+                    (tool_call.function.name, tool_call.function.arguments)
+                    for tool_call in tool_calls
+                ],
+            )
+
+    @staticmethod
+    def record_usage(span, response):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            span.set(
+                prompt_tokens=usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens,
+            )
+
+    def call_all(self, tool_calls, tools=None):
+        """
+        Executes the tool calls of one turn, independent calls concurrently.
+
+        Calls of tools sharing a ``resource``, e.g. two suggest_song calls
+        that both control the playback, run one after another in call order,
+        and the first terminal one that succeeded ends its lane. Override
+        tools are side effect free, they all run concurrently.
+
+        Returns:
+            tuple: The executed tool calls and their outputs, in call order.
+        """
+        lanes = self.lanes(tool_calls, tools)
+        if len(lanes) == 1:
+            executed = self.call_lane(lanes[0], tools)
+        else:
+            executed = [
+                call
+                for lane in self.executor.map(
+                    tracing.bind(self.call_lane), lanes, [tools] * len(lanes)
+                )
+                for call in lane
+            ]
+        return self.in_call_order(executed)
+
+    async def acall_all(self, tool_calls):
+        lanes = self.lanes(tool_calls)
+        executed = [
+            call
+            for lane in await asyncio.gather(*map(self.acall_lane, lanes))
+            for call in lane
+        ]
+        return self.in_call_order(executed)
+
+    def lanes(self, tool_calls, tools=None):
+        """
+        Groups the tool calls of one turn into lanes of (index, tool_call)
+        that may run concurrently, one per resource and one per call of a
+        tool without a resource.
+        """
+        registered = self.auralis.registry.tools
+        lanes = {}
+        for index, tool_call in enumerate(tool_calls):
+            resource = None
+            if tools is None:
+                resource = registered.get(tool_call.function.name, {}).get("resource")
+            lane = index if resource is None else resource
+            lanes.setdefault(lane, []).append((index, tool_call))
+        return list(lanes.values())
+
+    def call_lane(self, lane, tools=None):
+        executed = []
+        for index, tool_call in lane:
+            output = self.call(tool_call, tools)
+            executed.append((index, tool_call, output))
+            if self.is_terminal([tool_call], [output]):
+                break
+        return executed
+
+    async def acall_lane(self, lane):
+        executed = []
+        for index, tool_call in lane:
+            output = await self.acall(tool_call)
+            executed.append((index, tool_call, output))
+            if self.is_terminal([tool_call], [output]):
+                break
+        return executed
+
+    @staticmethod
+    def in_call_order(executed):
+        executed.sort(key=lambda call: call[0])
+        return [call[1] for call in executed], [call[2] for call in executed]
+
+    def call(self, tool_call, tools=None):
+        """
+        Runs one tool call, invalid arguments are returned as
+        ``{"error": ...}`` for the model to correct them.
+        """
+        with tracing.span(f"tool.{tool_call.function.name}") as span:
+            try:
+                if tools is not None:
+                    return self.call_override(tool_call, tools)
+                return self.auralis.call_function(tool_call)
+            except ToolArgumentError as e:
+                span.set(error=str(e))
+                return {"error": str(e)}
+
+    def call_override(self, tool_call, tools):
+        name = tool_call.function.name
+        if name not in tools:
+            raise ToolArgumentError(f"tool {name} is not available")
+        arguments = self.auralis.registry.validate(name, tool_call.function.arguments)
+        return tools[name](**arguments)
+
+    async def acall(self, tool_call):
+        with tracing.span(f"tool.{tool_call.function.name}") as span:
+            try:
+                return await self.auralis.acall_function(tool_call)
+            except ToolArgumentError as e:
+                span.set(error=str(e))
+                return {"error": str(e)}
+
+    def is_terminal(self, tool_calls, outputs):
+        """
+        A turn ends the loop once a terminal tool succeeded. A failed one is
+        reported back so the model can correct its arguments.
+        """
+        tools = self.auralis.registry.tools
+        return any(
+            tools.get(tool_call.function.name, {}).get("terminal")
+            and not self.is_error(output)
+            for tool_call, output in zip(tool_calls, outputs)
+        )
+
+    @staticmethod
+    def is_error(output):
+        return isinstance(output, dict) and set(output) == {"error"}
+
+    @classmethod
+    def first_result(cls, results):
+        """
+        Returns the first successful tool result, or None.
+        """
+        return next((r for r in results if not cls.is_error(r)), None)
+
+    def turn_messages(self, content, tool_calls, outputs):
+        """
+        Builds the assistant and tool messages that feed one turn back.
+        """
+        messages = [
+            {
+                "role": "assistant",
+                "content": content,
+                "tool_calls": [
+                    {
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {
+                            "name": tool_call.function.name,
+                            "arguments": tool_call.function.arguments,
+                        },
+                    }
+                    for tool_call in tool_calls
+                ],
+            }
+        ]
+        for tool_call, output in zip(tool_calls, outputs):
+            messages.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": json_codec.dumps(output),
+                }
+            )
+        return messages
@@ -1,18 +1,57 @@
-import json
+from agent.context_serializer import ContextSerializer
+from src import tracing
 
 
 class PromptGenerator:
-    def __init__(self):
+    def __init__(self, token_budget=None):
+        """
+        Args:
+            token_budget (int): Maximum estimated tokens of the serialized
+                context, None to send the full context.
+        """
+        self.serializer = ContextSerializer(token_budget=token_budget)
         self.one_song_system_prompt = "You are a Spotify song recommender. Given the user prompt, select a single song that best matches the mood, genre, and overall vibe described. Focus on interpreting the user's preferences from their prompt and context, but do not directly copy songs from the user recently_played_songs and top_tracks. If absolutely necessary for better personalization, you may select one song from the user's known favorites, but only if it strongly fits the situation. Choose songs creatively, considering a variety of artists from different countries and regions where appropriate. Look into the current_trending_songs_in_the_world this might help user discover new music, but make sure that they fit the occasion"
         self.playlist_system_prompt = "You are a Spotify playlist manager. Given the user's prompt, generate a playlist with a fitting name.Focus primarily on the mood, genre preferences, and overall vibe inferred from the user prompt and context — but do not directly copy songs from the user recently_played_songs and top_tracks. If absolutely necessary to enhance personalization, you may include up to 4 songs from either the user's favorites or recently played, but only if they are a strong fit. Ensure the playlist duration is sufficient for a satisfying listening experience. Incorporate a variety of songs from different countries and regions  where appropriate to keep the playlist fresh and diverse. Do not include too many sogs from the same artist."
 
-    def build_suggest_song_messages(self, user_prompt):
+    def serialize_context(self, context):
+        """
+        Serializes the context within the token budget. The generator is
+        shared by concurrent requests, e.g. the prefetch and speculation
+        threads, so the usage is returned instead of kept on it.
+
+        Returns:
+            tuple[str, dict]: The text and the estimated tokens per section.
+        """
+        if not context:
+            return "", {}
+        return self.serializer.serialize(context)
+
+    def context_text(self, context):
+        """
+        Returns the serialized context and records its estimated tokens per
+        section on the span of the current request.
+        """
+        text, token_usage = self.serialize_context(context)
+        span = tracing.current_span()
+        if span is not None:
+            span.set(context_tokens=token_usage)
+        return text
+
+    def build_suggest_song_messages(self, context, exclude=()):
+        """
+        Args:
+            context (dict): The context of Auralis.build_context.
+            exclude (list[str]): Songs just suggested, e.g. "Title by Artist",
+                that must not be suggested again.
+        """
+        content = f"Suggest a song based on my context:\n{self.context_text(context)}"
+        if exclude:
+            content += "\nDo not suggest these songs, I just heard them: " + "; ".join(
+                exclude
+            )
         return [
             {"role": "system", "content": self.one_song_system_prompt},
-            {
-                "role": "user",
-                "content": f"Suggest a song based on my context: {json.dumps(user_prompt)}",
-            },
+            {"role": "user", "content": content},
         ]
 
     def build_playlist_messages(self, user_prompt, context):
@@ -20,6 +59,6 @@ class PromptGenerator:
             {"role": "system", "content": self.playlist_system_prompt},
             {
                 "role": "user",
-                "content": f"{user_prompt}. A bit about myself {json.dumps(context) if context else ''}",
+                "content": f"{user_prompt}. A bit about myself:\n{self.context_text(context)}",
             },
         ]
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from agent.context_serializer import context_fingerprint
+from src import tracing
+
+
+class SongSuggestion:
+    __slots__ = ("song_title", "artist_name", "reason", "uri", "fingerprint", "created")
+
+    def __init__(self, song_title, artist_name, reason, uri, fingerprint=None):
+        self.song_title = song_title
+        self.artist_name = artist_name
+        self.reason = reason
+        self.uri = uri
+        self.fingerprint = fingerprint
+        self.created = time.monotonic()
+
+    def as_result(self):
+        return self.song_title, self.artist_name, self.reason
+
+
+class SongSpeculator:
+    def __init__(self, auralis, max_age=900.0, wait=0.0, history=5):
+        """
+        Computes the next Song of the Moment in the background while the
+        user listens to the current one, resolved to a Spotify URI but not
+        played. The next click only plays it.
+
+        A speculation is thrown away when the mood fingerprint of the fresh
+        context differs from the one it was computed for, or it got too old.
+
+        Args:
+            auralis (Auralis): Provides the context, the model and the tools.
+            max_age (float): Seconds a speculation may be served.
+            wait (float): Seconds a click waits for a running speculation
+                before it falls back to a regular request. A running
+                speculation cannot be cancelled, so by default it does not
+                wait at all.
+            history (int): Number of served songs the model must not repeat.
+        """
+        self.auralis = auralis
+        self.max_age = max_age
+        self.wait = wait
+        self.served = deque(maxlen=history)
+        self.hits = 0
+        self.discarded = 0
+        self._pending = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="auralis-speculate"
+        )
+
+    def schedule(self, served, weather_connector=None, city=None):
+        """
+        Starts computing the suggestion following ``served``.
+
+        Args:
+            served (tuple): The (song_title, artist_name, reason) just served.
+        """
+        self.served.append(f"{served[0]} by {served[1]}")
+        exclude = list(self.served)
+        with self._lock:
+            self._pending = self._executor.submit(
+                self._speculate, exclude, weather_connector, city
+            )
+
+    def take(self, context):
+        """
+        Returns the speculation if it still fits ``context``, else None.
+        Either way it is consumed, a speculation is served at most once.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return None
+        try:
+            suggestion = pending.result(timeout=self.wait)
+        except TimeoutError:
+            # Only cancels a queued speculation, a running one finishes in
+            # the background and its result is dropped.
+            pending.cancel()
+            suggestion = None
+        except Exception:
+            suggestion = None
+        if (
+            suggestion is None
+            or suggestion.fingerprint != context_fingerprint(context)
+            or time.monotonic() - suggestion.created > self.max_age
+        ):
+            self.discarded += 1
+            return None
+        self.hits += 1
+        return suggestion
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _speculate(self, exclude, weather_connector, city):
+        with tracing.span("auralis.speculate_song"):
+            context = self.auralis.build_context(
+                weather_connector=weather_connector, city=city
+            )
+            results = self.auralis.executor.run(
+                self.auralis.suggest_song_request(context, exclude=exclude),
+                # Only side effect free tools, a speculation must not play or
+                # create anything.
+                tools={"suggest_song": self.resolve_song},
+            )
+            suggestion = self.auralis.executor.first_result(results)
+            if suggestion is not None:
+                suggestion.fingerprint = context_fingerprint(context)
+            return suggestion
+
+    def resolve_song(self, song_title, artist_name, reason):
+        """
+        Stands in for the suggest_song tool: searches the song but does not
+        play it.
+        """
+        song = self.auralis.find_song(
+            self.auralis.spotify_connector.search_for_song(
+                f"{song_title} {artist_name}"
+            ),
+            song_title,
+            artist_name,
+        )
+        return SongSuggestion(song_title, artist_name, reason, song.uri)
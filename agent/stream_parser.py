@@ -0,0 +1,55 @@
+import json
+import re
+
+
+class SongStreamParser:
+    def __init__(self, key="songs"):
+        """
+        Incrementally extracts the entries of a JSON string array from tool
+        call arguments while they are still being streamed.
+
+        Args:
+            key (str): The name of the array property, e.g. "songs".
+        """
+        self.buffer = ""
+        self.position = None
+        self.done = False
+        self._pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._decoder = json.JSONDecoder()
+
+    def feed(self, text):
+        """
+        Appends a chunk of the arguments and returns the newly completed entries.
+
+        Args:
+            text (str): The next argument delta as received from the model.
+
+        Returns:
+            list[str]: Array entries completed by this chunk, in order.
+        """
+        self.buffer += text
+        entries = []
+        if self.done:
+            return entries
+        if self.position is None:
+            match = self._pattern.search(self.buffer)
+            if not match:
+                return entries
+            self.position = match.end()
+        while True:
+            position = self.position
+            while position < len(self.buffer) and self.buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(self.buffer):
+                break
+            if self.buffer[position] == "]":
+                self.done = True
+                break
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, position)
+            except ValueError:
+                break
+            self.position = end
+            if isinstance(value, str):
+                entries.append(value)
+        return entries
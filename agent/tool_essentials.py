@@ -1,11 +1,261 @@
 import inspect
-from typing import Callable, Dict, List, Any, get_type_hints, get_origin, get_args
+import types
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from pydantic import BaseModel, ValidationError
+
+from src import json_codec
+
+SKIPPED_PARAMETERS = frozenset({"self", "action_context", "action_agent"})
+PRIMITIVE_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+class ToolArgumentError(ValueError):
+    """Raised when the arguments of a tool call do not match its signature."""
+
+
+def _is_union(origin):
+    return origin is Union or origin is types.UnionType
+
+
+def _is_model(param_type):
+    return inspect.isclass(param_type) and issubclass(param_type, BaseModel)
+
+
+def get_json_schema(param_type, defs=None):
+    """
+    Returns the JSON schema of a parameter annotation.
+
+    Supports primitives, List, Dict, Optional/Union, Literal and pydantic
+    models, anything else is described as a string.
+
+    Args:
+        defs (dict): Collects the ``$defs`` of nested pydantic models. Their
+            ``$ref`` pointers resolve against the root schema, so the caller
+            puts them there. Without it they are added to the returned schema.
+    """
+    if defs is None:
+        defs = {}
+        schema = get_json_schema(param_type, defs)
+        return {**schema, "$defs": defs} if defs else schema
+    origin = get_origin(param_type)
+    args = get_args(param_type)
+
+    if origin is list or origin is List:
+        item_type = args[0] if args else str
+        return {"type": "array", "items": get_json_schema(item_type, defs)}
+    elif origin is dict or origin is Dict:
+        key_type, val_type = args if args else (str, str)
+        return {
+            "type": "object",
+            "additionalProperties": get_json_schema(val_type, defs),
+        }
+    elif origin is Literal:
+        schema = {"enum": list(args)}
+        kinds = {type(arg) for arg in args}
+        if len(kinds) == 1 and type(args[0]) in PRIMITIVE_TYPES:
+            schema["type"] = PRIMITIVE_TYPES[type(args[0])]
+        return schema
+    elif _is_union(origin):
+        options = [arg for arg in args if arg is not type(None)]
+        if len(options) == 1:
+            return get_json_schema(options[0], defs)
+        return {"anyOf": [get_json_schema(option, defs) for option in options]}
+    elif _is_model(param_type):
+        schema = param_type.model_json_schema()
+        defs.update(schema.pop("$defs", {}))
+        return schema
+    elif param_type in PRIMITIVE_TYPES:
+        return {"type": PRIMITIVE_TYPES[param_type]}
+    else:
+        return {"type": "string"}
+
+
+def compile_validator(param_type):
+    """
+    Compiles a parameter annotation into a function that validates a decoded
+    JSON value and coerces it to the annotated type, raising ValueError.
+
+    Values models commonly send in the wrong JSON type are coerced, e.g. "3"
+    for an int or 3 for a str.
+    """
+    origin = get_origin(param_type)
+    args = get_args(param_type)
+
+    if origin is list or origin is List:
+        item = compile_validator(args[0] if args else Any)
+
+        def validate_list(value):
+            if not isinstance(value, list):
+                raise ValueError(f"expected an array, got {type(value).__name__}")
+            return [item(entry) for entry in value]
+
+        return validate_list
+    if origin is dict or origin is Dict:
+        entry = compile_validator(args[1] if args else Any)
+
+        def validate_dict(value):
+            if not isinstance(value, dict):
+                raise ValueError(f"expected an object, got {type(value).__name__}")
+            return {key: entry(val) for key, val in value.items()}
+
+        return validate_dict
+    if origin is Literal:
+        allowed = set(args)
+
+        def validate_literal(value):
+            if value not in allowed:
+                raise ValueError(f"expected one of {sorted(map(str, args))}")
+            return value
+
+        return validate_literal
+    if _is_union(origin):
+        optional = type(None) in args
+        options = [compile_validator(arg) for arg in args if arg is not type(None)]
+
+        def validate_union(value):
+            if value is None and optional:
+                return None
+            errors = []
+            for option in options:
+                try:
+                    return option(value)
+                except ValueError as e:
+                    errors.append(str(e))
+            raise ValueError(" or ".join(errors))
+
+        return validate_union
+    if _is_model(param_type):
+
+        def validate_model(value):
+            try:
+                return param_type.model_validate(value)
+            except ValidationError as e:
+                raise ValueError(str(e)) from None
+
+        return validate_model
+    if param_type is bool:
+        return _validate_bool
+    if param_type is int:
+        return _validate_int
+    if param_type is float:
+        return _validate_float
+    if param_type is str:
+        return _validate_str
+    return lambda value: value
+
+
+def _validate_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    raise ValueError(f"expected a boolean, got {value!r}")
+
+
+def _validate_int(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"expected an integer, got {value!r}")
+
+
+def _validate_float(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"expected a number, got {value!r}")
+
+
+def _validate_str(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"expected a string, got {value!r}")
+
+
+class ArgumentValidator:
+    def __init__(self, tool_name, validators=None, required=()):
+        """
+        Validates and coerces the arguments of one tool before it is called.
+
+        Args:
+            tool_name (str): Used in error messages.
+            validators (dict): Parameter name to compiled validator, None to
+                only check that the arguments are a JSON object.
+            required (tuple): Names of the parameters without default.
+        """
+        self.tool_name = tool_name
+        self.validators = validators
+        self.required = tuple(required)
+
+    def __call__(self, arguments):
+        """
+        Args:
+            arguments (str | dict): The raw JSON arguments of the tool call.
+
+        Returns:
+            dict: Keyword arguments for the tool.
+
+        Raises:
+            ToolArgumentError: If the arguments do not match the signature.
+        """
+        if isinstance(arguments, (str, bytes)):
+            try:
+                arguments = json_codec.loads(arguments or "{}")
+            except ValueError as e:
+                raise ToolArgumentError(
+                    f"{self.tool_name}: arguments are not valid JSON ({e})"
+                ) from None
+        if not isinstance(arguments, dict):
+            raise ToolArgumentError(f"{self.tool_name}: arguments must be an object")
+        if self.validators is None:
+            return arguments
+        missing = [name for name in self.required if name not in arguments]
+        if missing:
+            raise ToolArgumentError(
+                f"{self.tool_name}: missing arguments {', '.join(missing)}"
+            )
+        unknown = [name for name in arguments if name not in self.validators]
+        if unknown:
+            raise ToolArgumentError(
+                f"{self.tool_name}: unknown arguments {', '.join(unknown)}"
+            )
+        coerced = {}
+        for name, value in arguments.items():
+            try:
+                coerced[name] = self.validators[name](value)
+            except ValueError as e:
+                raise ToolArgumentError(f"{self.tool_name}.{name}: {e}") from None
+        return coerced
 
 
 class ToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Dict[str, Any]] = {}
         self._tools_by_tag: Dict[str, List[str]] = {}
+        self._openai_tools: List[dict] = []
 
     @property
     def tools(self) -> Dict[str, Dict[str, Any]]:
@@ -16,6 +266,13 @@ class ToolRegistry:
         return self._tools_by_tag
 
     def to_openai_tools(self) -> List[dict]:
+        """
+        Returns the tools payload for the OpenAI API. It is built once per
+        registration and shared between requests, so it must not be mutated.
+        """
+        return self._openai_tools
+
+    def _build_openai_tools(self) -> List[dict]:
         return [
             {
                 "type": "function",
@@ -28,6 +285,15 @@ class ToolRegistry:
             for tool_name, data in self._tools.items()
         ]
 
+    def validate(self, tool_name: str, arguments) -> Dict[str, Any]:
+        """
+        Validates the raw arguments of a tool call, see ArgumentValidator.
+        """
+        tool = self._tools.get(tool_name)
+        if tool is None:
+            raise ToolArgumentError(f"unknown tool {tool_name}")
+        return tool["validator"](arguments)
+
     def _get_tool_metadata(
         self,
         func: Callable,
@@ -35,6 +301,7 @@ class ToolRegistry:
         description: str = None,
         parameters_override: dict = None,
         terminal: bool = False,
+        resource: str = None,
         tags: List[str] = None,
     ) -> Dict[str, Any]:
         tool_name = tool_name or func.__name__
@@ -46,51 +313,38 @@ class ToolRegistry:
             signature = inspect.signature(func)
             type_hints = get_type_hints(func)
             args_schema = {"type": "object", "properties": {}, "required": []}
+            validators = {}
+            defs = {}
 
             for param_name, param in signature.parameters.items():
-                if param_name in ["self", "action_context", "action_agent"]:
+                if param_name in SKIPPED_PARAMETERS:
                     continue
 
-                def get_json_schema(param_type):
-                    origin = get_origin(param_type)
-                    args = get_args(param_type)
-
-                    if origin is list or origin is List:
-                        item_type = args[0] if args else str
-                        return {"type": "array", "items": get_json_schema(item_type)}
-                    elif origin is dict or origin is Dict:
-                        key_type, val_type = args if args else (str, str)
-                        return {
-                            "type": "object",
-                            "additionalProperties": get_json_schema(val_type),
-                        }
-                    elif param_type in [str, int, float, bool]:
-                        return {
-                            "type": {
-                                str: "string",
-                                int: "integer",
-                                float: "number",
-                                bool: "boolean",
-                            }[param_type]
-                        }
-                    else:
-                        return {"type": "string"}
-
                 param_type = type_hints.get(param_name, str)
-                param_schema = get_json_schema(param_type)
-                args_schema["properties"][param_name] = param_schema
+                args_schema["properties"][param_name] = get_json_schema(
+                    param_type, defs
+                )
+                validators[param_name] = compile_validator(param_type)
 
                 if param.default == inspect.Parameter.empty:
                     args_schema["required"].append(param_name)
+            if defs:
+                args_schema["$defs"] = defs
+            validator = ArgumentValidator(
+                tool_name, validators, args_schema["required"]
+            )
         else:
             args_schema = parameters_override
+            validator = ArgumentValidator(tool_name)
 
         return {
             "tool_name": tool_name,
             "description": description,
             "parameters": args_schema,
             "function": func,
+            "validator": validator,
             "terminal": terminal,
+            "resource": resource,
             "tags": tags or [],
         }
 
@@ -100,6 +354,7 @@ class ToolRegistry:
         description: str = None,
         parameters_override: dict = None,
         terminal: bool = False,
+        resource: str = None,
         tags: List[str] = None,
     ):
         def decorator(func: Callable):
@@ -109,6 +364,7 @@ class ToolRegistry:
                 description=description,
                 parameters_override=parameters_override,
                 terminal=terminal,
+                resource=resource,
                 tags=tags,
             )
 
@@ -116,9 +372,12 @@ class ToolRegistry:
                 "description": metadata["description"],
                 "parameters": metadata["parameters"],
                 "function": metadata["function"],
+                "validator": metadata["validator"],
                 "terminal": metadata["terminal"],
+                "resource": metadata["resource"],
                 "tags": metadata["tags"],
             }
+            self._openai_tools = self._build_openai_tools()
 
             for tag in metadata["tags"]:
                 self._tools_by_tag.setdefault(tag, []).append(metadata["tool_name"])
@@ -3,8 +3,11 @@ import dotenv
 import os
 
 from agent.auralis import Auralis
-from st_cookies_manager import EncryptedCookieManager
+from agent.context_prefetcher import ContextPrefetcher
+from models.compact import CompactPlaylist, CompactSong
+from src import tracing
 from src.lastfm_api_connector import LastFmConnector
+from src.session_resources import SessionResources
 from src.spotify_api_connector import SpotifyApiConnector
 from src.weather_api_connector import WeatherApiConnector
 
@@ -13,16 +16,27 @@ dotenv.load_dotenv()
 
 class App:
     def __init__(self):
-        st.cache_data.clear()  # Clears the data cache
-        st.cache_resource.clear()
         self.title = "Auralis 🎵"
-        self.lastfm_connector = LastFmConnector(os.getenv("LASTFM"))
         st.set_page_config(page_title=self.title, page_icon="🎧")
-        self.spotify_connector = SpotifyApiConnector(
-            os.getenv("SPOTIFY_CLIENT_ID"), os.getenv("SPOTIFY_CLIENT_SECRET")
+        # Connectors, agent and user info live as long as the session, a
+        # rerun only rebuilds what its settings changed.
+        self.resources = SessionResources(st.session_state)
+        self.lastfm_connector = self.resources.get(
+            "lastfm", lambda: LastFmConnector(os.getenv("LASTFM"))
+        )
+        self.spotify_connector = self.resources.get(
+            "spotify",
+            lambda: SpotifyApiConnector(
+                os.getenv("SPOTIFY_CLIENT_ID"),
+                os.getenv("SPOTIFY_CLIENT_SECRET"),
+                song_model=CompactSong,
+                playlist_model=CompactPlaylist,
+            ),
         )
         self.apply_custom_css()
 
+        from st_cookies_manager import EncryptedCookieManager
+
         self.cookies = EncryptedCookieManager(
             prefix="auralis/", password=os.getenv("COOKIES")
         )
@@ -49,8 +63,10 @@ class App:
         self.user = "unknown"
         self.app_title()
         self.handle_spotify_login()
+        self.prefetcher = None
         if self.spotify_connector.client is not None:
-            self.user = self.spotify_connector.get_user_info()["display_name"]
+            self.prefetcher = self.start_prefetch()
+            self.user = self.user_info()["display_name"]
         else:
             self.user = "Please sign in to Spotify"
         self.introduction(self.user)
@@ -119,10 +135,46 @@ class App:
                     self.spotify_connector.get_client(token_info)
                     st.success("Successfully authenticated! Reload the app.")
                     st.rerun()
-        else:
+        elif self.spotify_connector.client is None:
             token_info = st.session_state["spotify_token"]
             self.spotify_connector.get_client(token_info)
 
+    def start_prefetch(self):
+        """
+        Warms the context of the logged in user in the background, restarted
+        when it stopped after the session was idle.
+        """
+        prefetcher = self.resources.peek("prefetcher")
+        if prefetcher is not None and not prefetcher.running:
+            self.resources.invalidate("prefetcher")
+        prefetcher = self.resources.get(
+            "prefetcher",
+            lambda: ContextPrefetcher(
+                self.spotify_connector, self.lastfm_connector
+            ).start(),
+            key=st.session_state.get("spotify_token"),
+        )
+        prefetcher.touch()
+        return prefetcher
+
+    def user_info(self):
+        return self.resources.get(
+            "user",
+            self.spotify_connector.get_user_info,
+            key=st.session_state.get("spotify_token"),
+        )
+
+    def auralis(self):
+        return self.resources.get(
+            "auralis",
+            lambda: Auralis(
+                self.spotify_connector,
+                self.openai_api_key,
+                self.lastfm_connector,
+            ),
+            key=self.openai_api_key,
+        )
+
     def apply_custom_css(self):
         st.markdown(
             """
@@ -209,11 +261,19 @@ class App:
         self.cookies["token_info"] = ""
         self.cookies.save()
         self.openai_api_key = None
+        self.resources.invalidate("auralis")
         st.success("🔄 Reset complete.")
         st.rerun()
 
+    def logout(self):
+        st.session_state.pop("spotify_token", None)
+        st.query_params.clear()
+        self.cookies["token_info"] = ""
+        self.cookies.save()
+        self.resources.invalidate()
+        st.rerun()
+
     def run(self):
-        self.user = self.spotify_connector.client.me()["display_name"]
         if not self.openai_api_key:
             st.error("🚨 No API Key found. Please set it up to continue:")
             self.openai_api_key = st.text_input(
@@ -232,6 +292,8 @@ class App:
         # Sidebar
         with st.sidebar:
             self.settings()
+        if self.prefetcher is not None:
+            self.prefetcher.configure(self.weather_connector, self.city)
 
         # Main App Content
         # --- SONG OF THE MOMENT ---
@@ -257,19 +319,21 @@ class App:
                     "🎵 Victory, struggle, hope — whatever your story, the right music is just one click away. Find it now..."
                 )
                 if st.button("Find my vibe", use_container_width=True):
-                    with st.spinner("Finding the perfect song for you..."):
+                    with (
+                        st.spinner("Finding the perfect song for you..."),
+                        tracing.span("app.find_my_vibe") as span,
+                    ):
+                        st.session_state["last_trace"] = span.trace
                         try:
-                            auralis = Auralis(
-                                self.spotify_connector,
-                                self.openai_api_key,
-                                self.lastfm_connector,
-                            )
-                            song_name, artist_name, reason = (
-                                auralis.song_of_the_moment_suggestion(
-                                    weather_connector=self.weather_connector,
-                                    city=self.city,
-                                )
+                            auralis = self.auralis()
+                            suggestion = auralis.song_of_the_moment_suggestion(
+                                weather_connector=self.weather_connector,
+                                city=self.city,
+                                speculate=True,
                             )
+                            if suggestion is None:
+                                raise ValueError("The model suggested no valid song.")
+                            song_name, artist_name, reason = suggestion
                             st.success(
                                 f"Your background track is added to spotify: **{song_name}** by **{artist_name}**. {reason}"
                             )
@@ -310,18 +374,22 @@ class App:
             if user_playlist_prompt and st.button(
                 "🎧 Generate your Playlist", use_container_width=True
             ):
-                with st.spinner("Creating your personalized playlist..."):
+                with (
+                    st.spinner("Creating your personalized playlist..."),
+                    tracing.span("app.generate_playlist") as span,
+                ):
+                    st.session_state["last_trace"] = span.trace
                     try:
-                        auralis = Auralis(
-                            self.spotify_connector,
-                            self.openai_api_key,
-                            self.lastfm_connector,
-                        )
-                        playlist_name, songs, reason = auralis.playlist_generator(
+                        auralis = self.auralis()
+                        playlist = auralis.playlist_generator(
                             user_prompt=user_playlist_prompt,
                             weather_connector=self.weather_connector,
                             city=self.city,
+                            stream=True,
                         )
+                        if playlist is None:
+                            raise ValueError("The model assembled no valid playlist.")
+                        playlist_name, songs, reason = playlist
                     except Exception as e:
                         st.error(
                             "❌ Error: Unable to generate playlist. Please check your Spotify connection or LLM might be overloaded"
@@ -345,10 +413,22 @@ class App:
         st.divider()
         st.caption("🚀 Built with ❤️ powered by Curiosity, Spotify, and Streamlit")
 
+        with st.sidebar:
+            self.request_timings()
+
+    def request_timings(self):
+        trace = st.session_state.get("last_trace")
+        if trace is None:
+            return
+        with st.expander("⏱️ Last request timings"):
+            st.code(tracing.format_waterfall(trace), language=None)
+
     def settings(self):
         st.success(f"🧠 Model: {self.model}")
         if st.button("Reset API Key"):
             self.reset_user_settings()
+        if st.button("Log out of Spotify"):
+            self.logout()
 
         location_based = st.checkbox("Enable Location-based Options", value=False)
         with st.expander("Enable Location-based Suggestions"):
@@ -366,7 +446,11 @@ class App:
                 )
 
             if weather_api_key:
-                self.weather_connector = WeatherApiConnector(api_key=weather_api_key)
+                self.weather_connector = self.resources.get(
+                    "weather",
+                    lambda: WeatherApiConnector(api_key=weather_api_key),
+                    key=weather_api_key,
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+Cold import time of the Auralis modules, measured with ``python -X importtime``.
+
+    python -m benchmarks.importtime            # check every module's budget
+    python -m benchmarks.importtime --top 15   # also list the slowest imports
+
+Every module is imported in a fresh interpreter, the best of ``--repeat``
+runs is compared with its budget. Heavy dependencies that are only needed
+once a feature is used must not be imported at all.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds of cumulative import time. app includes streamlit itself.
+BUDGETS_MS = {
+    "app": 1000,
+    "agent.auralis": 600,
+    "src.spotify_api_connector": 600,
+    "src.weather_api_connector": 600,
+}
+# Imported on first use: an LLM call, a Spotify client, the weather feature
+# and the cookie manager of the running app.
+DEFERRED = ("openai", "spotipy", "timezonefinder", "pytz", "st_cookies_manager")
+
+
+def parse_importtime(output):
+    """
+    Parses the ``-X importtime`` lines of stderr.
+
+    Returns:
+        dict: Module name to (self, cumulative) import time in microseconds.
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure(module):
+    """
+    Imports ``module`` in a fresh interpreter.
+
+    Returns:
+        dict: See parse_importtime.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def run_importtime(modules=tuple(BUDGETS_MS), repeat=3):
+    """
+    Returns per module the best cumulative import time in milliseconds, the
+    deferred dependencies it imported and its imports of the best run.
+    """
+    report = {}
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run[module][1])
+        report[module] = {
+            "ms": best[module][1] / 1000,
+            "budget_ms": BUDGETS_MS.get(module),
+            "deferred_imported": sorted(name for name in best if name in DEFERRED),
+            "imports": best,
+        }
+    return report
+
+
+def violations(report, slack=1.0):
+    """
+    Lists the modules over budget or importing a deferred dependency.
+
+    Args:
+        report (dict): See run_importtime.
+        slack (float): Factor applied to every budget, e.g. for slow CI runners.
+    """
+    messages = []
+    for module, result in report.items():
+        budget = result["budget_ms"]
+        if budget is not None and result["ms"] > budget * slack:
+            messages.append(
+                f"{module}: {result['ms']:.0f} ms, budget {result['budget_ms']} ms"
+            )
+        if result["deferred_imported"]:
+            messages.append(
+                f"{module}: imports {', '.join(result['deferred_imported'])} eagerly"
+            )
+    return messages
+
+
+def format_report(report, top=0):
+    lines = [f"{'module':<30}{'ms':>8}{'budget':>8}"]
+    for module, result in report.items():
+        lines.append(f"{module:<30}{result['ms']:>8.0f}{result['budget_ms'] or '-':>8}")
+        slowest = sorted(
+            result["imports"].items(), key=lambda item: item[1][0], reverse=True
+        )
+        for name, (self_us, _) in slowest[:top]:
+            lines.append(f"    {name:<40}{self_us / 1000:>8.1f} ms self")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", action="append", help="Repeat to check several.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_importtime(args.module or tuple(BUDGETS_MS), repeat=args.repeat)
+    print(format_report(report, top=args.top))
+    problems = violations(report)
+    for problem in problems:
+        print(f"OVER BUDGET {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
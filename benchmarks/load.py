@@ -0,0 +1,175 @@
+"""
+Concurrent multi-session load test of Auralis against local API stand-ins.
+
+    python -m benchmarks.load --users 50 --rounds 2
+
+Every simulated user gets its own Auralis and connectors with empty caches,
+all users start at the same moment and run the stages of a session in order.
+The report lists throughput, p50/p95/p99 latency per stage, errors, outbound
+requests per API and the peak RSS of the process. The stubs run in the same
+process, so the RSS includes them.
+"""
+
+import argparse
+import json
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.run import StubEnvironment, percentile, stage
+from src import metrics
+
+DEFAULT_STAGES = ("build_context", "playlist_generator")
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Session:
+    def __init__(self, environment, stages):
+        """
+        One simulated user running ``stages`` in order on its own agent.
+        """
+        auralis, weather = environment.build_agent()
+        self.stages = [
+            (name, stage(name, auralis, weather, environment.payload_size))
+            for name in stages
+        ]
+
+    def run(self, rounds, start, record):
+        start.wait()
+        for _ in range(rounds):
+            for name, run in self.stages:
+                began = time.perf_counter()
+                try:
+                    ok = run() is not None or name == "generate_playlist_from_auralis"
+                except Exception:
+                    ok = False
+                record(name, time.perf_counter() - began, ok)
+
+
+def run_load(users=10, rounds=1, stages=DEFAULT_STAGES, latency=0.02, payload_size=20):
+    """
+    Drives ``users`` concurrent sessions through ``stages`` ``rounds`` times.
+
+    Returns:
+        dict: The configuration, wall time, throughput, per stage latency
+        percentiles in seconds, outbound requests and peak RSS.
+    """
+    timings = {name: [] for name in stages}
+    errors = {name: 0 for name in stages}
+    lock = threading.Lock()
+
+    def record(name, elapsed, ok):
+        with lock:
+            timings[name].append(elapsed)
+            errors[name] += not ok
+
+    with StubEnvironment(latency=latency, payload_size=payload_size) as environment:
+        sessions = [Session(environment, stages) for _ in range(users)]
+        start = threading.Barrier(users + 1)
+        before = environment.request_count()
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            futures = [
+                executor.submit(session.run, rounds, start, record)
+                for session in sessions
+            ]
+            start.wait()
+            began = time.perf_counter()
+            for future in futures:
+                future.result()
+            wall = time.perf_counter() - began
+        after = environment.request_count()
+
+    sessions_done = users * rounds
+    return {
+        "config": {
+            "users": users,
+            "rounds": rounds,
+            "stages": list(stages),
+            "latency": latency,
+            "payload_size": payload_size,
+        },
+        "wall_seconds": wall,
+        "throughput": {
+            "sessions_per_second": sessions_done / wall,
+            "stages_per_second": sessions_done * len(stages) / wall,
+        },
+        "stages": {
+            name: {
+                "count": len(values),
+                "errors": errors[name],
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "max": max(values),
+            }
+            for name, values in timings.items()
+        },
+        "requests": {
+            api: after[api] - before[api] for api in after if after[api] != before[api]
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def format_report(report):
+    config = report["config"]
+    lines = [
+        f"{config['users']} users x {config['rounds']} rounds in "
+        f"{report['wall_seconds']:.2f} s, "
+        f"{report['throughput']['sessions_per_second']:.1f} sessions/s, "
+        f"peak RSS {report['peak_rss_mb']:.0f} MiB",
+        f"{'stage':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}",
+    ]
+    for name, result in report["stages"].items():
+        lines.append(
+            f"{name:<34}{result['p50'] * 1000:>9.1f}{result['p95'] * 1000:>9.1f}"
+            f"{result['p99'] * 1000:>9.1f}{result['errors']:>8}"
+        )
+    requests = ", ".join(f"{api} {count}" for api, count in report["requests"].items())
+    lines.append(f"outbound requests: {requests}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--stage", action="append", help="Repeat to run several.")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--payload-size", type=int, default=20)
+    parser.add_argument("--output", help="Also write the report to this file.")
+    parser.add_argument(
+        "--metrics",
+        choices=("prometheus", "json"),
+        help="Also print the outbound call metrics per endpoint.",
+    )
+    args = parser.parse_args(argv)
+
+    report = run_load(
+        users=args.users,
+        rounds=args.rounds,
+        stages=args.stage or DEFAULT_STAGES,
+        latency=args.latency,
+        payload_size=args.payload_size,
+    )
+    print(format_report(report))
+    if args.metrics:
+        print(metrics.dump(args.metrics))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    return 1 if any(result["errors"] for result in report["stages"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+CPU and memory of the pydantic models against their compact stand-ins for
+bulk Spotify payloads, e.g. a 10k track library.
+
+    python -m benchmarks.models                 # 10000 tracks
+    python -m benchmarks.models --tracks 500
+
+Building is timed from the raw payloads, dumping like build_context does.
+Memory is what tracemalloc sees retained by the built list.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+
+from benchmarks.stubs import stub_track
+from models.compact import CompactSong
+from models.song import Song
+
+MODELS = {"pydantic": Song, "compact": CompactSong}
+
+
+def track_payloads(tracks):
+    """
+    Track payloads shaped like the Web API ones, the unused keys included.
+    """
+    payloads = []
+    for index in range(tracks):
+        track = stub_track(f"Song {index}", f"Artist {index % 500}")
+        track.update(
+            {
+                "album": {"name": f"Album {index % 800}", "album_type": "album"},
+                "duration_ms": 180000 + index,
+                "explicit": False,
+                "popularity": index % 100,
+                "type": "track",
+            }
+        )
+        payloads.append(track)
+    return payloads
+
+
+def retained_bytes(build):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del items
+    return after - before
+
+
+def run_model_benchmark(tracks=10000, repeat=5):
+    """
+    Returns per model the best build and dump time in seconds and the bytes
+    retained per track.
+    """
+    payloads = track_payloads(tracks)
+    results = {}
+    for name, model in MODELS.items():
+
+        def build():
+            return [model(**payload) for payload in payloads]
+
+        songs = build()
+        results[name] = {
+            "build_seconds": min(timeit.repeat(build, number=1, repeat=repeat)),
+            "dump_seconds": min(
+                timeit.repeat(
+                    lambda: [song.model_dump(exclude={"id", "uri"}) for song in songs],
+                    number=1,
+                    repeat=repeat,
+                )
+            ),
+            "bytes_per_track": retained_bytes(build) / tracks,
+        }
+    return results
+
+
+def format_results(results):
+    lines = [f"{'model':<10}{'build ms':>10}{'dump ms':>10}{'bytes/track':>13}"]
+    for name, result in results.items():
+        lines.append(
+            f"{name:<10}{result['build_seconds'] * 1000:>10.1f}"
+            f"{result['dump_seconds'] * 1000:>10.1f}"
+            f"{result['bytes_per_track']:>13.0f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print JSON instead.")
+    args = parser.parse_args(argv)
+
+    results = run_model_benchmark(args.tracks, args.repeat)
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Offline end to end benchmarks of Auralis against local API stand-ins.
+
+    python -m benchmarks.run                      # compare with the baseline
+    python -m benchmarks.run --update-baseline    # record a new baseline
+
+The run fails with exit code 1 when the median of a scenario regressed by
+more than ``--threshold`` compared to the baseline.
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+from agent.auralis import Auralis
+from benchmarks.stubs import LastFmStub, OpenAIStub, OpenWeatherStub, SpotifyStub
+from src.cache import SWRCache
+from src.lastfm_api_connector import LastFmConnector
+from src.spotify_api_connector import SpotifyApiConnector
+from src.track_resolver import TrackCache, TrackResolver
+from src.weather_api_connector import WeatherApiConnector
+
+SCENARIOS = (
+    "build_context",
+    "song_of_the_moment_suggestion",
+    "playlist_generator",
+    "generate_playlist_from_auralis",
+)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+CITY = "Berlin"
+PROMPT = "Rainy evening, something to read to"
+
+
+def percentile(values, fraction):
+    """
+    Nearest rank percentile, e.g. ``percentile(values, 0.95)``.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class StubEnvironment:
+    def __init__(self, latency=0.02, payload_size=20, playlists=50):
+        """
+        Starts local stand-ins for Spotify, Last.fm, OpenWeather and an
+        OpenAI compatible endpoint.
+
+        Args:
+            latency (float): Seconds every stub response is delayed.
+            payload_size (int): Items per list response and songs per playlist.
+            playlists (int): Playlists of the stub user.
+        """
+        self.latency = latency
+        self.payload_size = payload_size
+        self.spotify = SpotifyStub(latency, payload_size, playlists=playlists)
+        self.lastfm = LastFmStub(latency, payload_size)
+        self.weather = OpenWeatherStub(latency)
+        self.openai = OpenAIStub(latency, payload_size)
+        self.stubs = {
+            "spotify": self.spotify,
+            "lastfm": self.lastfm,
+            "openweather": self.weather,
+            "openai": self.openai,
+        }
+
+    def __enter__(self):
+        for stub in self.stubs.values():
+            stub.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        for stub in self.stubs.values():
+            stub.stop()
+
+    def request_count(self):
+        """
+        Returns the number of requests every stub received so far.
+        """
+        return {name: sum(stub.requests.values()) for name, stub in self.stubs.items()}
+
+    def build_agent(self, model="gpt-4o"):
+        """
+        Builds an Auralis wired to the stubs with empty caches, so every run
+        pays for the complete round trips like the first one of a session.
+
+        Returns:
+            tuple[Auralis, WeatherApiConnector]: The agent and its weather source.
+        """
+        spotify = SpotifyApiConnector(
+            "benchmark",
+            "benchmark",
+            cache=SWRCache(),
+            base_url=f"{self.spotify.url}v1/",
+        )
+        spotify.connect_from_streamlit("stub-token")
+        spotify.track_resolver = TrackResolver(spotify, cache=TrackCache(":memory:"))
+        lastfm = LastFmConnector(
+            "benchmark", cache=SWRCache(), url=f"{self.lastfm.url}2.0/"
+        )
+        weather = WeatherApiConnector(
+            "benchmark", cache=SWRCache(), base_url=self.weather.url
+        )
+        auralis = Auralis(
+            spotify,
+            "benchmark",
+            lastfm,
+            model=model,
+            base_url=f"{self.openai.url}v1/",
+            response_cache=SWRCache(),
+            cached_features=(),
+        )
+        # The client is created lazily on the first model call, a session
+        # creates it once, so it is not part of the timed requests.
+        _ = auralis.openai
+        return auralis, weather
+
+
+def scenario(name, environment):
+    """
+    Returns a zero argument callable running one scenario on a fresh agent.
+    """
+    auralis, weather = environment.build_agent()
+    return stage(name, auralis, weather, environment.payload_size)
+
+
+def stage(name, auralis, weather, payload_size=20):
+    """
+    Returns a zero argument callable running scenario ``name`` on ``auralis``.
+    """
+    if name == "build_context":
+        return lambda: auralis.build_context(weather, CITY)
+    if name == "song_of_the_moment_suggestion":
+        return lambda: auralis.song_of_the_moment_suggestion(weather, CITY)
+    if name == "playlist_generator":
+        return lambda: auralis.playlist_generator(PROMPT, weather, CITY)
+    if name == "generate_playlist_from_auralis":
+        songs = [
+            f"Benchmark Song {index} Artist {index}" for index in range(payload_size)
+        ]
+        return lambda: auralis.spotify_connector.generate_playlist_from_auralis(
+            "Benchmark Playlist", songs
+        )
+    raise ValueError(f"Unknown scenario {name}")
+
+
+def run_benchmarks(
+    iterations=5, warmup=1, latency=0.02, payload_size=20, scenarios=SCENARIOS
+):
+    """
+    Times every scenario end to end against the stubs.
+
+    Returns:
+        dict: The configuration and, per scenario, the median, p95, min and
+        max wall time in seconds and the outbound requests of one run.
+    """
+    results = {}
+    with StubEnvironment(latency=latency, payload_size=payload_size) as environment:
+        for name in scenarios:
+            timings = []
+            for iteration in range(warmup + iterations):
+                run = scenario(name, environment)
+                before = environment.request_count()
+                start = time.perf_counter()
+                result = run()
+                elapsed = time.perf_counter() - start
+                if name != "generate_playlist_from_auralis" and not result:
+                    raise RuntimeError(f"{name} returned {result!r}")
+                if iteration >= warmup:
+                    timings.append(elapsed)
+            after = environment.request_count()
+            results[name] = {
+                "median": statistics.median(timings),
+                "p95": percentile(timings, 0.95),
+                "min": min(timings),
+                "max": max(timings),
+                "requests": {
+                    api: after[api] - before[api]
+                    for api in after
+                    if after[api] != before[api]
+                },
+            }
+    return {
+        "config": {
+            "iterations": iterations,
+            "latency": latency,
+            "payload_size": payload_size,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=0.25, min_delta=0.005):
+    """
+    Lists the scenarios whose median regressed against the baseline.
+
+    Args:
+        report (dict): The output of run_benchmarks.
+        baseline (dict): A previously recorded report.
+        threshold (float): Allowed relative slowdown, 0.25 is 25%.
+        min_delta (float): Slowdowns below this many seconds are noise.
+
+    Returns:
+        list[str]: One message per regressed scenario.
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        delta = result["median"] - reference["median"]
+        if delta > min_delta and delta > threshold * reference["median"]:
+            regressions.append(
+                f"{name}: median {result['median'] * 1000:.1f} ms, baseline "
+                f"{reference['median'] * 1000:.1f} ms (+{delta / reference['median']:.0%})"
+            )
+    return regressions
+
+
+def format_report(report):
+    lines = [
+        f"{'scenario':<34}{'median ms':>10}{'p95 ms':>10}{'requests':>10}",
+    ]
+    for name, result in report["results"].items():
+        lines.append(
+            f"{name:<34}{result['median'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}"
+            f"{sum(result['requests'].values()):>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--payload-size", type=int, default=20)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--output", help="Also write the report to this file.")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        iterations=args.iterations,
+        warmup=args.warmup,
+        latency=args.latency,
+        payload_size=args.payload_size,
+        scenarios=args.scenario or SCENARIOS,
+    )
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if baseline.get("config", {}).get("latency") != report["config"]["latency"] or (
+        baseline.get("config", {}).get("payload_size")
+        != report["config"]["payload_size"]
+    ):
+        print("Baseline was recorded with other stub settings, not comparing.")
+        return 0
+    regressions = compare(report, baseline, threshold=args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Many simulated sessions connect at once, the default backlog is 5.
+    request_queue_size = 256
+
+
+class StubServer:
+    def __init__(self, latency=0.0, payload_size=20):
+        """
+        Local HTTP stand-in for one external API.
+
+        Routes map a method and a path pattern to a handler receiving the
+        regex match, the query and the JSON body and returning
+        ``(status, payload)``.
+
+        Args:
+            latency (float): Seconds every response is delayed, simulates the
+                round trip to the real API.
+            payload_size (int): Number of items in list responses.
+        """
+        self.latency = latency
+        self.payload_size = payload_size
+        self.routes = []
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def handle_request(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                query = {key: value[0] for key, value in parse_qs(url.query).items()}
+                status, payload = stub.dispatch(self.command, url.path, query, body)
+                if stub.latency:
+                    time.sleep(stub.latency)
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def route(self, method, pattern, handler):
+        self.routes.append((method, re.compile(pattern.rstrip("/") + "/?$"), handler))
+
+    def dispatch(self, method, path, query, body):
+        with self._lock:
+            self.requests[f"{method} {path}"] += 1
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                body = json.loads(body) if body else None
+                return handler(match, query, body)
+        return 404, {"error": {"status": 404, "message": f"No stub for {path}"}}
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def stub_id(name):
+    """
+    Derives a stable base62 looking id, spotipy rejects anything else.
+    """
+    return hashlib.md5(name.encode("utf-8"), usedforsecurity=False).hexdigest()[:22]
+
+
+def stub_track(name, artist="Stub Artist"):
+    track_id = stub_id(name)
+    return {
+        "id": track_id,
+        "name": name,
+        "uri": f"spotify:track:{track_id}",
+        "artists": [{"name": artist, "uri": "spotify:artist:stub"}],
+    }
+
+
+class SpotifyStub(StubServer):
+    """
+    Stand-in for the parts of the Spotify Web API used by the connector.
+    """
+
+    def __init__(self, latency=0.0, payload_size=20, playlists=50):
+        super().__init__(latency, payload_size)
+        self.playlists = [
+            {
+                "id": f"playlist{index}",
+                "name": f"Playlist {index}",
+                "href": f"{self.url}v1/playlists/playlist{index}",
+                "uri": f"spotify:playlist:playlist{index}",
+            }
+            for index in range(playlists)
+        ]
+        self.route("GET", "/v1/me", lambda *_: (200, {"id": "stub-user"}))
+        self.route("GET", "/v1/me/playlists", self.page(lambda: self.playlists))
+        self.route(
+            "GET",
+            "/v1/me/player/recently-played",
+            self.page(lambda: [{"track": track} for track in self.tracks("Recent")]),
+        )
+        self.route("GET", "/v1/me/top/tracks", self.page(lambda: self.tracks("Top")))
+        self.route("GET", "/v1/search", self.search)
+        self.route("POST", "/v1/users/([^/]+)/playlists", self.create_playlist)
+        self.route("POST", "/v1/playlists/([^/]+)/items", self.snapshot)
+        self.route("GET", "/v1/me/player", self.playback)
+        self.route("GET", "/v1/me/player/devices", self.devices)
+        self.route("PUT", "/v1/me/player/play", lambda *_: (204, None))
+        self.route("POST", "/v1/me/player/queue", lambda *_: (204, None))
+
+    def tracks(self, prefix):
+        return [
+            stub_track(f"{prefix} Song {index}", f"Artist {index}")
+            for index in range(self.payload_size)
+        ]
+
+    def page(self, items):
+        def handler(match, query, body):
+            collection = items()
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 20))
+            end = offset + limit
+            next_url = None
+            if end < len(collection):
+                path = match.string.lstrip("/")
+                next_url = f"{self.url}{path}?offset={end}&limit={limit}"
+            return 200, {"items": collection[offset:end], "next": next_url}
+
+        return handler
+
+    def search(self, match, query, body):
+        return 200, {"tracks": {"items": [stub_track(query.get("q", "song"))]}}
+
+    def create_playlist(self, match, query, body):
+        playlist_id = stub_id(body["name"])
+        return 201, {
+            "id": playlist_id,
+            "name": body["name"],
+            "href": f"{self.url}v1/playlists/{playlist_id}",
+            "uri": f"spotify:playlist:{playlist_id}",
+        }
+
+    def snapshot(self, match, query, body):
+        return 201, {"snapshot_id": "stub"}
+
+    def playback(self, match, query, body):
+        return 200, {"is_playing": True, "device": self.device()}
+
+    def devices(self, match, query, body):
+        return 200, {"devices": [self.device()]}
+
+    def device(self):
+        return {
+            "id": "stub-device",
+            "is_active": True,
+            "name": "Stub",
+            "type": "Computer",
+            "volume_percent": 50,
+        }
+
+
+class LastFmStub(StubServer):
+    """
+    Stand-in for the Last.fm chart.gettoptracks method.
+    """
+
+    def __init__(self, latency=0.0, payload_size=20):
+        super().__init__(latency, payload_size)
+        self.route("GET", "/2.0/", self.top_tracks)
+
+    def top_tracks(self, match, query, body):
+        tracks = [
+            {"name": f"Trending Song {index}", "artist": {"name": f"Star {index}"}}
+            for index in range(self.payload_size)
+        ]
+        return 200, {"tracks": {"track": tracks}}
+
+
+class OpenWeatherStub(StubServer):
+    """
+    Stand-in for the OpenWeather geocoding and One Call endpoints.
+    """
+
+    def __init__(self, latency=0.0, payload_size=1):
+        super().__init__(latency, payload_size)
+        self.route("GET", "/geo/1.0/direct", self.geocode)
+        self.route("GET", "/data/3.0/onecall/timemachine", self.weather)
+
+    def geocode(self, match, query, body):
+        city = {"name": query.get("q", "Berlin"), "country": "DE"}
+        return 200, [{**city, "lat": 52.52, "lon": 13.405}] * self.payload_size
+
+    def weather(self, match, query, body):
+        data = {
+            "temp": 12.5,
+            "feels_like": 11.0,
+            "pressure": 1012,
+            "humidity": 80,
+            "dew_point": 9.1,
+            "uvi": 0.4,
+            "clouds": 75,
+            "visibility": 10000,
+            "wind_speed": 3.6,
+            "wind_deg": 240,
+            "weather": [{"main": "Rain", "description": "light rain"}],
+        }
+        return 200, {"data": [data] * self.payload_size}
+
+
+class OpenAIStub(StubServer):
+    """
+    Stand-in for an OpenAI compatible chat completions endpoint.
+
+    Answers playlist requests with a generate_playlist call of
+    ``payload_size`` songs and every other request with a suggest_song call.
+    """
+
+    def __init__(self, latency=0.0, payload_size=20):
+        super().__init__(latency, payload_size)
+        self.route("POST", "/v1/chat/completions", self.completion)
+
+    def completion(self, match, query, body):
+        system_prompt = body["messages"][0]["content"]
+        if "playlist" in system_prompt.split(".")[0]:
+            name = "generate_playlist"
+            arguments = {
+                "playlist_name": "Stub Playlist",
+                "songs": [
+                    f"Generated Song {index} Artist {index}"
+                    for index in range(self.payload_size)
+                ],
+                "reason": "Fits the mood",
+            }
+        else:
+            name = "suggest_song"
+            arguments = {
+                "song_title": "Generated Song",
+                "artist_name": "Artist",
+                "reason": "Fits the mood",
+            }
+        prompt_tokens = sum(len(m.get("content") or "") for m in body["messages"]) // 4
+        return 200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls",
+                    "message": {
+                        "role": "assistant",
+                        "content": None,
+                        "tool_calls": [
+                            {
+                                "id": "call-stub",
+                                "type": "function",
+                                "function": {
+                                    "name": name,
+                                    "arguments": json.dumps(arguments),
+                                },
+                            }
+                        ],
+                    },
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 10 * self.payload_size,
+                "total_tokens": prompt_tokens + 10 * self.payload_size,
+            },
+        }
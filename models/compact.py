@@ -0,0 +1,88 @@
+from models.artist import Artist
+from models.playlist import Playlist
+from models.song import Song
+
+
+class CompactRecord:
+    """
+    Slotted stand-in for a models/ class, built from trusted Spotify payloads
+    without validation. It has the same constructor, attributes and
+    ``model_dump`` as its model, so the two can be swapped, e.g. with the
+    ``song_model`` argument of the Spotify connectors.
+    """
+
+    __slots__ = ()
+    model = None
+
+    def model_dump(self, exclude=None):
+        return {
+            field: getattr(self, field)
+            for field in self.__slots__
+            if not exclude or field not in exclude
+        }
+
+    def to_model(self):
+        """
+        Returns the validated models/ counterpart.
+        """
+        return self.model(**{field: getattr(self, field) for field in self.__slots__})
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class CompactArtist(CompactRecord):
+    __slots__ = ("name", "uri")
+    model = Artist
+
+    def __init__(self, name, uri, **_):
+        self.name = name
+        self.uri = uri
+
+
+class CompactSong(CompactRecord):
+    __slots__ = ("name", "uri", "artists")
+    model = Song
+
+    def __init__(self, name, uri, artists, **_):
+        self.name = name
+        self.uri = uri
+        self.artists = [
+            artist if isinstance(artist, CompactArtist) else CompactArtist(**artist)
+            for artist in artists
+        ]
+
+    def model_dump(self, exclude=None):
+        dumped = super().model_dump(exclude)
+        if "artists" in dumped:
+            # Like Song, only the first artist is serialized.
+            dumped["artists"] = self.artists[0].name if self.artists else []
+        return dumped
+
+    def to_model(self):
+        return Song(
+            name=self.name,
+            uri=self.uri,
+            artists=[artist.to_model() for artist in self.artists],
+        )
+
+
+class CompactPlaylist(CompactRecord):
+    __slots__ = ("name", "id", "href", "uri")
+    model = Playlist
+
+    def __init__(self, name, id, href, uri, **_):
+        self.name = name
+        self.id = id
+        self.href = href
+        self.uri = uri
@@ -1,9 +1,10 @@
 from pydantic import BaseModel
+from typing import Optional
 
 
 class Device(BaseModel):
-    id: str
+    id: Optional[str] = None
     is_active: bool
     name: str
     type: str
-    volume_percent: int
+    volume_percent: Optional[int] = None
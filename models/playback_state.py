@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from models.device import Device
+from typing import Optional
+
+
+class PlaybackState(BaseModel):
+    is_playing: bool = False
+    device: Optional[Device] = None
+
+    @property
+    def device_id(self):
+        return self.device.id if self.device else None
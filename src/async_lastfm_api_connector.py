@@ -0,0 +1,36 @@
+import httpx
+
+from models.top import Top
+from src.http_transport import get_async_client
+
+
+class AsyncLastFmConnector:
+    def __init__(self, api_key, url="https://ws.audioscrobbler.com/2.0/", client=None):
+        self.api_key = api_key
+        self.url = url
+        self._client = client
+
+    @property
+    def client(self):
+        return self._client or get_async_client()
+
+    async def get_top_songs(self):
+        params = {
+            "method": "chart.gettoptracks",
+            "api_key": self.api_key,
+            "format": "json",
+        }
+        try:
+            response = await self.client.get(self.url, params=params, timeout=5)
+            response.raise_for_status()
+            return [
+                Top(name=item["name"], artist_name=item["artist"]["name"])
+                for item in response.json()["tracks"]["track"]
+            ][:20]
+        except httpx.HTTPError:
+            return [
+                Top(
+                    name="Could not be found",
+                    artist_name="Nothing is trending at the moment",
+                )
+            ]
@@ -0,0 +1,222 @@
+import asyncio
+
+from models.device import Device
+from models.playback_state import PlaybackState
+from models.playlist import Playlist
+from models.song import Song
+from src.http_transport import get_async_client
+from src.spotify_api_connector import (
+    COLLECTION_PAGE_LIMIT,
+    PLAYLIST_ADD_LIMIT,
+    PLAYLIST_PAGE_LIMIT,
+)
+from src.track_resolver import AsyncTrackResolver
+
+
+class AsyncSpotifyApiConnector:
+    def __init__(
+        self,
+        token,
+        base_url="https://api.spotify.com/v1/",
+        client=None,
+        song_model=Song,
+        playlist_model=Playlist,
+    ):
+        """
+        Non-blocking counterpart of SpotifyApiConnector talking to the Web API
+        directly over a pooled async HTTP client.
+
+        Args:
+            token (str): An OAuth access token, e.g. from SpotifyApiConnector.
+            base_url (str): The Web API root, overridable for local stand-ins.
+            client (httpx.AsyncClient): Defaults to the shared pool of the loop.
+            song_model (type): Built from every track payload, see
+                SpotifyApiConnector.
+            playlist_model (type): Built from every playlist payload.
+        """
+        self.token = token
+        self.song_model = song_model
+        self.playlist_model = playlist_model
+        self.base_url = base_url.rstrip("/") + "/"
+        self._client = client
+        self.track_resolver = AsyncTrackResolver(self)
+        self._user_id = None
+
+    @property
+    def client(self):
+        return self._client or get_async_client()
+
+    async def _request(self, method, path, params=None, json=None):
+        url = path if path.startswith("http") else self.base_url + path
+        params = {key: value for key, value in (params or {}).items() if value}
+        response = await self.client.request(
+            method,
+            url,
+            params=params or None,
+            json=json,
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        response.raise_for_status()
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    async def _iter_pages(self, page):
+        while page:
+            for item in page["items"]:
+                yield item
+            page = (
+                await self._request("GET", page["next"]) if page.get("next") else None
+            )
+
+    def _page_size(self, limit, maximum=COLLECTION_PAGE_LIMIT):
+        return min(limit, maximum) if limit else maximum
+
+    async def _collect(self, iterator, limit):
+        items = []
+        async for item in iterator:
+            items.append(item)
+            if limit and len(items) >= limit:
+                break
+        return items
+
+    async def get_user_info(self):
+        return await self._request("GET", "me")
+
+    async def get_user_id(self):
+        if self._user_id is None:
+            self._user_id = (await self.get_user_info())["id"]
+        return self._user_id
+
+    async def iter_user_playlists(self, limit=None):
+        page = await self._request(
+            "GET", "me/playlists", {"limit": self._page_size(limit)}
+        )
+        async for playlist in self._iter_pages(page):
+            if playlist:
+                yield self.playlist_model(**playlist)
+
+    async def get_user_playlists(self, limit=None):
+        return await self._collect(self.iter_user_playlists(limit), limit)
+
+    async def iter_recently_played(self, limit=None):
+        page = await self._request(
+            "GET", "me/player/recently-played", {"limit": self._page_size(limit)}
+        )
+        async for item in self._iter_pages(page):
+            yield self.song_model(**item["track"])
+
+    async def recently_played(self, limit=None):
+        return await self._collect(self.iter_recently_played(limit), limit)
+
+    async def iter_users_top_tracks(self, limit=None):
+        page = await self._request(
+            "GET", "me/top/tracks", {"limit": self._page_size(limit)}
+        )
+        async for song in self._iter_pages(page):
+            yield self.song_model(**song)
+
+    async def users_top_tracks(self, limit=None):
+        return await self._collect(self.iter_users_top_tracks(limit), limit)
+
+    async def search_for_song(self, query):
+        result = await self._request("GET", "search", {"q": query, "type": "track"})
+        return [self.song_model(**song) for song in result["tracks"]["items"]]
+
+    async def create_playlist(self, playlist_name):
+        user_id = await self.get_user_id()
+        playlist = await self._request(
+            "POST", f"users/{user_id}/playlists", json={"name": playlist_name}
+        )
+        return self.playlist_model(**playlist)
+
+    async def get_playlist_track_uris(self, playlist_id):
+        page = await self._request(
+            "GET",
+            f"playlists/{playlist_id}/items",
+            {"fields": "items(track(uri)),next", "limit": PLAYLIST_PAGE_LIMIT},
+        )
+        return {
+            item["track"]["uri"]
+            async for item in self._iter_pages(page)
+            if item.get("track")
+        }
+
+    async def add_songs_to_playlist(self, playlist_id, songs, check_existing=True):
+        seen = (
+            await self.get_playlist_track_uris(playlist_id) if check_existing else set()
+        )
+        uris = []
+        for song in songs:
+            if song.uri not in seen:
+                seen.add(song.uri)
+                uris.append(song.uri)
+        for start in range(0, len(uris), PLAYLIST_ADD_LIMIT):
+            await self._request(
+                "POST",
+                f"playlists/{playlist_id}/items",
+                json={"uris": uris[start : start + PLAYLIST_ADD_LIMIT]},
+            )
+
+    async def generate_playlist_from_auralis(self, playlist_name, songs):
+        playlist, songs_in_spotify = await asyncio.gather(
+            self.create_playlist(playlist_name), self.track_resolver.resolve(songs)
+        )
+        await self.add_songs_to_playlist(
+            playlist.id, songs_in_spotify, check_existing=False
+        )
+        state = await self.get_playback_state()
+        if not state.is_playing:
+            await self.play_playlist(
+                playlist.uri, await self.get_device_to_play_on(state)
+            )
+
+    async def get_all_user_devices(self):
+        devices = await self._request("GET", "me/player/devices")
+        return [Device(**device) for device in devices["devices"]]
+
+    async def get_playback_state(self):
+        state = await self._request("GET", "me/player")
+        if not state:
+            return PlaybackState()
+        return PlaybackState(is_playing=state["is_playing"], device=state.get("device"))
+
+    async def get_device_to_play_on(self, state=None):
+        if state is not None and state.device_id:
+            return state.device_id
+        devices = await self.get_all_user_devices()
+        device_id = devices[0].id
+        for device in devices:
+            if device.is_active:
+                device_id = device.id
+                break
+            if device.type.lower() == "computer" or device.type.lower() == "smartphone":
+                device_id = device.id
+        return device_id
+
+    async def play_song(self, uri, device_id=None):
+        device_id = device_id or await self.get_device_to_play_on()
+        await self._request(
+            "PUT", "me/player/play", {"device_id": device_id}, json={"uris": [uri]}
+        )
+
+    async def play_playlist(self, uri, device_id=None):
+        device_id = device_id or await self.get_device_to_play_on()
+        await self._request(
+            "PUT", "me/player/play", {"device_id": device_id}, json={"context_uri": uri}
+        )
+
+    async def add_songs_to_queue(self, uri, device_id=None):
+        await self._request(
+            "POST", "me/player/queue", {"uri": uri, "device_id": device_id}
+        )
+
+    async def play_or_queue(self, uri, state=None):
+        state = state or await self.get_playback_state()
+        if state.is_playing:
+            await self.add_songs_to_queue(uri, device_id=state.device_id)
+        else:
+            await self.play_song(uri, device_id=await self.get_device_to_play_on(state))
+
+    async def is_currently_playing(self):
+        return (await self.get_playback_state()).is_playing
@@ -0,0 +1,66 @@
+import datetime
+
+from models.location import Location
+from models.location_temperature import Temperature
+from src.http_transport import get_async_client
+from src.weather_api_connector import resolve_timezone, shared_cache
+
+
+class AsyncWeatherApiConnector:
+    def __init__(
+        self,
+        api_key,
+        base_url="https://api.openweathermap.org/",
+        client=None,
+        cache=None,
+    ):
+        """
+        Non-blocking counterpart of WeatherApiConnector. Geocoding and timezone
+        results are shared with the blocking connector through its cache.
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/") + "/"
+        self._client = client
+        self.cache = cache or shared_cache
+
+    @property
+    def client(self):
+        return self._client or get_async_client()
+
+    async def _get_json(self, path, params):
+        response = await self.client.get(
+            self.base_url + path, params={**params, "appid": self.api_key}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def encode_location(self, city_name):
+        key = city_name.strip().lower()
+        location = self.cache.peek("city", key)
+        if location is None:
+            data = await self._get_json("geo/1.0/direct", {"q": city_name})
+            location = Location(**data[0])
+            self.cache.put("city", key, location)
+        return location
+
+    def resolve_timezone(self, location):
+        return resolve_timezone(self.cache, location)
+
+    def encode_time(self, location):
+        import pytz
+
+        timezone = pytz.timezone(self.resolve_timezone(location))
+        return datetime.datetime.now(timezone)
+
+    async def get_current_location_weather(self, city):
+        location = await self.encode_location(city)
+        data = await self._get_json(
+            "data/3.0/onecall/timemachine",
+            {
+                "lat": location.lat,
+                "lon": location.lon,
+                "dt": int(self.encode_time(location).timestamp()),
+                "units": "metric",
+            },
+        )
+        return Temperature(**data["data"][0])
@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class SWRCache:
+    def __init__(self, ttls=None, max_entries=None, default_ttl=60.0, max_size=256):
+        """
+        A stale-while-revalidate cache partitioned by data kind.
+
+        Each kind (e.g. "playlists") has its own TTL and its own size bound.
+        Expired entries are still served while a background refresh replaces
+        them, so only the very first read of a key waits for the loader.
+        Concurrent first reads of the same key share that one load. A load
+        that was running while its key got invalidated, e.g. by a playlist
+        write, is not stored, so it cannot bring back the outdated data.
+
+        Args:
+            ttls (dict): Seconds an entry of a given kind stays fresh.
+            max_entries (dict): Maximum number of keys kept per kind.
+            default_ttl (float): TTL for kinds missing from ``ttls``.
+            max_size (int): Size bound for kinds missing from ``max_entries``.
+        """
+        self.ttls = ttls or {}
+        self.max_entries = max_entries or {}
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._refreshing = set()
+        self._loading = {}
+        self._generations = {}
+        self._epoch = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="auralis-cache"
+        )
+
+    def get(self, kind, key, loader, serve_stale=True):
+        """
+        Returns the cached value for ``(kind, key)``, loading it if needed.
+
+        Args:
+            kind (str): The data kind, selects TTL and size bound.
+            key (hashable): The key inside the kind, usually the user id.
+            loader (callable): Zero argument callable producing a fresh value.
+            serve_stale (bool): When False an expired entry is reloaded in the
+                foreground instead, for data that must not be outdated.
+
+        Returns:
+            Any: The fresh or stale cached value, or the freshly loaded one.
+        """
+        with self._lock:
+            entries = self._entries.setdefault(kind, OrderedDict())
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                if time.monotonic() - entry.stored_at < self._ttl(kind):
+                    self._count(kind, "hits")
+                    return entry.value
+            if entry is not None and serve_stale:
+                self._count(kind, "stale_hits")
+                if (kind, key) not in self._refreshing:
+                    self._refreshing.add((kind, key))
+                    self._executor.submit(
+                        self._refresh,
+                        kind,
+                        key,
+                        loader,
+                        self._generation(kind, key),
+                    )
+                return entry.value
+            pending = self._loading.get((kind, key))
+            if pending is None:
+                self._count(kind, "misses")
+                pending = self._loading[(kind, key)] = Future()
+                generation = self._generation(kind, key)
+                loading = True
+            else:
+                self._count(kind, "coalesced")
+                loading = False
+        if not loading:
+            return pending.result()
+        try:
+            value = loader()
+            self._put_if_current(kind, key, value, generation)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        else:
+            pending.set_result(value)
+        finally:
+            with self._lock:
+                self._loading.pop((kind, key), None)
+        return value
+
+    def lookup(self, kind, key):
+        """
+        Returns the cached value only while it is fresh, else None. Unlike
+        ``get`` nothing is loaded, for values only the caller can produce.
+        """
+        with self._lock:
+            entries = self._entries.setdefault(kind, OrderedDict())
+            entry = entries.get(key)
+            fresh = entry is not None and (
+                time.monotonic() - entry.stored_at < self._ttl(kind)
+            )
+            if fresh:
+                entries.move_to_end(key)
+                self._count(kind, "hits")
+                return entry.value
+            self._count(kind, "misses")
+            return None
+
+    def peek(self, kind, key):
+        """
+        Returns the cached value, fresh or stale, without loading or counting.
+        """
+        with self._lock:
+            entry = self._entries.get(kind, {}).get(key)
+            return entry.value if entry is not None else None
+
+    def put(self, kind, key, value):
+        with self._lock:
+            self._store(kind, key, value)
+
+    def update(self, kind, key, function):
+        """
+        Changes a cached value in place under the lock, e.g. adds a created
+        playlist to an index. Loads of the key that are still running are
+        not stored, they may have started before the change.
+
+        Args:
+            function (callable): Called with the cached value, if any.
+        """
+        with self._lock:
+            entry = self._entries.get(kind, {}).get(key)
+            if entry is not None:
+                function(entry.value)
+            self._bump(kind, key)
+
+    def invalidate(self, kind, key=None):
+        """
+        Drops one key of a kind, or the whole kind when ``key`` is None.
+        Loads of the dropped keys that are still running are not stored.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.pop(kind, None)
+                self._bump(kind)
+            else:
+                self._entries.get(kind, {}).pop(key, None)
+                self._bump(kind, key)
+
+    def invalidate_matching(self, kind, predicate):
+        """
+        Drops every key of a kind for which ``predicate(key)`` is true.
+        Loads of matching keys that are still running are not stored.
+        """
+        with self._lock:
+            entries = self._entries.get(kind, {})
+            running = {
+                running_key
+                for running_kind, running_key in (*self._loading, *self._refreshing)
+                if running_kind == kind
+            }
+            for key in {*entries, *running}:
+                if predicate(key):
+                    entries.pop(key, None)
+                    self._bump(kind, key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    @property
+    def stats(self):
+        """
+        Returns hit/miss counters per kind, e.g.
+        ``{"playlists": {"hits": 3, "stale_hits": 1, "misses": 1, ...}}``.
+        """
+        with self._lock:
+            return {kind: dict(counters) for kind, counters in self._stats.items()}
+
+    def _refresh(self, kind, key, loader, generation):
+        try:
+            value = loader()
+        except Exception:
+            self._count_locked(kind, "refresh_errors")
+        else:
+            if self._put_if_current(kind, key, value, generation):
+                self._count_locked(kind, "refreshes")
+        finally:
+            with self._lock:
+                self._refreshing.discard((kind, key))
+
+    def _store(self, kind, key, value):
+        entries = self._entries.setdefault(kind, OrderedDict())
+        entries[key] = CacheEntry(value, time.monotonic())
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries.get(kind, self.max_size):
+            entries.popitem(last=False)
+            self._count(kind, "evictions")
+
+    def _generation(self, kind, key):
+        return (
+            self._epoch,
+            self._generations.get(kind, 0),
+            self._generations.get((kind, key), 0),
+        )
+
+    def _bump(self, kind, key=None):
+        name = kind if key is None else (kind, key)
+        self._generations[name] = self._generations.get(name, 0) + 1
+
+    def _put_if_current(self, kind, key, value, generation):
+        """
+        Stores a loaded value unless its key was invalidated while loading.
+
+        Returns:
+            bool: Whether the value was stored.
+        """
+        with self._lock:
+            if self._generation(kind, key) != generation:
+                self._count(kind, "discarded")
+                return False
+            self._store(kind, key, value)
+            return True
+
+    def _ttl(self, kind):
+        return self.ttls.get(kind, self.default_ttl)
+
+    def _count(self, kind, counter):
+        counters = self._stats.setdefault(
+            kind,
+            {
+                "hits": 0,
+                "stale_hits": 0,
+                "misses": 0,
+                "coalesced": 0,
+                "refreshes": 0,
+                "refresh_errors": 0,
+                "discarded": 0,
+                "evictions": 0,
+            },
+        )
+        counters[counter] += 1
+
+    def _count_locked(self, kind, counter):
+        with self._lock:
+            self._count(kind, counter)
@@ -0,0 +1,318 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src import metrics
+
+DEFAULT_TIMEOUT = (5.0, 10.0)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_async_clients = weakref.WeakKeyDictionary()
+_shared_transport = None
+_shared_transport_lock = threading.Lock()
+
+
+def should_retry(method, status_code):
+    """
+    Rate limited requests were not processed, so they are retried for every
+    method. Server errors are only retried for idempotent methods, a retried
+    POST could otherwise add the same songs to a playlist twice.
+    """
+    if status_code == 429:
+        return True
+    return status_code in RETRY_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+
+def parse_retry_after(value):
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    retry_date = email.utils.parsedate_tz(value)
+    if retry_date is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(retry_date) - time.time())
+
+
+def retry_delay(attempt, retry_after=None, backoff_factor=0.5, backoff_max=30.0):
+    """
+    Seconds to wait before retry number ``attempt`` (starting at 0).
+
+    A Retry-After header wins, capped at ``backoff_max``. Otherwise the delay
+    is drawn from an exponentially growing window ("full jitter") so that
+    many clients throttled at once do not retry in lockstep.
+    """
+    seconds = parse_retry_after(retry_after)
+    if seconds is not None:
+        return min(seconds, backoff_max)
+    return random.uniform(0, min(backoff_max, backoff_factor * 2**attempt))
+
+
+class RetryPolicy(Retry):
+    metrics = None
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        return bool(self.total) and should_retry(method, status_code)
+
+    def new(self, **kw):
+        retry = super().new(**kw)
+        retry.metrics = self.metrics
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, **kwargs):
+        if self.metrics is not None:
+            self.metrics.observe_retry(
+                metrics.endpoint_for(url or ""),
+                response.status if response is not None else None,
+            )
+        return super().increment(method, url, response, error, **kwargs)
+
+
+class MeteredSession(requests.Session):
+    def __init__(self, metrics_registry):
+        """
+        A requests session recording every call in a MetricsRegistry.
+        """
+        super().__init__()
+        self.metrics = metrics_registry
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        endpoint = metrics.endpoint_for(request.url)
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException:
+            self.metrics.observe(endpoint, time.perf_counter() - started)
+            raise
+        body = None if kwargs.get("stream") else response.content
+        self.metrics.observe(
+            endpoint,
+            time.perf_counter() - started,
+            response.status_code,
+            metrics.response_size(response.headers, body),
+        )
+        return response
+
+
+class SharedSession(MeteredSession):
+    def close(self):
+        """
+        Keeps the pools open. spotipy closes the session it was given when its
+        client or OAuth manager is garbage collected, but the pools belong to
+        every connector of the process, see HttpTransport.close.
+        """
+
+
+class HttpTransport:
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        retries=3,
+        backoff_factor=0.5,
+        backoff_max=30.0,
+        pool_connections=10,
+        pool_maxsize=20,
+        metrics_registry=None,
+    ):
+        """
+        Blocking HTTP transport shared by the connectors.
+
+        One keep-alive session with pooled connections per host, default
+        timeouts and jittered exponential retries honoring Retry-After.
+        Every call is recorded in the process wide metrics registry.
+
+        Args:
+            timeout (tuple): Connect and read timeout in seconds.
+            retries (int): Retries after the first attempt.
+            backoff_factor (float): Base of the exponential backoff in seconds.
+            backoff_max (float): Upper bound of a single wait, also caps Retry-After.
+            pool_connections (int): Number of hosts to keep pools for.
+            pool_maxsize (int): Connections kept alive per host.
+            metrics_registry (MetricsRegistry): Defaults to ``metrics.registry``.
+        """
+        self.timeout = timeout
+        self.metrics = metrics_registry or metrics.registry
+        self.session = SharedSession(self.metrics)
+        self.retry = RetryPolicy(
+            total=retries,
+            connect=retries,
+            read=False,
+            status=retries,
+            allowed_methods=None,
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=backoff_factor,
+            backoff_max=backoff_max,
+            backoff_jitter=backoff_factor,
+            retry_after_max=int(backoff_max),
+            raise_on_status=False,
+        )
+        self.retry.metrics = self.metrics
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=self.retry,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        """
+        Closes the pooled connections.
+        """
+        MeteredSession.close(self.session)
+
+
+def get_transport():
+    """
+    Returns the process wide HttpTransport, so every connector reuses the
+    same connection pools.
+    """
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = HttpTransport()
+    return _shared_transport
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        transport=None,
+        retries=3,
+        backoff_factor=0.5,
+        backoff_max=30.0,
+        metrics_registry=None,
+    ):
+        """
+        Wraps an httpx transport with the retry rules and the metrics of
+        HttpTransport. The body is not read here, so response sizes are
+        taken from Content-Length.
+        """
+        self.transport = transport or httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            retries=retries,
+        )
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.metrics = metrics_registry or metrics.registry
+
+    async def handle_async_request(self, request):
+        started = time.perf_counter()
+        endpoint = metrics.endpoint_for(str(request.url))
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                self.metrics.observe(endpoint, time.perf_counter() - started)
+                raise
+            if attempt == self.retries or not should_retry(
+                request.method, response.status_code
+            ):
+                self.metrics.observe(
+                    endpoint,
+                    time.perf_counter() - started,
+                    response.status_code,
+                    metrics.response_size(response.headers),
+                )
+                return response
+            self.metrics.observe_retry(endpoint, response.status_code)
+            await response.aclose()
+            await asyncio.sleep(
+                retry_delay(
+                    attempt,
+                    response.headers.get("Retry-After"),
+                    self.backoff_factor,
+                    self.backoff_max,
+                )
+            )
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def metrics_event_hooks(metrics_registry=None, asynchronous=False):
+    """
+    Returns ``event_hooks`` recording the calls of an httpx style client,
+    e.g. the one of the OpenAI SDK, in a MetricsRegistry.
+
+    Streamed responses are recorded when their headers arrive, with the
+    size from Content-Length.
+    """
+    registry = metrics_registry or metrics.registry
+    started = weakref.WeakKeyDictionary()
+
+    def on_request(request):
+        started[request] = time.perf_counter()
+
+    def on_response(response, body=None):
+        request = response.request
+        registry.observe(
+            metrics.endpoint_for(str(request.url)),
+            time.perf_counter() - started.pop(request, time.perf_counter()),
+            response.status_code,
+            metrics.response_size(response.headers, body),
+        )
+
+    def is_stream(response):
+        return response.headers.get("Content-Type", "").startswith("text/event-stream")
+
+    def on_sync_response(response):
+        on_response(response, None if is_stream(response) else response.read())
+
+    async def on_async_request(request):
+        on_request(request)
+
+    async def on_async_response(response):
+        body = None if is_stream(response) else await response.aread()
+        on_response(response, body)
+
+    if asynchronous:
+        return {"request": [on_async_request], "response": [on_async_response]}
+    return {"request": [on_request], "response": [on_sync_response]}
+
+
+def get_async_client():
+    """
+    Returns the pooled AsyncClient of the running event loop.
+
+    httpx clients must not be shared between event loops, so one keep-alive
+    pool is created per loop and shared by every async connector on it.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(DEFAULT_TIMEOUT[1], connect=DEFAULT_TIMEOUT[0]),
+            transport=AsyncRetryTransport(),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """
+    Closes the pooled AsyncClient of the running event loop, if any.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,40 @@
+"""
+JSON encoding on the request path, with orjson when it is installed and the
+standard library otherwise. Both produce the same compact text.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(value, default=str):
+    """
+    Encodes ``value`` to a compact JSON string.
+
+    Args:
+        value (Any): The value to encode.
+        default (callable): Converts objects JSON does not know, e.g. models.
+
+    Returns:
+        str: The JSON text.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value, default=default, option=orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+    return json.dumps(value, default=default, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(text):
+    """
+    Decodes JSON text or bytes, raising ValueError when it is invalid.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
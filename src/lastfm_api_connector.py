@@ -1,26 +1,28 @@
-import requests
 from models.top import Top
 from requests.exceptions import RequestException, Timeout
+from src.cache import SWRCache
+from src import tracing
+from src.http_transport import get_transport
+
+shared_cache = SWRCache(ttls={"top_songs": 900}, max_entries={"top_songs": 8})
 
 
 class LastFmConnector:
-    def __init__(self, api_key):
+    def __init__(
+        self,
+        api_key,
+        cache=None,
+        transport=None,
+        url="https://ws.audioscrobbler.com/2.0/",
+    ):
         self.api_key = api_key
-        self.url = "https://ws.audioscrobbler.com/2.0/"
+        self.url = url
+        self.cache = cache or shared_cache
+        self.transport = transport or get_transport()
 
     def get_top_songs(self):
-        params = {
-            "method": "chart.gettoptracks",
-            "api_key": self.api_key,
-            "format": "json",
-        }
         try:
-            response = requests.get(self.url, params=params, timeout=5)
-            response.raise_for_status()
-            return [
-                Top(name=item["name"], artist_name=item["artist"]["name"])
-                for item in response.json()["tracks"]["track"]
-            ][:20]
+            return self.cache.get("top_songs", self.url, self._fetch_top_songs)
         except (RequestException, Timeout):
             return [
                 Top(
@@ -28,3 +30,17 @@ class LastFmConnector:
                     artist_name="Nothing is trending at the moment",
                 )
             ]
+
+    @tracing.traced("lastfm.top_songs")
+    def _fetch_top_songs(self):
+        params = {
+            "method": "chart.gettoptracks",
+            "api_key": self.api_key,
+            "format": "json",
+        }
+        response = self.transport.get(self.url, params=params, timeout=5)
+        response.raise_for_status()
+        return [
+            Top(name=item["name"], artist_name=item["artist"]["name"])
+            for item in response.json()["tracks"]["track"]
+        ][:20]
@@ -0,0 +1,238 @@
+import bisect
+import json
+import re
+import threading
+from urllib.parse import urlsplit
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# First match wins, so the more specific paths come first. Only the path is
+# matched, local stand-ins on other hosts are recognized as well.
+ENDPOINTS = (
+    ("spotify.token", re.compile(r"/api/token/?$")),
+    ("spotify.search", re.compile(r"/v1/search/?$")),
+    ("spotify.playlist_items", re.compile(r"/v1/playlists/[^/]+/(tracks|items)/?$")),
+    ("spotify.playlists", re.compile(r"/v1/(me|users/[^/]+)/playlists/?$")),
+    ("spotify.recently_played", re.compile(r"/v1/me/player/recently-played/?$")),
+    ("spotify.player", re.compile(r"/v1/me/player(/.*)?$")),
+    ("spotify.top", re.compile(r"/v1/me/top/")),
+    ("spotify.me", re.compile(r"/v1/me/?$")),
+    ("lastfm.chart", re.compile(r"/2\.0/?$")),
+    ("openweather.geocode", re.compile(r"/geo/1\.0/direct/?$")),
+    ("openweather.timemachine", re.compile(r"/data/3\.0/onecall/timemachine/?$")),
+    ("llm.completions", re.compile(r"/chat/completions/?$")),
+)
+
+
+def endpoint_for(url):
+    """
+    Maps a request URL to a bounded endpoint name, e.g. ``spotify.search``.
+    Unknown URLs are named after their host.
+    """
+    parts = urlsplit(url)
+    for name, pattern in ENDPOINTS:
+        if pattern.search(parts.path):
+            return name
+    return parts.hostname or "unknown"
+
+
+class EndpointMetrics:
+    __slots__ = (
+        "requests",
+        "errors",
+        "rate_limited",
+        "retries",
+        "statuses",
+        "latency_buckets",
+        "latency_sum",
+        "response_bytes",
+        "max_response_bytes",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.statuses = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.response_bytes = 0
+        self.max_response_bytes = 0
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.latency_buckets):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "statuses": dict(self.statuses),
+            "latency_seconds": {
+                "sum": self.latency_sum,
+                "mean": self.latency_sum / self.requests if self.requests else 0.0,
+                "buckets": buckets,
+            },
+            "response_bytes": self.response_bytes,
+            "max_response_bytes": self.max_response_bytes,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Counters and latency histograms of the outbound API calls per
+        endpoint, fed by the HTTP transports.
+
+        A request is one call as seen by the connector, retries made by the
+        transport before the final response are counted in ``retries``.
+        Every 429, retried or not, counts as ``rate_limited``.
+        """
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _metrics(self, endpoint):
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics()
+        return metrics
+
+    def observe(self, endpoint, seconds, status=None, response_bytes=0):
+        """
+        Records one finished call.
+
+        Args:
+            endpoint (str): The endpoint name, see endpoint_for.
+            seconds (float): Wall time of the call including retries.
+            status (int): The final HTTP status, None if no response arrived.
+            response_bytes (int): Size of the response body.
+        """
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            metrics = self._metrics(endpoint)
+            metrics.requests += 1
+            metrics.latency_buckets[bucket] += 1
+            metrics.latency_sum += seconds
+            metrics.response_bytes += response_bytes
+            metrics.max_response_bytes = max(metrics.max_response_bytes, response_bytes)
+            key = str(status) if status is not None else "none"
+            metrics.statuses[key] = metrics.statuses.get(key, 0) + 1
+            if status is None or status >= 400:
+                metrics.errors += 1
+            if status == 429:
+                metrics.rate_limited += 1
+
+    def observe_retry(self, endpoint, status=None):
+        """
+        Records a response or failure the transport retries.
+        """
+        with self._lock:
+            metrics = self._metrics(endpoint)
+            metrics.retries += 1
+            if status == 429:
+                metrics.rate_limited += 1
+
+    def snapshot(self):
+        """
+        Returns the metrics of every endpoint seen so far, e.g.
+        ``{"spotify.search": {"requests": 20, "errors": 0, ...}}``.
+        """
+        with self._lock:
+            return {
+                endpoint: metrics.to_dict()
+                for endpoint, metrics in sorted(self._endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix="auralis_http"):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.extend(samples)
+
+        def sample(name, endpoint, value, **labels):
+            labels = "".join(f',{key}="{label}"' for key, label in labels.items())
+            return f'{prefix}_{name}{{endpoint="{endpoint}"{labels}}} {value}'
+
+        family(
+            "requests_total",
+            "counter",
+            "Outbound calls by endpoint and final status.",
+            [
+                sample("requests_total", endpoint, count, status=status)
+                for endpoint, metrics in snapshot.items()
+                for status, count in sorted(metrics["statuses"].items())
+            ],
+        )
+        for name, key, help_text in (
+            ("errors_total", "errors", "Calls without a successful response."),
+            ("rate_limited_total", "rate_limited", "Responses with status 429."),
+            ("retries_total", "retries", "Attempts retried by the transport."),
+            ("response_bytes_total", "response_bytes", "Response body bytes."),
+        ):
+            family(
+                name,
+                "counter",
+                help_text,
+                [
+                    sample(name, endpoint, metrics[key])
+                    for endpoint, metrics in snapshot.items()
+                ],
+            )
+        samples = []
+        for endpoint, metrics in snapshot.items():
+            latency = metrics["latency_seconds"]
+            for bound, count in latency["buckets"].items():
+                samples.append(
+                    sample("request_duration_seconds_bucket", endpoint, count, le=bound)
+                )
+            samples.append(
+                sample("request_duration_seconds_sum", endpoint, latency["sum"])
+            )
+            samples.append(
+                sample("request_duration_seconds_count", endpoint, metrics["requests"])
+            )
+        family(
+            "request_duration_seconds",
+            "histogram",
+            "Wall time of outbound calls including retries.",
+            samples,
+        )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def dump(format="prometheus"):
+    """
+    Returns the process wide metrics as Prometheus text or as JSON.
+    """
+    if format == "json":
+        return registry.to_json(indent=2)
+    if format == "prometheus":
+        return registry.to_prometheus()
+    raise ValueError(f"Unknown metrics format {format}")
+
+
+def response_size(headers, body=None):
+    length = headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    return len(body) if body is not None else 0
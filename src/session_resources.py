@@ -0,0 +1,65 @@
+_MISSING = object()
+
+
+class SessionResources:
+    def __init__(self, state, namespace="auralis_resources"):
+        """
+        Keeps expensive objects (connectors, the agent, user info) for the
+        whole user session instead of rebuilding them on every rerun.
+
+        Each resource is stored together with the key it was built for, e.g.
+        the API key of the agent. Asking for it with another key rebuilds it,
+        so changed settings never hand out a stale object. Resources with a
+        ``close`` method, e.g. background workers, are closed when dropped.
+
+        Args:
+            state (MutableMapping): Per session storage that survives reruns,
+                ``st.session_state`` in the app.
+            namespace (str): Entry of ``state`` holding the resources.
+        """
+        if namespace not in state:
+            state[namespace] = {}
+        self._resources = state[namespace]
+
+    def get(self, name, factory, key=None):
+        """
+        Returns resource ``name`` built for ``key``, calling ``factory`` only
+        when it is missing or was built for another key.
+
+        Args:
+            name (str): The resource, e.g. "spotify".
+            factory (callable): Zero argument callable building the resource.
+            key (hashable): What the resource depends on, e.g. an API key.
+
+        Returns:
+            Any: The cached or freshly built resource.
+        """
+        stored_key, value = self._resources.get(name, (_MISSING, None))
+        if stored_key is _MISSING or stored_key != key:
+            self._close(value)
+            value = factory()
+            self._resources[name] = (key, value)
+        return value
+
+    def peek(self, name):
+        """
+        Returns resource ``name`` without building it, None if missing.
+        """
+        return self._resources.get(name, (None, None))[1]
+
+    def invalidate(self, *names):
+        """
+        Drops the given resources, or all of them when no name is given, so
+        the next ``get`` builds them again.
+        """
+        for name in names or list(self._resources):
+            self._close(self._resources.pop(name, (None, None))[1])
+
+    @staticmethod
+    def _close(value):
+        close = getattr(value, "close", None)
+        if callable(close):
+            close()
+
+    def __contains__(self, name):
+        return name in self._resources
@@ -1,13 +1,48 @@
-import spotipy
 import secrets
-from spotipy.oauth2 import SpotifyOAuth
+import threading
+from itertools import islice
 from models.playlist import Playlist
 from models.song import Song
 from models.device import Device
+from models.playback_state import PlaybackState
+from src import tracing
+from src.cache import SWRCache
+from src.http_transport import get_transport
+from src.track_resolver import TrackResolver
+
+shared_cache = SWRCache(
+    ttls={
+        "recently_played": 60,
+        "top_tracks": 3600,
+        "playlists": 300,
+        "playlist_index": 300,
+        "devices": 5,
+    },
+    max_entries={
+        "recently_played": 1024,
+        "top_tracks": 1024,
+        "playlists": 1024,
+        "playlist_index": 1024,
+        "devices": 1024,
+    },
+)
+PLAYLIST_PAGE_LIMIT = 100
+COLLECTION_PAGE_LIMIT = 50
+PLAYLIST_ADD_LIMIT = 100
 
 
 class SpotifyApiConnector:
-    def __init__(self, client_id, client_secret, local=False):
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        local=False,
+        cache=None,
+        transport=None,
+        base_url=None,
+        song_model=Song,
+        playlist_model=Playlist,
+    ):
         """
         Initializes the SpotifyApiConnector with client credentials and sets up the
         redirect URI and scope for Spotify API access.
@@ -15,7 +50,23 @@ class SpotifyApiConnector:
         Args:
             client_id (str): The client ID for the Spotify application.
             client_secret (str): The client secret for the Spotify application.
+            cache (SWRCache): Per user cache for context data, shared by all
+                connectors of the process by default.
+            transport (HttpTransport): Keep-alive session with retries, shared
+                by all connectors of the process by default.
+            base_url (str): Base URL of the Web API, e.g. a local stand-in.
+            song_model (type): Built from every track payload, e.g.
+                models.compact.CompactSong to skip validating bulk payloads.
+            playlist_model (type): Built from every playlist payload.
         """
+        self.base_url = base_url
+        self.song_model = song_model
+        self.playlist_model = playlist_model
+        self.cache = cache or shared_cache
+        self.transport = transport or get_transport()
+        self.track_resolver = TrackResolver(self)
+        self._user_id = None
+        self._user_id_lock = threading.Lock()
         if local:
             self.redirect_uri = "http://localhost:8888/callback"
         else:
@@ -32,20 +83,36 @@ class SpotifyApiConnector:
             "user-read-recently-played",
             "user-top-read",
         )
-        state = secrets.token_urlsafe(16)
-        self.oaut_manager = SpotifyOAuth(
-            client_id,
-            client_secret,
-            redirect_uri=self.redirect_uri,
-            scope=self.scope,
-            cache_path=None,
-            state=state,
-        )
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._oauth_manager = None
         if local:
             self.client = self.connect()
         else:
             self.client = None
 
+    # spotipy pulls in its redis cache handler and takes a noticeable part of
+    # the cold start, so it is only imported when a client is created.
+    @property
+    def oaut_manager(self):
+        """
+        The SpotifyOAuth of the login flow, created on first use.
+        """
+        if self._oauth_manager is None:
+            from spotipy.oauth2 import SpotifyOAuth
+
+            self._oauth_manager = SpotifyOAuth(
+                self._client_id,
+                self._client_secret,
+                redirect_uri=self.redirect_uri,
+                scope=self.scope,
+                cache_path=None,
+                state=secrets.token_urlsafe(16),
+                requests_session=self.transport.session,
+                requests_timeout=self.transport.timeout,
+            )
+        return self._oauth_manager
+
     def get_auth_url(self):
         """
         Generates the authorization URL for the Spotify API.
@@ -67,8 +134,22 @@ class SpotifyApiConnector:
         """
         return self.oaut_manager.get_access_token(code)
 
+    def _spotify(self, **kwargs):
+        import spotipy
+
+        client = spotipy.Spotify(
+            requests_session=self.transport.session,
+            requests_timeout=self.transport.timeout,
+            **kwargs,
+        )
+        if self.base_url:
+            client.prefix = self.base_url
+        return client
+
     def get_client(self, token_info):
-        self.client = spotipy.Spotify(auth=token_info)
+        self.client = self._spotify(auth=token_info)
+        with self._user_id_lock:
+            self._user_id = None
 
     def connect(self):
         """
@@ -82,13 +163,21 @@ class SpotifyApiConnector:
             spotipy.Spotify: An authenticated Spotify client instance.
         """
 
-        return spotipy.Spotify(
-            auth_manager=self.oaut_manager,
-        )
+        return self._spotify(auth_manager=self.oaut_manager)
 
     def connect_from_streamlit(self, token):
-        self.client = spotipy.Spotify(auth=token)
+        self.client = self._spotify(auth=token)
+        with self._user_id_lock:
+            self._user_id = None
+
+    def close(self):
+        """
+        Stops the search threads, e.g. when the session ends. The shared
+        transport and caches stay open for the other sessions.
+        """
+        self.track_resolver.close()
 
+    @tracing.traced("spotify.me")
     def get_user_info(self):
         """
         Gets the current user's information from the Spotify API.
@@ -98,92 +187,255 @@ class SpotifyApiConnector:
         """
         return self.client.me()
 
-    def get_user_playlists(self):
+    @property
+    def user_id(self):
+        """
+        The current user's id, fetched once per client and used as cache key.
+        The context sources ask for it at the same moment, the lock makes
+        them wait for the first fetch.
+        """
+        if self._user_id is None:
+            with self._user_id_lock:
+                if self._user_id is None:
+                    self._user_id = self.get_user_info()["id"]
+        return self._user_id
+
+    def _iter_pages(self, page):
+        """
+        Yields the raw items of a paged result, fetching the next page only
+        once the caller has consumed the current one.
+        """
+        while page:
+            yield from page["items"]
+            page = self.client.next(page) if page.get("next") else None
+
+    def _page_size(self, limit, maximum=COLLECTION_PAGE_LIMIT):
+        return min(limit, maximum) if limit else maximum
+
+    def _load(self, span_name, items, limit):
+        with tracing.span(span_name, limit=limit):
+            return list(islice(items, limit))
+
+    def iter_user_playlists(self, limit=None):
+        """
+        Lazily iterates over the current user's playlists across all pages.
+
+        Args:
+            limit (int): Page size hint when only the first few are needed.
+
+        Yields:
+            Playlist: The current user's playlists.
+        """
+        page = self.client.current_user_playlists(limit=self._page_size(limit))
+        for playlist in self._iter_pages(page):
+            if playlist:
+                yield self.playlist_model(**playlist)
+
+    def get_user_playlists(self, limit=None):
         """
         Gets the current user's playlists from the Spotify API.
 
+        Args:
+            limit (int): Maximum number of playlists, all of them when None.
+
         Returns:
             list[Playlist]: A list of Playlist objects representing the current user's playlists.
         """
-        playlists = self.client.current_user_playlists()["items"]
-        return [Playlist(**playlist) for playlist in playlists]
+        return self.cache.get(
+            "playlists",
+            (self.user_id, limit),
+            lambda: self._load(
+                "spotify.playlists", self.iter_user_playlists(limit), limit
+            ),
+        )
+
+    def iter_songs_from_playlist(self, playlist_id, limit=None):
+        page = self.client.playlist_items(
+            playlist_id,
+            limit=self._page_size(limit, PLAYLIST_PAGE_LIMIT),
+            additional_types=("track",),
+        )
+        for item in self._iter_pages(page):
+            if item.get("track"):
+                yield self.song_model(**item["track"])
 
-    def get_songs_from_playlist(self, playlist_id):
-        songs = self.client.playlist_tracks(playlist_id)["items"]
-        return [Song(**song["track"]) for song in songs]
+    def get_songs_from_playlist(self, playlist_id, limit=None):
+        return list(islice(self.iter_songs_from_playlist(playlist_id, limit), limit))
 
+    @tracing.traced("spotify.search")
     def search_for_song(self, query):
         songs = self.client.search(q=query, type="track")["tracks"]["items"]
-        return [Song(**song) for song in songs]
+        return [self.song_model(**song) for song in songs]
 
     def get_all_user_devices(self):
+        return self.cache.get(
+            "devices", self.user_id, self._fetch_user_devices, serve_stale=False
+        )
+
+    @tracing.traced("spotify.devices")
+    def _fetch_user_devices(self):
         devices = self.client.devices()
         return [Device(**device) for device in devices["devices"]]
 
+    @tracing.traced("spotify.playback_state")
+    def get_playback_state(self):
+        """
+        Gets whether something is playing and on which device in one request.
+
+        Returns:
+            PlaybackState: The current playback state of the user.
+        """
+        state = self.client.current_playback()
+        if not state:
+            return PlaybackState()
+        return PlaybackState(is_playing=state["is_playing"], device=state.get("device"))
+
+    @tracing.traced("spotify.playlist_create")
     def create_playlist(self, playlist_name):
         playlist_name = self.client.user_playlist_create(
-            user=self.get_user_info()["id"], name=playlist_name
+            user=self.user_id, name=playlist_name
+        )
+        self._invalidate_playlists()
+        playlist = self.playlist_model(**playlist_name)
+        self.cache.update(
+            "playlist_index",
+            self.user_id,
+            lambda index: index.setdefault(playlist.name, playlist),
+        )
+        return playlist
+
+    def _invalidate_playlists(self):
+        user_id = self.user_id
+        self.cache.invalidate_matching("playlists", lambda key: key[0] == user_id)
+
+    def get_playlist_index(self):
+        """
+        Gets the current user's playlists keyed by name.
+
+        The index is built once from a full scan of the user's playlists and
+        kept up to date in place when playlists are created. A rebuild that
+        was running during a create is thrown away, it may miss the new
+        playlist.
+
+        Returns:
+            dict[str, Playlist]: Playlist name to the first playlist with that name.
+        """
+        return self.cache.get(
+            "playlist_index", self.user_id, self._build_playlist_index
         )
-        return Playlist(**playlist_name)
+
+    @tracing.traced("spotify.playlist_index")
+    def _build_playlist_index(self):
+        index = {}
+        for playlist in self.iter_user_playlists():
+            index.setdefault(playlist.name, playlist)
+        return index
 
     def get_playlist(self, playlist_name):
-        playlists = self.get_user_playlists()
-        try:
-            playlist = [
-                playlist for playlist in playlists if playlist.name == playlist_name
-            ][0]
-        except IndexError:
-            self.create_playlist(playlist_name)
-            playlists = self.get_user_playlists()
-            playlist = [
-                playlist for playlist in playlists if playlist.name == playlist_name
-            ][0]
+        playlist = self.get_playlist_index().get(playlist_name)
+        if playlist is None:
+            playlist = self.create_playlist(playlist_name)
         return playlist
 
-    def add_songs_to_playlist(self, playlist_id, songs):
-        existing_songs = self.get_songs_from_playlist(playlist_id)
-        existing_songs = [song.name for song in existing_songs]
-        for song in songs:
-            if song.name not in existing_songs:
-                self.client.playlist_add_items(playlist_id, [song.uri])
+    @tracing.traced("spotify.playlist_items")
+    def get_playlist_track_uris(self, playlist_id):
+        """
+        Collects the uris of every track in a playlist, following all pages.
+
+        Args:
+            playlist_id (str): The id of the playlist.
+
+        Returns:
+            set[str]: The uris of the tracks already in the playlist.
+        """
+        page = self.client.playlist_items(
+            playlist_id,
+            fields="items(track(uri)),next",
+            limit=PLAYLIST_PAGE_LIMIT,
+            additional_types=("track",),
+        )
+        return {
+            item["track"]["uri"] for item in self._iter_pages(page) if item.get("track")
+        }
+
+    def add_songs_to_playlist(self, playlist_id, songs, check_existing=True):
+        """
+        Adds songs to a playlist in as few write calls as possible.
 
+        Args:
+            playlist_id (str): The id of the playlist.
+            songs (list[Song]): The songs to be added.
+            check_existing (bool): Skip songs already in the playlist. Can be
+                disabled for playlists that were just created.
+        """
+        seen = self.get_playlist_track_uris(playlist_id) if check_existing else set()
+        uris = []
+        for song in songs:
+            if song.uri not in seen:
+                seen.add(song.uri)
+                uris.append(song.uri)
+        for start in range(0, len(uris), PLAYLIST_ADD_LIMIT):
+            chunk = uris[start : start + PLAYLIST_ADD_LIMIT]
+            with tracing.span("spotify.playlist_add", tracks=len(chunk)):
+                self.client.playlist_add_items(playlist_id, chunk)
+        if uris:
+            self._invalidate_playlists()
+
+    @tracing.traced("spotify.generate_playlist")
     def generate_playlist_from_auralis(self, playlist_name, songs):
         palylist = self.create_playlist(playlist_name)
-        songs_in_spotify = [self.search_for_song(song)[0] for song in songs]
-        self.add_songs_to_playlist(palylist.id, songs_in_spotify)
-        if not self.is_currently_playing():
-            self.play_playlist(palylist.uri)
-
-    def recently_played(self):
-        recently_played = self.client.current_user_recently_played()["items"]
-        return [Song(**song["track"]) for song in recently_played]
+        songs_in_spotify = self.track_resolver.resolve(songs)
+        self.add_songs_to_playlist(palylist.id, songs_in_spotify, check_existing=False)
+        state = self.get_playback_state()
+        if not state.is_playing:
+            self.play_playlist(palylist.uri, self.get_device_to_play_on(state))
+
+    def iter_recently_played(self, limit=None):
+        page = self.client.current_user_recently_played(limit=self._page_size(limit))
+        for item in self._iter_pages(page):
+            yield self.song_model(**item["track"])
+
+    def recently_played(self, limit=None):
+        return self.cache.get(
+            "recently_played",
+            (self.user_id, limit),
+            lambda: self._load(
+                "spotify.recently_played", self.iter_recently_played(limit), limit
+            ),
+        )
 
-    def play_song(self, uri):
+    @tracing.traced("spotify.play")
+    def play_song(self, uri, device_id=None):
         """
         Plays a song on the user's active device.
 
         Args:
             uri (str): The uri of the song to be played.
+            device_id (str): The device to play on, e.g. from a PlaybackState.
 
         If no device is active, it will play on the user's computer.
         """
-        device_id = self.get_device_to_play_on()
+        device_id = device_id or self.get_device_to_play_on()
         self.client.start_playback(uris=[uri], device_id=device_id)
 
-    def play_playlist(self, uri):
+    @tracing.traced("spotify.play")
+    def play_playlist(self, uri, device_id=None):
         """
         Plays the specified playlist on the user's active device.
 
         Args:
             uri (str): The URI of the playlist to be played.
+            device_id (str): The device to play on, e.g. from a PlaybackState.
 
         If no device is currently active, it will attempt to play on the user's computer.
         """
 
-        device_id = self.get_device_to_play_on()
+        device_id = device_id or self.get_device_to_play_on()
         self.client.start_playback(context_uri=uri, device_id=device_id)
 
-    def get_device_to_play_on(self):
+    def get_device_to_play_on(self, state=None):
+        if state is not None and state.device_id:
+            return state.device_id
         devices = self.get_all_user_devices()
         device_id = devices[0].id
         for device in devices:
@@ -194,18 +446,40 @@ class SpotifyApiConnector:
                 device_id = device.id
         return device_id
 
-    def users_top_tracks(self):
-        songs = self.client.current_user_top_tracks()
-        return [Song(**song) for song in songs["items"]]
+    def iter_users_top_tracks(self, limit=None):
+        page = self.client.current_user_top_tracks(limit=self._page_size(limit))
+        for song in self._iter_pages(page):
+            yield self.song_model(**song)
+
+    def users_top_tracks(self, limit=None):
+        return self.cache.get(
+            "top_tracks",
+            (self.user_id, limit),
+            lambda: self._load(
+                "spotify.top_tracks", self.iter_users_top_tracks(limit), limit
+            ),
+        )
 
+    @tracing.traced("spotify.queue")
     def add_songs_to_queue(self, uri, device_id=None):
-        return self.client.add_to_queue(uri)
+        return self.client.add_to_queue(uri, device_id=device_id)
+
+    def play_or_queue(self, uri, state=None):
+        """
+        Queues the song if something is playing, otherwise starts playing it.
+
+        Args:
+            uri (str): The uri of the song.
+            state (PlaybackState): A snapshot to reuse instead of fetching one.
+        """
+        state = state or self.get_playback_state()
+        if state.is_playing:
+            self.add_songs_to_queue(uri, device_id=state.device_id)
+        else:
+            self.play_song(uri, device_id=self.get_device_to_play_on(state))
 
     def is_currently_playing(self):
-        state = self.client.currently_playing()
-        if not state:
-            return False
-        return state["is_playing"]
+        return self.get_playback_state().is_playing
 
     def get_todays_top_listen(self):
         playlist = self.get_playlist("Today's Top Hits")
@@ -0,0 +1,244 @@
+import functools
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src import json_codec
+
+_current_span = ContextVar("auralis_current_span", default=None)
+
+
+class Trace:
+    def __init__(self):
+        """
+        The spans of one request, e.g. a click on "Generate your Playlist".
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    @property
+    def root(self):
+        return next((span for span in self.spans if span.parent is None), None)
+
+
+class Span:
+    __slots__ = ("name", "attributes", "trace", "parent", "span_id", "start", "end")
+
+    def __init__(self, name, attributes, trace, parent):
+        self.name = name
+        self.attributes = attributes
+        self.trace = trace
+        self.parent = parent
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = time.perf_counter()
+        self.end = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": self.trace.started_at + (self.start - self.trace.origin),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    trace = None
+
+    def set(self, **attributes):
+        pass
+
+
+class JsonLinesExporter:
+    def __init__(self, path):
+        """
+        Appends every finished span as one JSON object per line to ``path``.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, trace):
+        lines = "".join(json_codec.dumps(span.to_dict()) + "\n" for span in trace.spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+class Tracer:
+    def __init__(self, exporters=None, keep=50, enabled=True):
+        """
+        Records nested timing spans per request.
+
+        The current span lives in a context variable, so spans opened further
+        down the call stack nest below it. Worker threads do not inherit it,
+        callables handed to a pool are wrapped with ``bind`` for that.
+
+        Args:
+            exporters (list): Objects with an ``export(trace)`` method, called
+                once the root span of a trace has finished.
+            keep (int): Number of finished traces kept in ``recent``.
+            enabled (bool): When False spans are not recorded at all.
+        """
+        self.exporters = list(exporters or [])
+        self.recent = deque(maxlen=keep)
+        self.enabled = enabled
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Times the enclosed block as span ``name``, nested below the current
+        span of this context or starting a new trace.
+
+        Yields:
+            Span: Use ``span.set(key=value)`` to attach attributes.
+        """
+        if not self.enabled:
+            yield _NoopSpan()
+            return
+        parent = _current_span.get()
+        trace = parent.trace if parent is not None else Trace()
+        span = Span(name, attributes, trace, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            trace.add(span)
+            if parent is None:
+                self._finish(trace)
+
+    def _finish(self, trace):
+        self.recent.append(trace)
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception:
+                pass
+
+
+tracer = Tracer()
+if os.getenv("AURALIS_TRACE_FILE"):
+    tracer.add_exporter(JsonLinesExporter(os.getenv("AURALIS_TRACE_FILE")))
+
+
+def span(name, **attributes):
+    """
+    Opens a span on the process wide tracer, see Tracer.span.
+    """
+    return tracer.span(name, **attributes)
+
+
+def traced(name, **attributes):
+    """
+    Decorator timing every call of the function as span ``name``.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_span():
+    return _current_span.get()
+
+
+def bind(func):
+    """
+    Returns ``func`` running below the current span, for callables that are
+    executed on another thread, e.g. submitted to a ThreadPoolExecutor.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return func
+
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+
+    return bound
+
+
+def waterfall(trace):
+    """
+    Returns the spans of a trace as rows for a waterfall view, children
+    below their parent in start order, names indented by nesting depth.
+
+    Returns:
+        list[dict]: ``span``, ``start_ms``, ``duration_ms`` and ``attributes``.
+    """
+    children = {}
+    for item in sorted(trace.spans, key=lambda item: item.start):
+        children.setdefault(item.parent, []).append(item)
+    rows = []
+    pending = [(root, 0) for root in reversed(children.get(None, []))]
+    while pending:
+        item, depth = pending.pop()
+        rows.append(
+            {
+                "span": "  " * depth + item.name,
+                "start_ms": round((item.start - trace.origin) * 1000, 1),
+                "duration_ms": round(item.duration * 1000, 1),
+                "attributes": item.attributes,
+            }
+        )
+        pending.extend((child, depth + 1) for child in reversed(children.get(item, [])))
+    return rows
+
+
+def format_waterfall(trace, width=30):
+    """
+    Renders a trace as fixed width text, one bar per span on a shared time
+    axis, e.g. for ``st.code`` in the Streamlit sidebar.
+    """
+    rows = waterfall(trace)
+    if not rows:
+        return ""
+    total = max(row["start_ms"] + row["duration_ms"] for row in rows) or 1.0
+    name_width = max(len(row["span"]) for row in rows)
+    lines = []
+    for row in rows:
+        offset = int(row["start_ms"] / total * width)
+        length = max(1, round(row["duration_ms"] / total * width))
+        bar = (" " * offset + "\u2588" * length).ljust(width)[:width]
+        lines.append(
+            f"{row['span']:<{name_width}} {row['duration_ms']:>8.1f} ms |{bar}|"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,296 @@
+import asyncio
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from models.song import Song
+from src import tracing
+
+_shared_track_cache = None
+_shared_track_cache_lock = threading.Lock()
+
+
+def normalize_query(query):
+    """
+    Normalizes a "title artist" query so that trivially different spellings
+    of the same suggestion share one cache entry.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = re.sub(r"[^\w]+", " ", query)
+    return " ".join(query.split())
+
+
+class TrackCache:
+    def __init__(self, path=None, max_entries=5000):
+        """
+        On disk query to track cache backed by SQLite.
+
+        Args:
+            path (str): Location of the database file. Defaults to the
+                AURALIS_TRACK_CACHE environment variable, else a file in the
+                temp directory that every process of the host shares and that
+                does not survive a redeploy. Set it to a persistent volume in
+                deployments, ":memory:" keeps the cache per process.
+            max_entries (int): Least recently used entries beyond this are evicted.
+        """
+        self.path = path or os.getenv(
+            "AURALIS_TRACK_CACHE",
+            os.path.join(tempfile.gettempdir(), "auralis_tracks.sqlite3"),
+        )
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tracks (
+                    query TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    uri TEXT NOT NULL,
+                    artist_name TEXT,
+                    artist_uri TEXT,
+                    used_at REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS tracks_used_at ON tracks (used_at)"
+            )
+
+    def get_many(self, queries, song_model=Song):
+        """
+        Looks up normalized queries and marks the found ones as recently used.
+
+        Args:
+            queries (list): Normalized queries.
+            song_model (type): Built for every hit, the ``song_model`` of the
+                connector so cached and searched songs have the same type.
+
+        Returns:
+            dict: Normalized query to song for every cached query.
+        """
+        queries = list(dict.fromkeys(queries))
+        if not queries:
+            return {}
+        placeholders = ",".join("?" for _ in queries)
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "SELECT query, name, uri, artist_name, artist_uri FROM tracks "
+                f"WHERE query IN ({placeholders})",
+                queries,
+            ).fetchall()
+            self._connection.executemany(
+                "UPDATE tracks SET used_at = ? WHERE query = ?",
+                [(time.time(), row[0]) for row in rows],
+            )
+        return {
+            query: song_model(
+                name=name,
+                uri=uri,
+                artists=[{"name": artist_name, "uri": artist_uri}]
+                if artist_name is not None
+                else [],
+            )
+            for query, name, uri, artist_name, artist_uri in rows
+        }
+
+    def put_many(self, songs):
+        """
+        Stores resolved songs and evicts the least recently used overflow.
+
+        Args:
+            songs (dict): Normalized query to Song.
+        """
+        if not songs:
+            return
+        now = time.time()
+        rows = [
+            (
+                query,
+                song.name,
+                song.uri,
+                song.artists[0].name if song.artists else None,
+                song.artists[0].uri if song.artists else None,
+                now,
+            )
+            for query, song in songs.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self._connection.execute(
+                "DELETE FROM tracks WHERE query IN (SELECT query FROM tracks "
+                "ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+
+def get_shared_track_cache():
+    """
+    Returns the process wide TrackCache, opening the database on first use.
+    """
+    global _shared_track_cache
+    if _shared_track_cache is None:
+        with _shared_track_cache_lock:
+            if _shared_track_cache is None:
+                _shared_track_cache = TrackCache()
+    return _shared_track_cache
+
+
+class TrackResolver:
+    def __init__(self, spotify_connector, cache=None, max_workers=8):
+        """
+        Resolves free text song suggestions to Spotify tracks.
+
+        Args:
+            spotify_connector (SpotifyApiConnector): Used for the searches.
+            cache (TrackCache): Persistent query cache, shared by default.
+            max_workers (int): Maximum number of searches in flight at once.
+        """
+        self.spotify_connector = spotify_connector
+        self._cache = cache
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="auralis-search"
+        )
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = get_shared_track_cache()
+        return self._cache
+
+    def search(self, query):
+        try:
+            songs = self.spotify_connector.search_for_song(query)
+        except Exception:
+            return None
+        return songs[0] if songs else None
+
+    def resolve_one(self, query):
+        key = normalize_query(query)
+        if not key:
+            return None
+        song = self.cache.get_many([key], self.spotify_connector.song_model).get(key)
+        if song is None:
+            song = self.search(query)
+            if song is not None:
+                self.cache.put_many({key: song})
+        return song
+
+    def prefetch(self, query):
+        """
+        Starts resolving a query in the background, e.g. while the LLM is
+        still streaming the rest of the playlist. A later ``resolve`` of the
+        same query waits for this search instead of starting another one.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            if not key or key in self._pending:
+                return
+            future = self.executor.submit(tracing.bind(self.resolve_one), query)
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def resolve(self, queries):
+        """
+        Resolves queries concurrently, skipping the ones without a match.
+
+        Args:
+            queries (list[str]): Song suggestions like "title artist".
+
+        Returns:
+            list[Song]: The resolved songs in the order of the queries.
+        """
+        with tracing.span("spotify.resolve", queries=len(queries)) as span:
+            return self._resolve(queries, span)
+
+    def _resolve(self, queries, span):
+        keys = [normalize_query(query) for query in queries]
+        with self._lock:
+            pending = {key: self._pending[key] for key in keys if key in self._pending}
+        resolved = self.cache.get_many(
+            [key for key in keys if key not in pending],
+            self.spotify_connector.song_model,
+        )
+        for key, future in pending.items():
+            if future.result() is not None:
+                resolved[key] = future.result()
+        misses = {
+            key: query
+            for key, query in zip(keys, queries)
+            if key not in resolved and key not in pending and key
+        }
+        span.set(prefetched=len(pending), searched=len(misses))
+        found = dict(
+            zip(misses, self.executor.map(tracing.bind(self.search), misses.values()))
+        )
+        found = {key: song for key, song in found.items() if song is not None}
+        self.cache.put_many(found)
+        resolved.update(found)
+        return [resolved[key] for key in keys if key in resolved]
+
+
+class AsyncTrackResolver:
+    def __init__(self, spotify_connector, cache=None, max_concurrency=8):
+        """
+        Async counterpart of TrackResolver sharing the same persistent cache.
+
+        Args:
+            spotify_connector (AsyncSpotifyApiConnector): Used for the searches.
+            cache (TrackCache): Persistent query cache, shared by default.
+            max_concurrency (int): Maximum number of searches in flight at once.
+        """
+        self.spotify_connector = spotify_connector
+        self._cache = cache
+        self.max_concurrency = max_concurrency
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = get_shared_track_cache()
+        return self._cache
+
+    async def search(self, query, semaphore):
+        async with semaphore:
+            try:
+                songs = await self.spotify_connector.search_for_song(query)
+            except Exception:
+                return None
+        return songs[0] if songs else None
+
+    async def resolve(self, queries):
+        keys = [normalize_query(query) for query in queries]
+        resolved = self.cache.get_many(keys, self.spotify_connector.song_model)
+        misses = {
+            key: query
+            for key, query in zip(keys, queries)
+            if key not in resolved and key
+        }
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self.search(query, semaphore) for query in misses.values())
+        )
+        found = {key: song for key, song in zip(misses, results) if song is not None}
+        self.cache.put_many(found)
+        resolved.update(found)
+        return [resolved[key] for key in keys if key in resolved]
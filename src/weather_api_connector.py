@@ -1,43 +1,129 @@
 from models.location import Location
 import datetime
-import pytz
-import timezonefinder
-
-import requests
+import threading
 
 from models.location_temperature import Temperature
+from src import tracing
+from src.cache import SWRCache
+from src.http_transport import get_transport
+
+shared_cache = SWRCache(
+    ttls={"city": 86400, "timezone": float("inf"), "ip_location": 600, "weather": 600},
+    max_entries={"city": 1024, "timezone": 4096, "ip_location": 1, "weather": 1024},
+)
+
+_timezone_finder = None
+_timezone_finder_lock = threading.Lock()
+
+
+def get_timezone_finder():
+    """
+    Returns the process wide TimezoneFinder, loading its polygon data once.
+    The package itself is only imported here, when weather is enabled.
+    """
+    global _timezone_finder
+    if _timezone_finder is None:
+        with _timezone_finder_lock:
+            if _timezone_finder is None:
+                import timezonefinder
+
+                _timezone_finder = timezonefinder.TimezoneFinder(in_memory=True)
+    return _timezone_finder
+
+
+def find_timezone(lat, lng):
+    """
+    Returns the timezone name at a coordinate. certain_timezone_at gives up
+    near borders and at sea, timezone_at then picks the likely one. None when
+    neither knows it.
+    """
+    finder = get_timezone_finder()
+    return finder.certain_timezone_at(lat=lat, lng=lng) or finder.timezone_at(
+        lat=lat, lng=lng
+    )
+
+
+def resolve_timezone(cache, location):
+    """
+    Returns the timezone name of a location, UTC when it is unknown. Only
+    found timezones are cached, an unknown one is looked up again next time.
+    """
+    key = (round(location.lat, 4), round(location.lon, 4))
+    timezone = cache.peek("timezone", key)
+    if timezone is None:
+        with tracing.span("weather.timezone"):
+            timezone = find_timezone(location.lat, location.lon)
+        if timezone is None:
+            return "UTC"
+        cache.put("timezone", key, timezone)
+    return timezone
 
 
 class WeatherApiConnector:
-    def __init__(self, api_key):
+    def __init__(
+        self,
+        api_key,
+        cache=None,
+        transport=None,
+        base_url="https://api.openweathermap.org/",
+    ):
         self.api_key = api_key
+        self.base_url = base_url
+        self.cache = cache or shared_cache
+        self.transport = transport or get_transport()
 
     def get_location(self):
-        ip = requests.get("https://api.ipify.org").text
-        response = requests.get(f"http://ip-api.com/json/{ip}")
+        return self.cache.get("ip_location", "ip", self._fetch_location)
+
+    @tracing.traced("weather.ip_location")
+    def _fetch_location(self):
+        ip = self.transport.get("https://api.ipify.org").text
+        response = self.transport.get(f"http://ip-api.com/json/{ip}")
         data = response.json()
         return Location(**data)
 
     def encode_location(self, city_name):
-        response = requests.get(
-            f"http://api.openweathermap.org/geo/1.0/direct?q={city_name}&appid={self.api_key}"
+        return self.cache.get(
+            "city",
+            city_name.strip().lower(),
+            lambda: self._fetch_city_location(city_name),
+        )
+
+    @tracing.traced("weather.geocode")
+    def _fetch_city_location(self, city_name):
+        response = self.transport.get(
+            f"{self.base_url}geo/1.0/direct?q={city_name}&appid={self.api_key}"
         )
         data = response.json()[0]
         return Location(**data)
 
+    def resolve_timezone(self, location):
+        return resolve_timezone(self.cache, location)
+
     def encode_time(self, location):
-        tf = timezonefinder.TimezoneFinder()
-        timezone_str = tf.certain_timezone_at(lat=location.lat, lng=location.lon)
-        timezone_str
-        timezone = pytz.timezone(timezone_str)
+        import pytz
+
+        timezone = pytz.timezone(self.resolve_timezone(location))
         dt = datetime.datetime.now(timezone)
         return dt
 
     def get_current_location_weather(self, city):
+        """
+        Returns the current weather of ``city``. OpenWeather updates it about
+        every ten minutes, so it is cached per city for that long.
+        """
+        return self.cache.get(
+            "weather",
+            city.strip().lower(),
+            lambda: self._fetch_current_weather(city),
+        )
+
+    @tracing.traced("weather.current")
+    def _fetch_current_weather(self, city):
         location = self.encode_location(city)
         time = int(self.encode_time(location).timestamp())
-        response = requests.get(
-            f"https://api.openweathermap.org/data/3.0/onecall/timemachine?lat={location.lat}&lon={location.lon}&dt={time}&appid={self.api_key}&units=metric"
+        response = self.transport.get(
+            f"{self.base_url}data/3.0/onecall/timemachine?lat={location.lat}&lon={location.lon}&dt={time}&appid={self.api_key}&units=metric"
         )
         data = response.json()["data"][0]
         return Temperature(**data)
@@ -0,0 +1,30 @@
+import pytest
+
+from src.cache import SWRCache
+from src.spotify_api_connector import SpotifyApiConnector
+from src.track_resolver import TrackCache, TrackResolver
+from tests.helpers import FakeSpotifyClient, StubServer
+
+
+@pytest.fixture
+def fake_client():
+    return FakeSpotifyClient()
+
+
+@pytest.fixture
+def track_cache(tmp_path):
+    return TrackCache(str(tmp_path / "tracks.sqlite3"))
+
+
+@pytest.fixture
+def spotify_connector(fake_client, track_cache):
+    connector = SpotifyApiConnector("client_id", "client_secret", cache=SWRCache())
+    connector.client = fake_client
+    connector.track_resolver = TrackResolver(connector, cache=track_cache)
+    return connector
+
+
+@pytest.fixture
+def stub_server():
+    with StubServer() as server:
+        yield server
@@ -0,0 +1,225 @@
+"""
+Builders and stand-ins shared by the tests, the fixtures live in conftest.
+"""
+
+import json
+import re
+import threading
+from types import SimpleNamespace
+
+from benchmarks import stubs
+
+
+def track(index):
+    return {
+        "id": f"id{index}",
+        "name": f"Song {index}",
+        "uri": f"spotify:track:{index}",
+        "artists": [{"name": f"Artist {index}", "uri": f"spotify:artist:{index}"}],
+    }
+
+
+def playlist(index):
+    return {
+        "id": f"playlist{index}",
+        "name": f"Playlist {index}",
+        "href": f"https://api.spotify.com/v1/playlists/playlist{index}",
+        "uri": f"spotify:playlist:playlist{index}",
+    }
+
+
+def device(device_id, device_type, is_active=False):
+    return {
+        "id": device_id,
+        "is_active": is_active,
+        "name": device_id,
+        "type": device_type,
+        "volume_percent": 50,
+    }
+
+
+class FakeSpotifyClient:
+    """
+    In memory stand-in for ``spotipy.Spotify`` recording every call made.
+    """
+
+    def __init__(self, playlist_tracks=0, playlists=0, page_size=100):
+        self.calls = []
+        self.page_size = page_size
+        self.playlist_tracks = [track(index) for index in range(playlist_tracks)]
+        self.playlists = [playlist(index) for index in range(playlists)]
+        self.recent_tracks = [track(index) for index in range(50)]
+        self.top_tracks = [track(index) for index in range(100, 150)]
+        self.device_list = [device("phone", "Smartphone"), device("tv", "TV")]
+        self.playback = {"is_playing": True, "device": device("phone", "Smartphone")}
+        self.playing = []
+        self.queue = []
+
+    def _collection(self, name):
+        if name == "playlist_items":
+            return [{"track": item} for item in self.playlist_tracks]
+        if name == "current_user_recently_played":
+            return [{"track": item} for item in self.recent_tracks]
+        return {
+            "current_user_playlists": self.playlists,
+            "current_user_top_tracks": self.top_tracks,
+        }[name]
+
+    def _page(self, name, offset=0, limit=20):
+        self.calls.append(name)
+        limit = min(limit, self.page_size)
+        items = self._collection(name)
+        end = offset + limit
+        return {
+            "items": items[offset:end],
+            "next": f"{name}?offset={end}&limit={limit}" if end < len(items) else None,
+        }
+
+    def me(self):
+        self.calls.append("me")
+        return {"id": "user", "display_name": "User"}
+
+    def current_user_playlists(self, limit=50):
+        return self._page("current_user_playlists", limit=limit)
+
+    def current_user_recently_played(self, limit=50):
+        return self._page("current_user_recently_played", limit=limit)
+
+    def current_user_top_tracks(self, limit=20):
+        return self._page("current_user_top_tracks", limit=limit)
+
+    def playlist_items(self, playlist_id, fields=None, limit=100, **kwargs):
+        return self._page("playlist_items", limit=limit)
+
+    def next(self, page):
+        name, query = page["next"].split("?")
+        query = dict(part.split("=") for part in query.split("&"))
+        self.calls.append("next")
+        return self._page(name, int(query["offset"]), int(query["limit"]))
+
+    def playlist_add_items(self, playlist_id, items):
+        self.calls.append("playlist_add_items")
+        assert len(items) <= 100
+        self.playlist_tracks.extend(
+            {"name": uri, "uri": uri, "artists": []} for uri in items
+        )
+
+    def user_playlist_create(self, user, name):
+        self.calls.append("user_playlist_create")
+        return {
+            "id": "new",
+            "name": name,
+            "href": "href",
+            "uri": "spotify:playlist:new",
+        }
+
+    def search(self, q, type="track"):
+        self.calls.append("search")
+        if "unknown" in q:
+            return {"tracks": {"items": []}}
+        index = q.split()[-1]
+        return {"tracks": {"items": [track(index)]}}
+
+    def current_playback(self):
+        self.calls.append("current_playback")
+        return self.playback
+
+    def devices(self):
+        self.calls.append("devices")
+        return {"devices": self.device_list}
+
+    def start_playback(self, device_id=None, context_uri=None, uris=None):
+        self.calls.append("start_playback")
+        self.playing.append((device_id, context_uri or uris[0]))
+
+    def add_to_queue(self, uri, device_id=None):
+        self.calls.append("add_to_queue")
+        self.queue.append((device_id, uri))
+
+
+def tool_call(id, name, **arguments):
+    return SimpleNamespace(
+        id=id,
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments)),
+    )
+
+
+def response(*tool_calls, usage=None):
+    message = SimpleNamespace(content=None, tool_calls=list(tool_calls) or None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def fake_openai(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class FakeLastFm:
+    """
+    Stand-in for ``LastFmConnector`` without trending songs.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_top_songs(self):
+        self.calls += 1
+        return []
+
+
+class FakeCompletions:
+    """
+    Stand-in for ``chat.completions`` of the OpenAI client recording every
+    request. ``responses`` is a list answered in order, or a callable
+    building the response to the n-th request, counted from 1.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses if callable(responses) else list(responses)
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self.lock:
+            self.requests.append(kwargs)
+            if not callable(self.responses):
+                return self.responses.pop(0)
+            index = len(self.requests)
+        return self.responses(index)
+
+
+class AsyncFakeCompletions(FakeCompletions):
+    async def create(self, **kwargs):
+        return super().create(**kwargs)
+
+
+def flaky(statuses):
+    """
+    Route handler answering with the next of ``statuses``.
+    """
+    responses = iter(statuses)
+
+    def handler(query, body):
+        return next(responses), {"ok": True}
+
+    return handler
+
+
+class StubServer(stubs.StubServer):
+    """
+    The benchmark stub server with exact path routes. A route is a payload
+    and status or a callable receiving the query and JSON body and returning
+    ``(status, payload)``, a later route for the same path wins.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.url = self.url.rstrip("/")
+
+    def route(self, method, path, payload=None, status=200):
+        handler = (
+            payload if callable(payload) else lambda query, body: (status, payload)
+        )
+        super().route(
+            method, re.escape(path), lambda match, query, body: handler(query, body)
+        )
+        self.routes.insert(0, self.routes.pop())
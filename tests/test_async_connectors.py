@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+from tests.helpers import device, playlist, track
+from agent.auralis import Auralis
+from src.async_lastfm_api_connector import AsyncLastFmConnector
+from src.async_spotify_api_connector import AsyncSpotifyApiConnector
+from src.async_weather_api_connector import AsyncWeatherApiConnector
+from src.cache import SWRCache
+from src.http_transport import close_async_client
+from src.track_resolver import AsyncTrackResolver
+
+
+def run(coroutine):
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await close_async_client()
+
+    return asyncio.run(main())
+
+
+def spotify_routes(server):
+    playlists = [playlist(index) for index in range(60)]
+
+    def list_playlists(query, body):
+        offset, limit = int(query.get("offset", 0)), int(query["limit"])
+        end = offset + limit
+        next_url = f"{server.url}/v1/me/playlists?offset={end}&limit={limit}"
+        return 200, {
+            "items": playlists[offset:end],
+            "next": next_url if end < len(playlists) else None,
+        }
+
+    def search(query, body):
+        return 200, {"tracks": {"items": [track(query["q"].split()[-1])]}}
+
+    server.route("GET", "/v1/me", {"id": "user", "display_name": "User"})
+    server.route("GET", "/v1/me/playlists", list_playlists)
+    server.route("GET", "/v1/search", search)
+    server.route("POST", "/v1/users/user/playlists", playlist("new"))
+    server.route("POST", "/v1/playlists/playlistnew/items", {"snapshot_id": "1"})
+    server.route("GET", "/v1/me/player", None, status=204)
+    server.route(
+        "GET", "/v1/me/player/devices", {"devices": [device("pc", "Computer")]}
+    )
+    server.route("PUT", "/v1/me/player/play", None, status=204)
+    server.route("POST", "/v1/me/player/queue", None, status=204)
+
+
+def connector(server, track_cache):
+    spotify = AsyncSpotifyApiConnector("token", base_url=f"{server.url}/v1/")
+    spotify.track_resolver = AsyncTrackResolver(spotify, cache=track_cache)
+    return spotify
+
+
+class TestAsyncConnectors:
+    def test_playlists_follow_every_page(self, stub_server, track_cache):
+        spotify_routes(stub_server)
+        spotify = connector(stub_server, track_cache)
+        playlists = run(spotify.get_user_playlists())
+        assert len(playlists) == 60
+        assert stub_server.requests["GET /v1/me/playlists"] == 2
+
+    def test_generate_playlist(self, stub_server, track_cache):
+        spotify_routes(stub_server)
+        spotify = connector(stub_server, track_cache)
+        run(spotify.generate_playlist_from_auralis("Test", ["Song 1", "Song 2"]))
+        assert stub_server.requests["GET /v1/search"] == 2
+        assert stub_server.requests["POST /v1/playlists/playlistnew/items"] == 1
+        assert "PUT /v1/me/player/play" in stub_server.requests
+
+    def test_lastfm_and_weather(self, stub_server):
+        stub_server.route(
+            "GET",
+            "/2.0/",
+            {"tracks": {"track": [{"name": "Hit", "artist": {"name": "Star"}}]}},
+        )
+        stub_server.route(
+            "GET",
+            "/geo/1.0/direct",
+            [{"name": "Hanover", "country": "DE", "lat": 52.37, "lon": 9.73}],
+        )
+        lastfm = AsyncLastFmConnector("key", url=f"{stub_server.url}/2.0/")
+        weather = AsyncWeatherApiConnector(
+            "key", base_url=stub_server.url, cache=SWRCache()
+        )
+
+        async def fetch():
+            return await asyncio.gather(
+                lastfm.get_top_songs(), weather.encode_location("Hanover")
+            )
+
+        top_songs, location = run(fetch())
+        assert top_songs[0].artist_name == "Star"
+        assert location.country == "DE"
+
+    def test_auralis_async_entry_point(self, stub_server, track_cache):
+        spotify_routes(stub_server)
+        stub_server.route("GET", "/2.0/", None, status=404)
+        stub_server.route("GET", "/v1/me/player/recently-played", {"items": []})
+        stub_server.route("GET", "/v1/me/top/tracks", {"items": []})
+        arguments = {"playlist_name": "Test", "songs": ["Song 1"], "reason": "Why"}
+        stub_server.route(
+            "POST",
+            "/v1/chat/completions",
+            {
+                "id": "completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "tool_calls",
+                        "message": {
+                            "role": "assistant",
+                            "content": None,
+                            "tool_calls": [
+                                {
+                                    "id": "call",
+                                    "type": "function",
+                                    "function": {
+                                        "name": "generate_playlist",
+                                        "arguments": json.dumps(arguments),
+                                    },
+                                }
+                            ],
+                        },
+                    }
+                ],
+            },
+        )
+        auralis = Auralis(
+            connector(stub_server, track_cache),
+            "key",
+            AsyncLastFmConnector("key", url=f"{stub_server.url}/2.0/"),
+            model="gpt-4o",
+            base_url=f"{stub_server.url}/v1/",
+        )
+        result = run(auralis.aplaylist_generator("Focus music"))
+        assert result == ("Test", ["Song 1"], "Why")
+        assert "POST /v1/playlists/playlistnew/items" in stub_server.requests
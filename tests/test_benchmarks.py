@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from benchmarks.importtime import parse_importtime, run_importtime, violations
+from benchmarks.load import run_load
+from benchmarks.models import run_model_benchmark
+from benchmarks.run import SCENARIOS, compare, main, percentile, run_benchmarks
+
+
+def report(**medians):
+    return {"results": {name: {"median": value} for name, value in medians.items()}}
+
+
+class TestBenchmarks:
+    def test_every_scenario_runs_against_the_stubs(self):
+        result = run_benchmarks(iterations=1, warmup=0, latency=0, payload_size=3)
+        assert list(result["results"]) == list(SCENARIOS)
+        requests = result["results"]["playlist_generator"]["requests"]
+        assert requests["openai"] == 1
+        assert requests["lastfm"] == 1
+        assert requests["spotify"] >= 3
+
+    def test_regressions_over_the_threshold_are_reported(self):
+        baseline = report(build_context=0.100, playlist_generator=0.100)
+        current = report(build_context=0.120, playlist_generator=0.200, new=1.0)
+        regressions = compare(current, baseline, threshold=0.25)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("playlist_generator")
+        assert compare(report(build_context=0.002), report(build_context=0.001)) == []
+
+    def test_run_fails_on_regression(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        arguments = ["--iterations", "1", "--warmup", "0", "--latency", "0"]
+        arguments += ["--scenario", "build_context", "--baseline", str(baseline)]
+        assert main(arguments) == 0
+        recorded = json.loads(baseline.read_text())
+        recorded["results"]["build_context"]["median"] = 0.0001
+        baseline.write_text(json.dumps(recorded))
+        assert main(arguments) == 1
+
+    def test_percentile(self):
+        assert percentile([3, 1, 2, 4], 0.5) == 2
+        assert percentile(range(1, 101), 0.95) == 95
+        assert percentile([], 0.5) is None
+
+    def test_load_reports_every_stage(self):
+        report = run_load(users=3, rounds=2, latency=0, payload_size=3)
+        assert report["throughput"]["sessions_per_second"] > 0
+        for result in report["stages"].values():
+            assert result["count"] == 6
+            assert result["errors"] == 0
+            assert result["p50"] <= result["p95"] <= result["p99"] <= result["max"]
+        assert report["requests"]["openai"] == 6
+        assert report["peak_rss_mb"] > 0
+
+
+class TestImportTime:
+    def test_parse_importtime(self):
+        output = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       120 |        120 |   json.decoder",
+                "import time:       300 |        420 | json",
+            ]
+        )
+        assert parse_importtime(output) == {
+            "json.decoder": (120, 120),
+            "json": (300, 420),
+        }
+
+    @pytest.mark.slow
+    def test_app_stays_in_budget_without_deferred_imports(self):
+        report = run_importtime(("app", "agent.auralis"), repeat=2)
+        assert all(not result["deferred_imported"] for result in report.values())
+        # Wall clock budgets only catch gross regressions on shared runners.
+        assert violations(report, slack=3.0) == []
+
+
+class TestModelBenchmark:
+    def test_compact_models_retain_less_memory(self):
+        results = run_model_benchmark(tracks=300, repeat=1)
+        assert set(results) == {"pydantic", "compact"}
+        assert (
+            results["compact"]["bytes_per_track"]
+            < results["pydantic"]["bytes_per_track"] / 2
+        )
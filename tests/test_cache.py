@@ -0,0 +1,117 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache import SWRCache
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+class TestSWRCache:
+    def test_fresh_entries_are_hits(self):
+        cache = SWRCache(ttls={"playlists": 60})
+        loader = Loader()
+        assert cache.get("playlists", "user", loader) == 1
+        assert cache.get("playlists", "user", loader) == 1
+        assert loader.calls == 1
+        assert cache.stats["playlists"]["hits"] == 1
+        assert cache.stats["playlists"]["misses"] == 1
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        cache = SWRCache(ttls={"playlists": 0.01})
+        loader = Loader()
+        cache.get("playlists", "user", loader)
+        time.sleep(0.02)
+        assert cache.get("playlists", "user", loader) == 1
+        for _ in range(100):
+            if cache.stats["playlists"]["refreshes"]:
+                break
+            time.sleep(0.01)
+        assert cache.get("playlists", "user", loader) == 2
+        assert cache.stats["playlists"]["stale_hits"] >= 1
+
+    def test_size_bound_evicts_least_recently_used(self):
+        cache = SWRCache(max_entries={"top_tracks": 2})
+        cache.put("top_tracks", "a", 1)
+        cache.put("top_tracks", "b", 2)
+        cache.get("top_tracks", "a", Loader())
+        cache.put("top_tracks", "c", 3)
+        loader = Loader()
+        assert cache.get("top_tracks", "b", loader) == 1
+        assert loader.calls == 1
+        assert cache.stats["top_tracks"]["evictions"] >= 1
+
+    def test_invalidate_forces_reload(self):
+        cache = SWRCache()
+        loader = Loader()
+        cache.get("playlists", "user", loader)
+        cache.invalidate("playlists", "user")
+        assert cache.get("playlists", "user", loader) == 2
+
+    def test_concurrent_misses_share_one_load(self):
+        cache = SWRCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(1)
+            return "playlists"
+
+        with ThreadPoolExecutor(2) as executor:
+            first = executor.submit(cache.get, "playlists", "user", slow_loader)
+            started.wait(1)
+            second = executor.submit(cache.get, "playlists", "user", Loader())
+            time.sleep(0.05)
+            release.set()
+            assert first.result() == second.result() == "playlists"
+        assert cache.stats["playlists"]["misses"] == 1
+        assert cache.stats["playlists"]["coalesced"] == 1
+
+    def test_refresh_racing_an_invalidation_is_not_stored(self):
+        cache = SWRCache(ttls={"playlists": 0.01})
+        cache.put("playlists", "user", "before the write")
+        time.sleep(0.02)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(1)
+            return "read before the write"
+
+        assert cache.get("playlists", "user", slow_loader) == "before the write"
+        started.wait(1)
+        cache.invalidate("playlists", "user")
+        release.set()
+        for _ in range(100):
+            if cache.stats["playlists"]["discarded"]:
+                break
+            time.sleep(0.01)
+        assert cache.stats["playlists"]["discarded"] == 1
+        assert cache.get("playlists", "user", Loader()) == 1
+
+    def test_load_racing_an_invalidate_matching_is_not_stored(self):
+        cache = SWRCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(1)
+            return "old"
+
+        with ThreadPoolExecutor(1) as executor:
+            load = executor.submit(cache.get, "playlists", ("user", 20), slow_loader)
+            started.wait(1)
+            cache.invalidate_matching("playlists", lambda key: key[0] == "user")
+            release.set()
+            assert load.result() == "old"
+        assert cache.peek("playlists", ("user", 20)) is None
@@ -0,0 +1,35 @@
+from tests.helpers import playlist, track
+from models.compact import CompactPlaylist, CompactSong
+from models.playlist import Playlist
+from models.song import Song
+
+
+class TestCompactModels:
+    def test_dumps_like_the_pydantic_models(self):
+        payload = {**track(1), "album": {"name": "Album"}, "popularity": 3}
+        assert CompactSong(**payload).model_dump() == Song(**payload).model_dump()
+        assert CompactSong(**payload).model_dump(exclude={"id", "uri"}) == (
+            Song(**payload).model_dump(exclude={"id", "uri"})
+        )
+        assert CompactPlaylist(**playlist(1)).model_dump(exclude={"uri"}) == (
+            Playlist(**playlist(1)).model_dump(exclude={"uri"})
+        )
+
+    def test_converts_to_the_validated_model(self):
+        song = CompactSong(**track(2))
+        assert song.to_model() == Song(**track(2))
+        assert song == CompactSong(**track(2)) != CompactSong(**track(3))
+        assert not hasattr(song, "__dict__")
+
+    def test_connector_builds_the_configured_models(
+        self, spotify_connector, fake_client
+    ):
+        spotify_connector.song_model = CompactSong
+        spotify_connector.playlist_model = CompactPlaylist
+        fake_client.playlists = [playlist(index) for index in range(3)]
+        songs = spotify_connector.recently_played(limit=5)
+        assert all(type(song) is CompactSong for song in songs)
+        assert songs[0].artists[0].name == "Artist 0"
+        playlists = spotify_connector.get_user_playlists()
+        assert all(type(item) is CompactPlaylist for item in playlists)
+        spotify_connector.add_songs_to_playlist("playlist1", songs)
@@ -0,0 +1,38 @@
+import time
+
+from agent.context_fetcher import ContextFetcher
+
+
+def slow(value, delay):
+    def source():
+        time.sleep(delay)
+        return value
+
+    return source
+
+
+def failing():
+    raise ConnectionError("source is down")
+
+
+class TestContextFetcher:
+    def test_sources_run_in_parallel(self):
+        fetcher = ContextFetcher(timeout=2.0)
+        started = time.monotonic()
+        results = fetcher.fetch({name: slow(name, 0.2) for name in "abcde"})
+        assert results == {name: name for name in "abcde"}
+        assert time.monotonic() - started < 0.6
+
+    def test_slow_source_returns_partial_context(self):
+        fetcher = ContextFetcher(timeout=2.0, timeouts={"weather": 0.1})
+        started = time.monotonic()
+        results = fetcher.fetch(
+            {"songs": slow(["song"], 0.05), "weather": slow("sunny", 1.0)}
+        )
+        assert results == {"songs": ["song"], "weather": None}
+        assert time.monotonic() - started < 0.5
+
+    def test_failing_source_is_dropped(self):
+        fetcher = ContextFetcher()
+        results = fetcher.fetch({"songs": slow(["song"], 0), "lastfm": failing})
+        assert results == {"songs": ["song"], "lastfm": None}
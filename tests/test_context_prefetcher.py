@@ -0,0 +1,71 @@
+import time
+
+from agent.auralis import Auralis
+from agent.context_prefetcher import ContextPrefetcher
+from src.cache import SWRCache
+from tests.helpers import FakeLastFm, playlist
+
+
+class FakeWeather:
+    def __init__(self):
+        self.cities = []
+
+    def encode_location(self, city):
+        return None
+
+    def get_current_location_weather(self, city):
+        self.cities.append(city)
+        return None
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestContextPrefetcher:
+    def test_click_after_prefetch_hits_the_cache(self, spotify_connector, fake_client):
+        fake_client.playlists = [playlist(index) for index in range(60)]
+        lastfm = FakeLastFm()
+        prefetcher = ContextPrefetcher(spotify_connector, lastfm).start()
+        try:
+            assert wait_for(lambda: prefetcher.warmups == 1)
+        finally:
+            prefetcher.close()
+        fetched = list(fake_client.calls)
+        assert "current_user_recently_played" in fetched
+        assert "current_user_top_tracks" in fetched
+        assert "current_user_playlists" in fetched
+        assert lastfm.calls == 1
+
+        auralis = Auralis(
+            spotify_connector, "key", lastfm, model="gpt-4o", response_cache=SWRCache()
+        )
+        context = auralis.build_context()
+        assert context["my_recently_played_songs"]
+        assert fake_client.calls == fetched
+        assert len(context["my_playlists"]) == 50
+
+    def test_configure_warms_the_weather_right_away(self, spotify_connector):
+        weather = FakeWeather()
+        prefetcher = ContextPrefetcher(
+            spotify_connector, FakeLastFm(), interval=60
+        ).start()
+        try:
+            assert wait_for(lambda: prefetcher.warmups == 1)
+            prefetcher.configure(weather, "Berlin")
+            assert wait_for(lambda: weather.cities == ["Berlin"])
+            prefetcher.configure(weather, "Berlin")
+            time.sleep(0.05)
+            assert weather.cities == ["Berlin"]
+        finally:
+            prefetcher.close()
+
+    def test_stops_when_the_session_is_idle(self, spotify_connector):
+        prefetcher = ContextPrefetcher(
+            spotify_connector, FakeLastFm(), interval=0.01, idle_timeout=0.05
+        ).start()
+        assert wait_for(lambda: not prefetcher.running)
+        assert prefetcher.warmups >= 1
@@ -0,0 +1,104 @@
+from agent.context_serializer import (
+    ContextSection,
+    ContextSerializer,
+    SectionCache,
+    estimate_tokens,
+)
+from agent.prompt_generator import PromptGenerator
+from src import tracing
+
+
+def songs(prefix, count):
+    return [{"name": f"{prefix} {i}", "artists": f"Artist {i}"} for i in range(count)]
+
+
+context = {
+    "time_of_day": "evening",
+    "season": "autumn",
+    "current_trending_songs_in_the_world": [
+        {"name": f"Hit {i}", "artist_name": f"Star {i}"} for i in range(10)
+    ],
+    "my_recently_played_songs": songs("Top", 2) + songs("Recent", 5),
+    "my_top_tracks": songs("Top", 3),
+    "my_playlists": [{"name": f"Playlist {i}"} for i in range(50)],
+    "my_current_weather": {"temperature": 12.5, "weather": {"forecast": "Rain"}},
+    "my_current_location": None,
+}
+
+
+class TestContextSerializer:
+    def test_lists_are_tabular_and_deduplicated(self):
+        text, tokens = ContextSerializer().serialize(context)
+        lines = text.splitlines()
+        assert "my_top_tracks (name | artists):" in lines
+        assert "Top 0 | Artist 0" in lines
+        assert lines.count("Top 0 | Artist 0") == 1
+        assert "Recent 4 | Artist 4" in lines
+        assert "my_current_weather: temperature=12.5, weather=Rain" in lines
+        assert "my_current_location" not in tokens
+        assert sum(tokens.values()) <= estimate_tokens(text) + len(tokens)
+
+    def test_least_relevant_items_are_dropped_first(self):
+        full, full_tokens = ContextSerializer().serialize(context)
+        budget = estimate_tokens(full) - full_tokens["my_playlists"] + 20
+        text, tokens = ContextSerializer(token_budget=budget).serialize(context)
+        assert sum(tokens.values()) <= budget
+        assert "Playlist 0" in text and "Playlist 49" not in text
+        assert (
+            tokens["my_recently_played_songs"]
+            == full_tokens["my_recently_played_songs"]
+        )
+        text, tokens = ContextSerializer(token_budget=40).serialize(context)
+        assert "my_playlists" not in tokens
+        assert "current_trending_songs_in_the_world" not in tokens
+        assert text.startswith("time_of_day: evening\nseason: autumn")
+
+    def test_prompt_generator_reports_token_usage_per_request(self):
+        generator = PromptGenerator(token_budget=100)
+        with tracing.span("playlist") as playlist:
+            messages = generator.build_playlist_messages("Rainy night", context)
+        with tracing.span("song") as song:
+            generator.build_suggest_song_messages(None)
+        assert "Rainy night" in messages[1]["content"]
+        assert 0 < sum(playlist.attributes["context_tokens"].values()) <= 100
+        assert song.attributes["context_tokens"] == {}
+        text, usage = generator.serialize_context(context)
+        assert usage == playlist.attributes["context_tokens"]
+        assert text in messages[1]["content"]
+
+
+class TestSectionCache:
+    def test_sections_are_rebuilt_only_when_their_source_changes(self):
+        cache = SectionCache()
+        source = songs("Top", 3)
+        builds = []
+
+        def build():
+            builds.append(1)
+            return list(source)
+
+        section = cache.get("my_top_tracks", source, build)
+        assert cache.get("my_top_tracks", source, build) is section
+        assert len(builds) == 1
+        source = songs("Top", 4)
+        assert len(cache.get("my_top_tracks", source, build)) == 4
+        assert len(builds) == 2
+
+    def test_serialized_lines_are_reused_and_identical(self):
+        sections = {
+            key: ContextSection(value) if isinstance(value, list) else value
+            for key, value in context.items()
+        }
+        budget = 60
+        expected = ContextSerializer(token_budget=budget).serialize(context)
+        serializer = ContextSerializer(token_budget=budget)
+        assert serializer.serialize(sections) == expected
+        playlists = sections["my_playlists"].lines
+        assert playlists[0] == "my_playlists"
+        # Fitting into the budget must not trim the cached lines.
+        assert len(playlists[1]) == 51
+        assert serializer.serialize(sections) == expected
+        assert sections["my_playlists"].lines is playlists
+        assert ContextSerializer().serialize(sections) == (
+            ContextSerializer().serialize(context)
+        )
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from agent.executor import AgentExecutor
+from agent.tool_essentials import ToolRegistry
+from tests.helpers import (
+    AsyncFakeCompletions,
+    FakeCompletions,
+    fake_openai,
+    response,
+    tool_call,
+)
+
+
+class FakeAuralis:
+    registry = ToolRegistry()
+
+    def __init__(self, responses):
+        self.openai = fake_openai(FakeCompletions(responses))
+        self.async_openai = fake_openai(AsyncFakeCompletions(responses))
+        self.played = []
+        self.saved = []
+        self.barrier = None
+
+    def wait(self):
+        if self.barrier is not None:
+            self.barrier.wait()
+
+    @registry.register()
+    def lookup(self, query: str) -> str:
+        self.wait()
+        return query.upper()
+
+    @registry.register(terminal=True, resource="playback")
+    def play(self, song: str) -> str:
+        if song == "offline":
+            raise ConnectionError("Spotify is offline")
+        self.wait()
+        self.played.append(song)
+        return song
+
+    @registry.register(terminal=True, resource="library")
+    def save(self, song: str) -> str:
+        self.wait()
+        self.saved.append(song)
+        return song
+
+    def call_function(self, tool_call):
+        name = tool_call.function.name
+        arguments = self.registry.validate(name, tool_call.function.arguments)
+        return getattr(self, name)(**arguments)
+
+    async def acall_function(self, tool_call):
+        return self.call_function(tool_call)
+
+
+request = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class TestAgentExecutor:
+    def test_runs_every_tool_call_and_feeds_results_back(self):
+        auralis = FakeAuralis(
+            [
+                response(
+                    tool_call("a", "lookup", query="x"),
+                    tool_call("b", "lookup", query="y"),
+                ),
+                response(tool_call("c", "play", song="X")),
+            ]
+        )
+        results = AgentExecutor(auralis).run(request)
+        assert results == ["X", "Y", "X"]
+        second = auralis.openai.chat.completions.requests[1]["messages"]
+        assert [m["role"] for m in second] == ["user", "assistant", "tool", "tool"]
+        assert second[2] == {"role": "tool", "tool_call_id": "a", "content": '"X"'}
+        assert request["messages"] == [{"role": "user", "content": "hi"}]
+
+    def test_invalid_arguments_are_reported_to_the_model(self):
+        auralis = FakeAuralis(
+            [
+                response(tool_call("a", "play", title="found")),
+                response(tool_call("b", "play", song="found")),
+            ]
+        )
+        executor = AgentExecutor(auralis)
+        results = executor.run(request)
+        assert results[0]["error"].startswith("play: missing arguments song")
+        assert results[1] == "found"
+        assert executor.first_result(results) == "found"
+        feedback = auralis.openai.chat.completions.requests[1]["messages"][-1]
+        assert json.loads(feedback["content"]) == results[0]
+
+    def test_tool_failures_are_raised_not_retried(self):
+        auralis = FakeAuralis(
+            [
+                response(tool_call("a", "play", song="offline")),
+                response(tool_call("b", "play", song="found")),
+            ]
+        )
+        with pytest.raises(ConnectionError):
+            AgentExecutor(auralis).run(request)
+        with pytest.raises(ConnectionError):
+            asyncio.run(AgentExecutor(auralis).arun(request))
+        assert len(auralis.openai.chat.completions.requests) == 1
+        assert len(auralis.async_openai.chat.completions.requests) == 1
+        assert auralis.played == []
+
+    def test_side_effects_run_in_order_and_stop_at_the_first_success(self):
+        auralis = FakeAuralis(
+            [
+                response(
+                    tool_call("a", "play", song="first"),
+                    tool_call("b", "play", song="second"),
+                )
+            ]
+        )
+        assert AgentExecutor(auralis).run(request) == ["first"]
+        assert auralis.played == ["first"]
+
+    def test_independent_calls_run_concurrently(self):
+        auralis = FakeAuralis(
+            [
+                response(
+                    tool_call("a", "lookup", query="x"),
+                    tool_call("b", "lookup", query="y"),
+                    tool_call("c", "play", song="first"),
+                    tool_call("d", "save", song="first"),
+                    tool_call("e", "play", song="second"),
+                )
+            ]
+        )
+        auralis.barrier = threading.Barrier(4, timeout=2)
+        assert AgentExecutor(auralis).run(request) == ["X", "Y", "first", "first"]
+        assert auralis.played == ["first"]
+        assert auralis.saved == ["first"]
+
+    def test_async_lanes_stop_at_their_first_success(self):
+        auralis = FakeAuralis(
+            [
+                response(
+                    tool_call("a", "play", song="first"),
+                    tool_call("b", "save", song="first"),
+                    tool_call("c", "play", song="second"),
+                )
+            ]
+        )
+        results = asyncio.run(AgentExecutor(auralis).arun(request))
+        assert results == ["first", "first"]
+        assert auralis.played == ["first"]
+
+    def test_override_tools_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def resolve(song):
+            barrier.wait()
+            return song.upper()
+
+        auralis = FakeAuralis(
+            [
+                response(
+                    tool_call("a", "play", song="x"), tool_call("b", "play", song="y")
+                )
+            ]
+        )
+        results = AgentExecutor(auralis).run(request, tools={"play": resolve})
+        assert results == ["X", "Y"]
+        assert auralis.played == []
+
+    def test_step_budget_stops_the_loop(self):
+        auralis = FakeAuralis(
+            [response(tool_call(str(i), "play", title="missing")) for i in range(5)]
+        )
+        results = AgentExecutor(auralis, max_steps=2).run(request)
+        assert len(results) == 2
+        assert len(auralis.openai.chat.completions.requests) == 2
+
+    def test_time_budget_is_passed_as_timeout(self):
+        auralis = FakeAuralis([response()])
+        assert AgentExecutor(auralis, time_budget=30).run(request) == []
+        timeout = auralis.openai.chat.completions.requests[0]["timeout"]
+        assert 0 < timeout <= 30
+
+    def test_async_loop(self):
+        auralis = FakeAuralis(
+            [
+                response(
+                    tool_call("a", "lookup", query="x"),
+                    tool_call("b", "lookup", query="y"),
+                ),
+                response(tool_call("c", "play", song="X")),
+            ]
+        )
+        results = asyncio.run(AgentExecutor(auralis).arun(request))
+        assert results == ["X", "Y", "X"]
@@ -0,0 +1,48 @@
+import gc
+import time
+
+from src.http_transport import HttpTransport, retry_delay, should_retry
+from tests.helpers import flaky
+
+
+class TestHttpTransport:
+    def test_should_retry(self):
+        assert should_retry("POST", 429)
+        assert should_retry("GET", 503)
+        assert not should_retry("POST", 503)
+        assert not should_retry("GET", 404)
+
+    def test_retry_delay_honors_retry_after(self):
+        assert retry_delay(0, "2") == 2
+        assert retry_delay(5, "120", backoff_max=30) == 30
+        assert 0 <= retry_delay(3, backoff_factor=0.1) <= 0.8
+
+    def test_rate_limited_request_is_retried(self, stub_server):
+        stub_server.route("GET", "/chart", flaky([429, 429, 200]))
+        transport = HttpTransport(backoff_factor=0.01)
+        started = time.monotonic()
+        response = transport.get(f"{stub_server.url}/chart")
+        assert response.status_code == 200
+        assert stub_server.requests["GET /chart"] == 3
+        assert time.monotonic() - started < 1
+
+    def test_exhausted_retries_return_the_last_response(self, stub_server):
+        stub_server.route("GET", "/chart", {"error": "busy"}, status=503)
+        transport = HttpTransport(retries=2, backoff_factor=0.01)
+        assert transport.get(f"{stub_server.url}/chart").status_code == 503
+        assert stub_server.requests["GET /chart"] == 3
+
+    def test_dropped_spotify_client_leaves_the_pools_open(self, stub_server):
+        import spotipy
+
+        stub_server.route("GET", "/chart", {"ok": True})
+        transport = HttpTransport()
+        transport.get(f"{stub_server.url}/chart")
+        adapter = transport.session.get_adapter(stub_server.url)
+        assert len(adapter.poolmanager.pools) == 1
+        client = spotipy.Spotify(auth="token", requests_session=transport.session)
+        del client
+        gc.collect()
+        assert len(adapter.poolmanager.pools) == 1
+        transport.close()
+        assert len(adapter.poolmanager.pools) == 0
@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from models.artist import Artist
+from src import json_codec
+
+
+class TestJsonCodec:
+    def test_matches_the_standard_library(self):
+        value = {"song": "Café", "scores": (1, 2.5), "nested": {"ok": True}, 3: None}
+        text = json_codec.dumps(value)
+        assert json.loads(text) == {
+            "song": "Café",
+            "scores": [1, 2.5],
+            "nested": {"ok": True},
+            "3": None,
+        }
+        assert " " not in text.replace("Café", "")
+        assert json_codec.loads(text) == json.loads(text)
+
+    def test_unknown_objects_use_default(self):
+        artist = Artist(name="Artist", uri="spotify:artist:1")
+        assert json_codec.loads(json_codec.dumps({"artist": artist})) == {
+            "artist": str(artist)
+        }
+
+    def test_invalid_json_raises_value_error(self):
+        with pytest.raises(ValueError):
+            json_codec.loads("{not json")
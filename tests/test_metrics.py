@@ -0,0 +1,82 @@
+import json
+
+import httpx
+
+from src.http_transport import HttpTransport, metrics_event_hooks
+from src.metrics import MetricsRegistry, endpoint_for
+from tests.helpers import flaky
+
+
+class TestMetrics:
+    def test_endpoint_for(self):
+        assert endpoint_for("https://api.spotify.com/v1/search?q=x") == "spotify.search"
+        assert (
+            endpoint_for("https://api.spotify.com/v1/playlists/abc/tracks?offset=100")
+            == "spotify.playlist_items"
+        )
+        assert endpoint_for("https://api.spotify.com/v1/me/player/devices") == (
+            "spotify.player"
+        )
+        assert endpoint_for("https://api.spotify.com/v1/me") == "spotify.me"
+        assert endpoint_for("http://127.0.0.1:8000/2.0/?method=chart") == (
+            "lastfm.chart"
+        )
+        assert (
+            endpoint_for("https://api.openweathermap.org/data/3.0/onecall/timemachine")
+            == "openweather.timemachine"
+        )
+        assert endpoint_for("https://api.openai.com/v1/chat/completions") == (
+            "llm.completions"
+        )
+        assert endpoint_for("https://api.ipify.org") == "api.ipify.org"
+
+    def test_transport_records_calls_retries_and_rate_limits(self, stub_server):
+        stub_server.route("GET", "/v1/search", flaky([429, 200]))
+        stub_server.route("GET", "/2.0/", {"error": "down"}, status=404)
+        registry = MetricsRegistry()
+        transport = HttpTransport(backoff_factor=0.01, metrics_registry=registry)
+        transport.get(f"{stub_server.url}/v1/search")
+        transport.get(f"{stub_server.url}/2.0/")
+
+        search = registry.snapshot()["spotify.search"]
+        assert search["requests"] == 1
+        assert search["retries"] == 1
+        assert search["rate_limited"] == 1
+        assert search["errors"] == 0
+        assert search["response_bytes"] == len(json.dumps({"ok": True}))
+        assert search["latency_seconds"]["buckets"]["+Inf"] == 1
+        chart = registry.snapshot()["lastfm.chart"]
+        assert chart["errors"] == 1
+        assert chart["statuses"] == {"404": 1}
+
+    def test_event_hooks_record_sdk_calls(self):
+        registry = MetricsRegistry()
+        client = httpx.Client(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b'{"id": "cmpl"}')
+            ),
+            event_hooks=metrics_event_hooks(registry),
+        )
+        client.post("https://api.openai.com/v1/chat/completions", json={})
+        completions = registry.snapshot()["llm.completions"]
+        assert completions["requests"] == 1
+        assert completions["response_bytes"] == 14
+
+    def test_prometheus_dump(self):
+        registry = MetricsRegistry()
+        registry.observe("spotify.search", 0.03, 200, 512)
+        registry.observe("spotify.search", 0.2, 429, 10)
+        text = registry.to_prometheus()
+        assert "# TYPE auralis_http_request_duration_seconds histogram" in text
+        assert (
+            'auralis_http_requests_total{endpoint="spotify.search",status="429"} 1'
+            in text
+        )
+        assert 'auralis_http_rate_limited_total{endpoint="spotify.search"} 1' in text
+        assert (
+            'auralis_http_request_duration_seconds_bucket{endpoint="spotify.search",'
+            'le="0.05"} 1' in text
+        )
+        assert (
+            'auralis_http_response_bytes_total{endpoint="spotify.search"} 522' in text
+        )
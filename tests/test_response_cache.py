@@ -0,0 +1,137 @@
+import json
+
+from agent.auralis import Auralis
+from agent.context_serializer import context_fingerprint
+from src.cache import SWRCache
+from src.spotify_api_connector import SpotifyApiConnector
+from src.track_resolver import TrackResolver
+from tests.helpers import (
+    FakeCompletions,
+    FakeLastFm,
+    FakeSpotifyClient,
+    fake_openai,
+    response,
+    tool_call,
+)
+
+
+def answering(name, arguments):
+    return FakeCompletions(lambda index: response(tool_call("call", name, **arguments)))
+
+
+def auralis_with(spotify_connector, completions, **kwargs):
+    auralis = Auralis(
+        spotify_connector,
+        "key",
+        FakeLastFm(),
+        model="gpt-4o",
+        response_cache=SWRCache(),
+        **kwargs,
+    )
+    auralis.openai = fake_openai(completions)
+    return auralis
+
+
+class TestResponseCache:
+    def test_playlist_replay_skips_the_model(self, spotify_connector, fake_client):
+        completions = answering(
+            "generate_playlist",
+            {"playlist_name": "Rain", "songs": ["Song 1"], "reason": "Because"},
+        )
+        auralis = auralis_with(spotify_connector, completions)
+        first = auralis.playlist_generator("Rainy night")
+        second = auralis.playlist_generator("Rainy night")
+        assert first == second == ("Rain", ["Song 1"], "Because")
+        assert len(completions.requests) == 1
+        assert fake_client.calls.count("playlist_add_items") == 2
+        auralis.playlist_generator("Sunny day")
+        assert len(completions.requests) == 2
+
+    def test_playlist_replay_survives_the_created_playlist(
+        self, spotify_connector, fake_client
+    ):
+        create_playlist = fake_client.user_playlist_create
+
+        def create_and_list(user, name):
+            created = create_playlist(user, name)
+            fake_client.playlists.append(created)
+            return created
+
+        fake_client.user_playlist_create = create_and_list
+        completions = answering(
+            "generate_playlist",
+            {"playlist_name": "Rain", "songs": ["Song 1"], "reason": "Because"},
+        )
+        auralis = auralis_with(spotify_connector, completions)
+        auralis.playlist_generator("Rainy night")
+        assert [item["name"] for item in auralis.build_context()["my_playlists"]] == [
+            "Rain"
+        ]
+        auralis.playlist_generator("Rainy night")
+        assert len(completions.requests) == 1
+        assert auralis.response_cache.stats["playlist"]["hits"] == 1
+
+    def test_song_suggestions_are_cached_only_when_enabled(self, spotify_connector):
+        arguments = {"song_title": "Song", "artist_name": "Artist", "reason": "Why"}
+        completions = answering("suggest_song", arguments)
+        auralis = auralis_with(spotify_connector, completions)
+        auralis.song_of_the_moment_suggestion()
+        auralis.song_of_the_moment_suggestion()
+        assert len(completions.requests) == 2
+        auralis = auralis_with(
+            spotify_connector, completions, cached_features={"song", "playlist"}
+        )
+        auralis.song_of_the_moment_suggestion()
+        auralis.song_of_the_moment_suggestion()
+        assert len(completions.requests) == 3
+
+    def test_replays_are_not_shared_between_users(self, spotify_connector, track_cache):
+        bob_client = FakeSpotifyClient()
+        bob_client.me = lambda: {"id": "bob", "display_name": "Bob"}
+        bob = SpotifyApiConnector("client_id", "client_secret", cache=SWRCache())
+        bob.client = bob_client
+        bob.track_resolver = TrackResolver(bob, cache=track_cache)
+        completions = answering(
+            "generate_playlist",
+            {"playlist_name": "Mix", "songs": ["Song 1"], "reason": "History"},
+        )
+        alice_auralis = auralis_with(spotify_connector, completions)
+        bob_auralis = auralis_with(bob, completions)
+        bob_auralis.response_cache = alice_auralis.response_cache
+        alice_auralis.playlist_generator("workout")
+        bob_auralis.playlist_generator("workout")
+        assert len(completions.requests) == 2
+        assert alice_auralis.response_cache.stats["playlist"]["hits"] == 0
+
+    def test_failed_replay_is_dropped(self, spotify_connector):
+        arguments = {"song_title": "unknown", "artist_name": "", "reason": "Why"}
+        completions = answering("suggest_song", arguments)
+        auralis = auralis_with(spotify_connector, completions, max_steps=1)
+        auralis.response_cache.put(
+            "playlist",
+            ("gpt-4o", "user", "Rain", context_fingerprint(auralis.build_context())),
+            [("suggest_song", json.dumps(arguments))],
+        )
+        assert auralis.playlist_generator("Rain") is None
+        assert len(completions.requests) == 0
+        assert auralis.response_cache.stats["playlist"]["hits"] == 1
+        auralis.playlist_generator("Rain")
+        assert len(completions.requests) == 1
+
+    def test_fingerprint_ignores_insignificant_weather_changes(self):
+        def context(temperature, forecast):
+            return {
+                "time_of_day": "night",
+                "my_current_weather": {
+                    "temperature": temperature,
+                    "humidity": int(temperature * 3),
+                    "weather": {"forecast": forecast, "description": "light"},
+                },
+            }
+
+        assert context_fingerprint(context(12.2, "Rain")) == context_fingerprint(
+            context(11.8, "Rain")
+        )
+        assert context_fingerprint(context(12.2, "Rain")) != context_fingerprint(
+            context(12.2, "Clear")
+        )
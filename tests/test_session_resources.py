@@ -0,0 +1,41 @@
+from src.session_resources import SessionResources
+
+
+class Factory:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return object()
+
+
+class TestSessionResources:
+    def test_resources_survive_reruns(self):
+        state = {}
+        factory = Factory()
+        first = SessionResources(state).get("spotify", factory)
+        second = SessionResources(state).get("spotify", factory)
+        assert first is second
+        assert factory.calls == 1
+
+    def test_changed_key_rebuilds_the_resource(self):
+        resources = SessionResources({})
+        factory = Factory()
+        agent = resources.get("auralis", factory, key="key-1")
+        assert resources.get("auralis", factory, key="key-1") is agent
+        assert resources.get("auralis", factory, key="key-2") is not agent
+        assert factory.calls == 2
+
+    def test_invalidate(self):
+        resources = SessionResources({})
+        factory = Factory()
+        resources.get("user", factory)
+        resources.get("auralis", factory)
+        resources.invalidate("auralis")
+        assert "auralis" not in resources
+        assert resources.peek("user") is not None
+        resources.invalidate()
+        assert "user" not in resources
+        resources.get("user", factory)
+        assert factory.calls == 3
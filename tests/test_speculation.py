@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from agent.auralis import Auralis
+from agent.context_serializer import context_fingerprint
+from agent.speculation import SongSuggestion
+from src.cache import SWRCache
+from tests.helpers import (
+    FakeCompletions,
+    FakeLastFm,
+    fake_openai,
+    response,
+    tool_call,
+)
+
+
+def suggest_next_song(index):
+    """
+    Answers every request with a suggest_song call for the next song.
+    """
+    return response(
+        tool_call(
+            f"call-{index}",
+            "suggest_song",
+            song_title=f"Song {index}",
+            artist_name=f"Artist {index}",
+            reason="fits",
+        )
+    )
+
+
+def build_auralis(spotify_connector):
+    auralis = Auralis(
+        spotify_connector,
+        "key",
+        FakeLastFm(),
+        model="gpt-4o",
+        response_cache=SWRCache(),
+    )
+    completions = FakeCompletions(suggest_next_song)
+    auralis.openai = fake_openai(completions)
+    return auralis, completions
+
+
+class TestSongSpeculation:
+    def test_next_click_serves_the_speculation(self, spotify_connector, fake_client):
+        auralis, completions = build_auralis(spotify_connector)
+        first = auralis.song_of_the_moment_suggestion(speculate=True)
+        assert first == ("Song 1", "Artist 1", "fits")
+        auralis.speculator._pending.result(timeout=5)
+
+        second = auralis.song_of_the_moment_suggestion(speculate=True)
+        assert second == ("Song 2", "Artist 2", "fits")
+        assert auralis.speculator.hits == 1
+        # Only the served songs were played, speculations are just resolved.
+        assert [uri for _, uri in fake_client.queue] == [
+            "spotify:track:1",
+            "spotify:track:2",
+        ]
+        speculative_prompt = completions.requests[1]["messages"][-1]["content"]
+        assert "Do not suggest these songs, I just heard them: Song 1 by Artist 1" in (
+            speculative_prompt
+        )
+        auralis.close()
+
+    def test_speculation_is_discarded_when_the_mood_changed(self, spotify_connector):
+        auralis, _ = build_auralis(spotify_connector)
+        speculator = auralis.speculator
+        morning = {"time_of_day": "morning", "my_recently_played_songs": ["a"]}
+        pending = Future()
+        pending.set_result(
+            SongSuggestion(
+                "Song", "Artist", "fits", "uri", context_fingerprint(morning)
+            )
+        )
+        speculator._pending = pending
+        assert speculator.take({"time_of_day": "evening"}) is None
+        assert speculator.discarded == 1
+        assert speculator.take(morning) is None
+
+        pending = Future()
+        pending.set_result(
+            SongSuggestion(
+                "Song", "Artist", "fits", "uri", context_fingerprint(morning)
+            )
+        )
+        speculator._pending = pending
+        replayed = {**morning, "my_recently_played_songs": ["a", "Song"]}
+        assert speculator.take(replayed).uri == "uri"
+        auralis.close()
+
+    def test_unknown_song_is_sent_back_to_the_model(self, spotify_connector):
+        auralis, completions = build_auralis(spotify_connector)
+        unknown = response(
+            tool_call(
+                "call-1",
+                "suggest_song",
+                song_title="unknown",
+                artist_name="",
+                reason="",
+            )
+        )
+        completions.responses = lambda index: (
+            unknown if index == 1 else suggest_next_song(index)
+        )
+        suggestion = auralis.speculator._speculate([], None, None)
+        assert suggestion.as_result() == ("Song 2", "Artist 2", "fits")
+        feedback = completions.requests[1]["messages"][-1]
+        assert "no Spotify track found for unknown" in feedback["content"]
+        auralis.close()
+
+    def test_click_does_not_wait_for_a_running_speculation(self, spotify_connector):
+        auralis, _ = build_auralis(spotify_connector)
+        speculator = auralis.speculator
+        speculator._pending = Future()
+        speculator._pending.set_running_or_notify_cancel()
+        start = time.monotonic()
+        assert speculator.take({"time_of_day": "morning"}) is None
+        assert time.monotonic() - start < 0.1
+        assert speculator.discarded == 1
+        assert speculator._pending is None
+        auralis.close()
+
+
+def worker_threads():
+    prefixes = ("auralis-tools", "auralis-context", "auralis-speculate")
+    prefixes += ("auralis-search",)
+    return [t for t in threading.enumerate() if t.name.startswith(prefixes)]
+
+
+class TestAuralisClose:
+    def test_close_stops_every_worker_thread(self, spotify_connector):
+        before = set(worker_threads())
+        auralis, _ = build_auralis(spotify_connector)
+        auralis.song_of_the_moment_suggestion(speculate=True)
+        spotify_connector.track_resolver.resolve(["Song 1", "Song 2"])
+        assert set(worker_threads()) - before
+        auralis.close()
+        spotify_connector.close()
+        for thread in set(worker_threads()) - before:
+            thread.join(5)
+        assert not set(worker_threads()) - before
@@ -0,0 +1,58 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from tests.helpers import playlist
+
+
+class TestSpotifyCollections:
+    def test_iterators_follow_every_page(self, spotify_connector, fake_client):
+        fake_client.playlists = [playlist(index) for index in range(120)]
+        playlists = spotify_connector.get_user_playlists()
+        assert len(playlists) == 120
+        assert fake_client.calls.count("next") == 2
+
+    def test_iterators_stop_when_caller_has_enough(
+        self, spotify_connector, fake_client
+    ):
+        fake_client.page_size = 10
+        songs = list(islice(spotify_connector.iter_recently_played(), 15))
+        assert len(songs) == 15
+        assert fake_client.calls.count("next") == 1
+
+    def test_limit_only_requests_what_is_needed(self, spotify_connector, fake_client):
+        assert len(spotify_connector.recently_played(limit=20)) == 20
+        assert len(spotify_connector.users_top_tracks(limit=13)) == 13
+        assert "next" not in fake_client.calls
+
+    def test_writes_invalidate_every_playlist_listing(
+        self, spotify_connector, fake_client
+    ):
+        spotify_connector.get_user_playlists(limit=20)
+        spotify_connector.get_user_playlists()
+        spotify_connector.create_playlist("New")
+        calls = fake_client.calls.count("current_user_playlists")
+        spotify_connector.get_user_playlists(limit=20)
+        spotify_connector.get_user_playlists()
+        assert fake_client.calls.count("current_user_playlists") == calls + 2
+
+    def test_concurrent_sources_fetch_the_user_once(
+        self, spotify_connector, fake_client
+    ):
+        me = fake_client.me
+        started = threading.Barrier(4, timeout=2)
+
+        def slow_me():
+            time.sleep(0.05)
+            return me()
+
+        def user_id():
+            started.wait()
+            return spotify_connector.user_id
+
+        fake_client.me = slow_me
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            ids = list(executor.map(lambda _: user_id(), range(4)))
+        assert ids == ["user"] * 4
+        assert fake_client.calls.count("me") == 1
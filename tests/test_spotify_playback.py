@@ -0,0 +1,28 @@
+class TestPlaybackState:
+    def test_queue_on_the_playing_device_with_one_request(
+        self, spotify_connector, fake_client
+    ):
+        spotify_connector.play_or_queue("spotify:track:1")
+        assert fake_client.queue == [("phone", "spotify:track:1")]
+        assert fake_client.calls == ["current_playback", "add_to_queue"]
+
+    def test_play_on_preferred_device_when_idle(self, spotify_connector, fake_client):
+        fake_client.playback = None
+        spotify_connector.play_or_queue("spotify:track:1")
+        spotify_connector.play_or_queue("spotify:track:2")
+        assert fake_client.playing == [
+            ("phone", "spotify:track:1"),
+            ("phone", "spotify:track:2"),
+        ]
+        assert fake_client.calls.count("devices") == 1
+
+    def test_generated_playlist_plays_on_active_device(
+        self, spotify_connector, fake_client
+    ):
+        fake_client.playback = {
+            "is_playing": False,
+            "device": fake_client.device_list[1],
+        }
+        spotify_connector.generate_playlist_from_auralis("Test", ["Song 1"])
+        assert fake_client.playing == [("tv", "spotify:playlist:new")]
+        assert "devices" not in fake_client.calls
@@ -0,0 +1,66 @@
+import threading
+import time
+
+from tests.helpers import playlist, track
+from models.song import Song
+
+
+class TestPlaylistPopulation:
+    def test_add_songs_dedups_against_every_page(self, spotify_connector, fake_client):
+        fake_client.playlist_tracks = [track(index) for index in range(250)]
+        songs = [Song(**track(index)) for index in range(240, 300)]
+        spotify_connector.add_songs_to_playlist("playlist", songs + songs[:5])
+        assert fake_client.calls.count("playlist_add_items") == 1
+        uris = [item["uri"] for item in fake_client.playlist_tracks]
+        assert len(uris) == len(set(uris)) == 300
+
+    def test_generated_playlist_is_written_in_chunks(
+        self, spotify_connector, fake_client
+    ):
+        songs = [f"Song {index}" for index in range(150)]
+        spotify_connector.generate_playlist_from_auralis("Test", songs)
+        assert fake_client.calls.count("playlist_add_items") == 2
+        assert "playlist_items" not in fake_client.calls
+
+    def test_get_playlist_uses_name_index(self, spotify_connector, fake_client):
+        fake_client.playlists = [playlist(index) for index in range(120)]
+        assert spotify_connector.get_playlist("Playlist 110").id == "playlist110"
+        fake_client.calls.clear()
+        assert spotify_connector.get_playlist("Playlist 5").id == "playlist5"
+        assert fake_client.calls == []
+
+    def test_missing_playlist_is_created_once(self, spotify_connector, fake_client):
+        created = spotify_connector.get_playlist("Today's Top Hits")
+        fake_client.calls.clear()
+        assert spotify_connector.get_playlist("Today's Top Hits") == created
+        assert fake_client.calls == []
+
+    def test_index_rebuild_racing_a_create_keeps_the_new_playlist(
+        self, spotify_connector, fake_client
+    ):
+        fake_client.playlists = [playlist(index) for index in range(3)]
+        cache = spotify_connector.cache
+        spotify_connector.get_playlist_index()
+        started = threading.Event()
+        release = threading.Event()
+        list_playlists = fake_client.current_user_playlists
+
+        def slow_list(limit=50):
+            started.set()
+            release.wait(1)
+            return list_playlists(limit=limit)
+
+        fake_client.current_user_playlists = slow_list
+        cache.ttls["playlist_index"] = 0
+        spotify_connector.get_playlist_index()
+        started.wait(1)
+        spotify_connector.create_playlist("New")
+        release.set()
+        for _ in range(100):
+            if cache.stats["playlist_index"]["discarded"]:
+                break
+            time.sleep(0.01)
+        cache.ttls["playlist_index"] = 60
+        fake_client.calls.clear()
+        assert spotify_connector.get_playlist("New").id == "new"
+        assert "user_playlist_create" not in fake_client.calls
@@ -0,0 +1,63 @@
+import json
+from types import SimpleNamespace
+
+from agent.auralis import Auralis
+from agent.stream_parser import SongStreamParser
+from tests.helpers import FakeLastFm
+
+arguments = json.dumps(
+    {
+        "playlist_name": "Rainy [night]",
+        "songs": ["Song 1", 'Song "2"', "Song 3"],
+        "reason": "Because",
+    }
+)
+
+
+def chunks(text, size):
+    return [text[start : start + size] for start in range(0, len(text), size)]
+
+
+class StreamingCompletions:
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.pending_during_stream = 0
+
+    def create(self, stream=False, **kwargs):
+        assert stream
+        yield SimpleNamespace(choices=[])
+        for index, part in enumerate(chunks(arguments, 7)):
+            function = SimpleNamespace(
+                name="generate_playlist" if index == 0 else None, arguments=part
+            )
+            delta = SimpleNamespace(
+                tool_calls=[SimpleNamespace(index=0, id="call", function=function)]
+            )
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            self.pending_during_stream = max(
+                self.pending_during_stream, len(self.resolver._pending)
+            )
+
+
+class TestSongStreamParser:
+    def test_entries_are_emitted_as_soon_as_they_complete(self):
+        for size in (1, 3, 16, len(arguments)):
+            parser = SongStreamParser()
+            entries = [
+                entry for part in chunks(arguments, size) for entry in parser.feed(part)
+            ]
+            assert entries == ["Song 1", 'Song "2"', "Song 3"]
+            assert parser.done
+
+    def test_streamed_playlist_resolves_songs_during_generation(
+        self, spotify_connector, fake_client
+    ):
+        auralis = Auralis(spotify_connector, "key", FakeLastFm(), model="gpt-4o")
+        completions = StreamingCompletions(spotify_connector.track_resolver)
+        auralis.openai = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        name, songs, reason = auralis.playlist_generator("Rain", stream=True)
+        assert name == "Rainy [night]"
+        assert songs == ["Song 1", 'Song "2"', "Song 3"]
+        assert completions.pending_during_stream > 0
+        assert fake_client.calls.count("search") == 3
+        assert fake_client.calls.count("playlist_add_items") == 1
@@ -1,4 +1,10 @@
-from agent.tool_essentials import ToolRegistry
+import json
+from typing import List, Literal, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from agent.tool_essentials import ToolArgumentError, ToolRegistry
 
 
 class TestToolEssentials:
@@ -30,3 +36,116 @@ class TestToolEssentials:
             return f"Hello {name}"
 
         assert registry.tools["add"]["description"] == "Adds two numbers"
+
+    def test_openai_tools_are_built_once(self):
+        registry = ToolRegistry()
+
+        @registry.register(description="Says hello")
+        def hello(name: str) -> str:
+            return f"Hello {name}"
+
+        assert registry.to_openai_tools() is registry.to_openai_tools()
+        assert registry.to_openai_tools()[0]["function"]["name"] == "hello"
+
+        @registry.register(description="Says bye")
+        def bye(name: str) -> str:
+            return f"Bye {name}"
+
+        assert [tool["function"]["name"] for tool in registry.to_openai_tools()] == [
+            "hello",
+            "bye",
+        ]
+
+    def test_optional_literal_and_model_parameters(self):
+        registry = ToolRegistry()
+
+        class Mood(BaseModel):
+            energy: float
+            tags: List[str] = []
+
+        @registry.register(description="Plays music")
+        def play(
+            mood: Mood,
+            mode: Literal["song", "playlist"],
+            count: Optional[int] = None,
+            volume: int | None = 50,
+        ) -> str:
+            return mode
+
+        properties = registry.tools["play"]["parameters"]["properties"]
+        assert properties["mode"] == {"enum": ["song", "playlist"], "type": "string"}
+        assert properties["count"] == {"type": "integer"}
+        assert properties["volume"] == {"type": "integer"}
+        assert properties["mood"]["properties"]["energy"]["type"] == "number"
+        assert registry.tools["play"]["parameters"]["required"] == ["mood", "mode"]
+
+        arguments = registry.validate(
+            "play", '{"mood": {"energy": "0.5"}, "mode": "song", "count": "3"}'
+        )
+        assert arguments["mood"] == Mood(energy=0.5)
+        assert arguments["count"] == 3
+        assert (
+            registry.validate(
+                "play", {"mood": {"energy": 1}, "mode": "playlist", "volume": None}
+            )["volume"]
+            is None
+        )
+
+    def test_nested_model_refs_resolve_against_the_parameters(self):
+        registry = ToolRegistry()
+
+        class Track(BaseModel):
+            title: str
+
+        class Queue(BaseModel):
+            tracks: List[Track]
+
+        @registry.register(description="Queues tracks")
+        def queue(queue: Queue, later: Optional[List[Queue]] = None) -> str:
+            return "queued"
+
+        parameters = registry.tools["queue"]["parameters"]
+        assert set(parameters["$defs"]) == {"Track"}
+        refs = []
+
+        def collect(node):
+            if isinstance(node, dict):
+                refs.extend(v for k, v in node.items() if k == "$ref")
+                for value in node.values():
+                    collect(value)
+            elif isinstance(node, list):
+                for value in node:
+                    collect(value)
+
+        for schema in parameters["properties"].values():
+            assert '"$defs":' not in json.dumps(schema)
+            collect(schema)
+        assert refs == ["#/$defs/Track", "#/$defs/Track"]
+        for ref in refs:
+            resolved = parameters
+            for part in ref.lstrip("#/").split("/"):
+                resolved = resolved[part]
+            assert resolved["properties"]["title"]["type"] == "string"
+
+    def test_invalid_arguments_are_rejected(self):
+        registry = ToolRegistry()
+        calls = []
+
+        @registry.register(description="Builds a playlist")
+        def playlist(name: str, songs: List[str]) -> str:
+            calls.append(name)
+            return name
+
+        for arguments, message in [
+            ('{"name": "x", "songs": ', "not valid JSON"),
+            ("[]", "must be an object"),
+            ('{"name": "x"}', "missing arguments songs"),
+            ('{"name": "x", "songs": [], "reason": ""}', "unknown arguments reason"),
+            ('{"name": "x", "songs": "a, b"}', "playlist.songs: expected an array"),
+            ('{"name": "x", "songs": [null]}', "expected a string"),
+        ]:
+            with pytest.raises(ToolArgumentError, match=message):
+                registry.validate("playlist", arguments)
+        with pytest.raises(ToolArgumentError, match="unknown tool"):
+            registry.validate("missing", "{}")
+        assert calls == []
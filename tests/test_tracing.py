@@ -0,0 +1,96 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from agent.auralis import Auralis
+from src import tracing
+from src.cache import SWRCache
+from src.tracing import JsonLinesExporter, Tracer, format_waterfall, waterfall
+from tests.helpers import (
+    FakeCompletions,
+    FakeLastFm,
+    fake_openai,
+    response,
+    tool_call,
+)
+
+
+def playlist_response(index):
+    return response(
+        tool_call(
+            "call",
+            "generate_playlist",
+            playlist_name="Rain",
+            songs=["Song 1"],
+            reason="x",
+        ),
+        usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30),
+    )
+
+
+class TestTracing:
+    def test_spans_nest_across_threads_and_export_json_lines(self, tmp_path):
+        path = tmp_path / "spans.jsonl"
+        tracer = Tracer(exporters=[JsonLinesExporter(str(path))])
+        with tracer.span("request", user="u") as root:
+            with tracer.span("child") as child:
+                child.set(items=2)
+            with ThreadPoolExecutor(2) as executor:
+
+                def work(index):
+                    with tracer.span("worker", index=index):
+                        pass
+
+                list(executor.map(tracing.bind(work), range(2)))
+        spans = [json.loads(line) for line in path.read_text().splitlines()]
+        assert {span["name"] for span in spans} == {"request", "child", "worker"}
+        parents = {span["name"]: span["parent_id"] for span in spans}
+        assert parents["request"] is None
+        assert parents["worker"] == root.span_id
+        assert next(s for s in spans if s["name"] == "child")["attributes"] == {
+            "items": 2
+        }
+        assert len({span["trace_id"] for span in spans}) == 1
+        assert tracer.recent[-1] is root.trace
+
+    def test_errors_are_recorded(self):
+        tracer = Tracer()
+        with pytest.raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError("boom")
+        assert tracer.recent[-1].root.attributes == {"error": "ValueError: boom"}
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span("ignored") as span:
+            span.set(value=1)
+        assert len(tracer.recent) == 0
+
+    def test_waterfall_of_a_playlist_request(self, spotify_connector):
+        auralis = Auralis(
+            spotify_connector,
+            "key",
+            FakeLastFm(),
+            model="gpt-4o",
+            response_cache=SWRCache(),
+        )
+        auralis.openai = fake_openai(FakeCompletions(playlist_response))
+        with tracing.span("app.generate_playlist") as root:
+            auralis.playlist_generator("Rainy night")
+        rows = waterfall(root.trace)
+        names = [row["span"].strip() for row in rows]
+        assert names[:3] == [
+            "app.generate_playlist",
+            "auralis.playlist_generator",
+            "build_context",
+        ]
+        assert "build_context.top_songs" in names
+        assert "spotify.search" in names
+        assert "spotify.playlist_add" in names
+        llm = next(row for row in rows if row["span"].strip() == "llm.completion")
+        assert llm["attributes"]["prompt_tokens"] == 120
+        assert llm["span"] == "    llm.completion"
+        text = format_waterfall(root.trace)
+        assert text.splitlines()[0].startswith("app.generate_playlist")
@@ -0,0 +1,47 @@
+from tests.helpers import track
+from models.compact import CompactArtist, CompactSong
+from models.song import Song
+from src.track_resolver import TrackCache, normalize_query
+
+
+class TestTrackResolver:
+    def test_normalize_query(self):
+        assert (
+            normalize_query("  Demons -  Imagine DRAGONS!") == "demons imagine dragons"
+        )
+
+    def test_unresolvable_songs_are_skipped(self, spotify_connector):
+        songs = spotify_connector.track_resolver.resolve(
+            ["Song 1", "unknown song", "Song 2"]
+        )
+        assert [song.uri for song in songs] == ["spotify:track:1", "spotify:track:2"]
+
+    def test_cached_queries_need_no_search(self, spotify_connector, fake_client):
+        resolver = spotify_connector.track_resolver
+        resolver.resolve(["Song 1", "Song 2"])
+        fake_client.calls.clear()
+        songs = resolver.resolve(["song 1", "SONG 2!"])
+        assert [song.name for song in songs] == ["Song 1", "Song 2"]
+        assert songs[0].artists[0].name == "Artist 1"
+        assert fake_client.calls == []
+
+    def test_cached_songs_use_the_connector_song_model(
+        self, spotify_connector, fake_client
+    ):
+        spotify_connector.song_model = CompactSong
+        resolver = spotify_connector.track_resolver
+        searched = resolver.resolve(["Song 1"])
+        fake_client.calls.clear()
+        cached = resolver.resolve(["Song 1"]) + [resolver.resolve_one("Song 1")]
+        assert fake_client.calls == []
+        assert cached == searched * 2
+        assert all(type(song) is CompactSong for song in searched + cached)
+        assert type(cached[0].artists[0]) is CompactArtist
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = TrackCache(str(tmp_path / "tracks.sqlite3"), max_entries=2)
+        cache.put_many({"a": Song(**track(1)), "b": Song(**track(2))})
+        cache.get_many(["a"])
+        cache.put_many({"c": Song(**track(3))})
+        assert len(cache) == 2
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
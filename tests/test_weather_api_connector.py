@@ -3,6 +3,7 @@ import pytest
 import sys
 
 
+from models.location import Location
 from src.weather_api_connector import WeatherApiConnector
 
 
@@ -25,3 +26,96 @@ class TestWeatherApiConnector:
         location = connector.encode_location("Hanover")
         time = connector.encode_time(location)
         assert time.month > 0
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def json(self):
+        return self.payload
+
+
+class TestWeatherResolutionCache:
+    geocode = [{"name": "Hanover", "country": "DE", "lat": 52.37, "lon": 9.73}]
+    weather = {
+        "data": [
+            {
+                "temp": 12.5,
+                "feels_like": 11.0,
+                "pressure": 1012,
+                "humidity": 80,
+                "dew_point": 9.1,
+                "uvi": 0.4,
+                "clouds": 75,
+                "visibility": 10000,
+                "wind_speed": 3.6,
+                "wind_deg": 240,
+                "weather": [{"main": "Clouds", "description": "broken clouds"}],
+            }
+        ]
+    }
+
+    def test_no_weather_call_after_warm_up(self):
+        from src.cache import SWRCache
+
+        calls = []
+        geocode, weather = self.geocode, self.weather
+
+        class FakeTransport:
+            def get(self, url, *args, **kwargs):
+                calls.append(url)
+                return FakeResponse(geocode if "geo" in url else weather)
+
+        connector = WeatherApiConnector(
+            "key", cache=SWRCache(), transport=FakeTransport()
+        )
+        connector.encode_location("Hanover")
+        connector.get_current_location_weather("Hanover")
+        calls.clear()
+
+        location = connector.encode_location("Hanover")
+        connector.encode_time(location)
+        weather = connector.get_current_location_weather("hanover")
+        assert weather.temperature == 12.5
+        assert calls == []
+
+
+class FakeTimezoneFinder:
+    def __init__(self, certain=None, likely=None):
+        self.certain = certain
+        self.likely = likely
+        self.calls = 0
+
+    def certain_timezone_at(self, lat, lng):
+        self.calls += 1
+        return self.certain
+
+    def timezone_at(self, lat, lng):
+        return self.likely
+
+
+class TestTimezoneResolution:
+    location = Location(name="Sea", country="", lat=54.5, lon=3.1)
+
+    def connector(self, monkeypatch, finder):
+        from src import weather_api_connector
+        from src.cache import SWRCache
+
+        monkeypatch.setattr(weather_api_connector, "_timezone_finder", finder)
+        return WeatherApiConnector("key", cache=SWRCache())
+
+    def test_falls_back_to_the_likely_timezone(self, monkeypatch):
+        finder = FakeTimezoneFinder(likely="Europe/Amsterdam")
+        connector = self.connector(monkeypatch, finder)
+        assert connector.resolve_timezone(self.location) == "Europe/Amsterdam"
+        assert connector.encode_time(self.location).tzinfo.zone == "Europe/Amsterdam"
+        assert finder.calls == 1
+
+    def test_unknown_timezone_is_utc_and_not_cached(self, monkeypatch):
+        finder = FakeTimezoneFinder()
+        connector = self.connector(monkeypatch, finder)
+        assert connector.encode_time(self.location).tzinfo.zone == "UTC"
+        finder.certain = "Etc/GMT"
+        assert connector.resolve_timezone(self.location) == "Etc/GMT"
+        assert finder.calls == 2